@@ -0,0 +1,218 @@
+import os
+import sys
+import argparse
+import cv2
+import numpy as np
+from array import array
+from collections import deque
+
+from maze_agent import PAREDE, COMIDA, SAIDA, AmbienteGrade, hash_labirinto
+
+
+VERSAO_CACHE = 1
+SUFIXO_CACHE = '.analise.npz'  # Cache gravado ao lado do arquivo do labirinto
+
+
+class AnaliseLabirinto:
+    """Análise estática de um labirinto (feita uma vez, no carregamento).
+
+    componentes: rótulo da componente conexa de cada célula (0 = parede);
+    becos: células de corredores sem saída (ramos que não levam à entrada nem à saída);
+    distancia_saida: distância em passos até a saída S mais próxima (-1 se inalcançável);
+    comida_inalcancavel: (linha, coluna) das comidas fora da componente da entrada.
+    """
+
+    __slots__ = ('hash', 'entrada', 'componentes', 'componente_entrada', 'becos', 'distancia_saida',
+                 'comida_total', 'comida_inalcancavel')
+
+    def __init__(self, hash_conteudo, entrada, componentes, becos, distancia_saida, comida_total,
+                 comida_inalcancavel):
+        self.hash = hash_conteudo
+        self.entrada = entrada
+        self.componentes = componentes
+        self.componente_entrada = int(componentes[entrada])
+        self.becos = becos
+        self.distancia_saida = distancia_saida
+        self.comida_total = comida_total
+        self.comida_inalcancavel = comida_inalcancavel
+
+    def distancia(self, linha, coluna):
+        """Distância até a saída (None se a célula não alcança nenhuma saída)"""
+        distancia = int(self.distancia_saida[linha, coluna])
+        return None if distancia < 0 else distancia
+
+    def alcancavel(self, linha, coluna):
+        """Se a célula está na mesma componente conexa da entrada"""
+        return int(self.componentes[linha, coluna]) == self.componente_entrada
+
+    def resumo(self):
+        """Dicionário com os números principais da análise"""
+        return {
+            'componentes': int(self.componentes.max()),
+            'comida_total': self.comida_total,
+            'comida_inalcancavel': len(self.comida_inalcancavel),
+            'celulas_beco': int(np.count_nonzero(self.becos)),
+            'distancia_entrada_saida': self.distancia(*self.entrada),
+        }
+
+    def salvar(self, nome_arquivo):
+        """Grava a análise em .npz (arquivo temporário + troca, para nunca deixar cache pela metade)"""
+        temporario = f"{nome_arquivo}.tmp"
+        with open(temporario, 'wb') as arquivo:
+            np.savez(arquivo, versao=VERSAO_CACHE, hash=np.frombuffer(self.hash, dtype=np.uint8),
+                     entrada=np.array(self.entrada), componentes=self.componentes, becos=self.becos,
+                     distancia_saida=self.distancia_saida, comida_total=self.comida_total,
+                     comida_inalcancavel=self.comida_inalcancavel)
+        os.replace(temporario, nome_arquivo)
+
+    @classmethod
+    def carregar(cls, nome_arquivo, hash_esperado):
+        """Lê a análise gravada; None se não existir, for de outra versão ou de outro conteúdo"""
+        try:
+            with np.load(nome_arquivo) as dados:
+                if int(dados['versao']) != VERSAO_CACHE or dados['hash'].tobytes() != hash_esperado:
+                    return None
+                return cls(hash_esperado, tuple(int(v) for v in dados['entrada']), dados['componentes'],
+                           dados['becos'], dados['distancia_saida'], int(dados['comida_total']),
+                           dados['comida_inalcancavel'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def campo_distancias(aberto, origens):
+    """Busca em largura a partir de várias origens: distância de cada célula (-1 se inalcançável)"""
+    linhas, colunas = aberto.shape
+    largura = colunas + 2
+    livre = bytearray(np.pad(aberto, 1).astype(np.uint8).tobytes())  # 1 = aberta e ainda não alcançada
+    distancias = array('i', [-1]) * len(livre)
+    fila = deque()
+    for linha, coluna in origens:
+        indice = (linha + 1) * largura + coluna + 1
+        livre[indice] = 0
+        distancias[indice] = 0
+        fila.append(indice)
+
+    deltas = (-largura, 1, largura, -1)
+    while fila:
+        indice = fila.popleft()
+        proxima = distancias[indice] + 1
+        for delta in deltas:
+            vizinho = indice + delta
+            if livre[vizinho]:
+                livre[vizinho] = 0
+                distancias[vizinho] = proxima
+                fila.append(vizinho)
+
+    campo = np.frombuffer(distancias, dtype=np.int32).reshape(linhas + 2, largura)
+    return campo[1:-1, 1:-1].copy()
+
+
+def marcar_becos(aberto, protegidas):
+    """Corredores sem saída: poda repetidamente as células abertas com no máximo uma vizinha aberta.
+
+    As células protegidas (entrada e saídas) nunca são podadas; o que sobra são os
+    ciclos e os caminhos entre elas.
+    """
+    linhas, colunas = aberto.shape
+    largura = colunas + 2
+    borda = np.pad(aberto, 1)
+    grau = np.zeros(borda.shape, dtype=np.int8)
+    grau[1:-1, 1:-1] = (borda[:-2, 1:-1].astype(np.int8) + borda[2:, 1:-1] + borda[1:-1, :-2] + borda[1:-1, 2:])
+    grau[~borda] = 0
+    protegida = np.zeros(borda.shape, dtype=bool)
+    for linha, coluna in protegidas:
+        protegida[linha + 1, coluna + 1] = True
+
+    restantes = bytearray(borda.astype(np.uint8).tobytes())  # 1 = aberta e ainda não podada
+    graus = array('b', grau.tobytes())
+    nao_podavel = bytearray(protegida.astype(np.uint8).tobytes())
+    pilha = np.flatnonzero(borda & (grau <= 1) & ~protegida).tolist()
+
+    deltas = (-largura, 1, largura, -1)
+    while pilha:
+        indice = pilha.pop()
+        if not restantes[indice]:
+            continue
+        restantes[indice] = 0
+        for delta in deltas:
+            vizinho = indice + delta
+            if restantes[vizinho]:
+                graus[vizinho] -= 1
+                if graus[vizinho] <= 1 and not nao_podavel[vizinho]:
+                    pilha.append(vizinho)
+
+    podadas = borda & (np.frombuffer(restantes, dtype=np.uint8).reshape(borda.shape) == 0)
+    return podadas[1:-1, 1:-1].copy()
+
+
+def analisar_grade(codigos, entrada, hash_conteudo=b''):
+    """Análise estática da grade de códigos (com a entrada já convertida em corredor)"""
+    aberto = codigos != PAREDE
+    _, componentes = cv2.connectedComponents(aberto.astype(np.uint8), connectivity=4, ltype=cv2.CV_32S)
+    saidas = [tuple(posicao) for posicao in np.argwhere(codigos == SAIDA).tolist()]
+
+    comidas = codigos == COMIDA
+    componente_entrada = componentes[entrada]
+    inalcancaveis = np.argwhere(comidas & (componentes != componente_entrada)).astype(np.int32)
+
+    return AnaliseLabirinto(
+        hash_conteudo, entrada, componentes,
+        becos=marcar_becos(aberto, [entrada] + saidas),
+        distancia_saida=campo_distancias(aberto, saidas),
+        comida_total=int(np.count_nonzero(comidas)),
+        comida_inalcancavel=inalcancaveis,
+    )
+
+
+def analisar_labirinto(nome_arquivo, codigos=None, entrada=None, usar_cache=True):
+    """Análise do arquivo do labirinto, lida do cache ao lado dele quando o conteúdo não mudou.
+
+    Sem codigos/entrada, o labirinto é carregado do arquivo (AmbienteGrade). Com
+    usar_cache, a análise calculada é gravada para as próximas cargas (se possível).
+    """
+    hash_conteudo = hash_labirinto(nome_arquivo)
+    nome_cache = nome_arquivo + SUFIXO_CACHE
+    if usar_cache:
+        analise = AnaliseLabirinto.carregar(nome_cache, hash_conteudo)
+        if analise is not None:
+            return analise
+
+    if codigos is None:
+        ambiente = AmbienteGrade(nome_arquivo)
+        codigos, entrada = ambiente.grade, (ambiente.linha_agente, ambiente.coluna_agente)
+    analise = analisar_grade(codigos, entrada, hash_conteudo)
+
+    if usar_cache:
+        try:
+            analise.salvar(nome_cache)
+        except OSError:
+            pass  # Diretório somente leitura: segue sem cache
+    return analise
+
+
+def main():
+    # Import local: o benchmark_lote importa o maze_agent, que importa este módulo sob demanda
+    from benchmark_lote import listar_labirintos
+
+    parser = argparse.ArgumentParser(
+        description="Análise estática de labirintos: componentes, comida inalcançável, becos e distância à saída")
+    parser.add_argument("entradas", nargs="+", help="arquivos, diretórios (*.txt) ou padrões glob de labirintos")
+    parser.add_argument("--sem-cache", action="store_true", help="recalcula sem ler nem gravar o cache")
+    argumentos = parser.parse_args()
+
+    for nome in listar_labirintos(argumentos.entradas):
+        try:
+            resumo = analisar_labirinto(nome, usar_cache=not argumentos.sem_cache).resumo()
+        except (OSError, ValueError) as e:
+            print(f"{nome}: erro: {e}", flush=True)
+            continue
+        distancia = resumo['distancia_entrada_saida']
+        print(f"{nome}: {resumo['componentes']} componentes | comida inalcançável: "
+              f"{resumo['comida_inalcancavel']}/{resumo['comida_total']} | células em becos: "
+              f"{resumo['celulas_beco']} | entrada -> saída: "
+              f"{'inalcançável' if distancia is None else f'{distancia} passos'}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from maze_agent import Ambiente, AmbienteGrade, AmbienteLadrilhos, Agente, LabirintoLadrilhos
+from solucionador_otimo import resolver_labirinto
+
+
+# Colunas do relatório (na ordem do CSV)
+CAMPOS_RELATORIO = [
+    'arquivo', 'semente', 'passos', 'iteracoes', 'comida_coletada', 'comida_esperada',
+    'pontuacao', 'saida_conhecida', 'sucesso', 'tempo_s', 'erro', 'pontuacao_otima', 'passos_otimos',
+]
+
+
+def listar_labirintos(entradas):
+    """Expande diretórios (*.txt e *.lab), padrões glob e arquivos em uma lista ordenada de labirintos"""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(glob.glob(os.path.join(entrada, '*.txt')))
+            arquivos.extend(glob.glob(os.path.join(entrada, '*.lab')))  # Formato binário
+            arquivos.extend(glob.glob(os.path.join(entrada, '*.ladr')))  # Formato em ladrilhos
+        elif os.path.isfile(entrada):
+            arquivos.append(entrada)
+        else:
+            arquivos.extend(glob.glob(entrada, recursive=True))
+    return sorted(set(arquivos))
+
+
+def executar_rodada(nome_arquivo, semente, usar_grade=False):
+    """Executa uma rodada headless (sem impressão e sem vídeo) e retorna uma linha do relatório"""
+    linha = {'arquivo': nome_arquivo, 'semente': semente}
+    inicio = time.perf_counter()
+    try:
+        classe_ambiente = AmbienteGrade if usar_grade else Ambiente
+        if LabirintoLadrilhos.eh_ladrilhos(nome_arquivo):
+            classe_ambiente = AmbienteLadrilhos  # Os outros ambientes não leem o formato em ladrilhos
+        ambiente = classe_ambiente(nome_arquivo)
+
+        agente = Agente(ambiente, ambiente.obter_total_comida(), semente)
+        agente.silencioso = True
+        agente.executar()
+
+        linha.update(agente.obter_resultado())
+    except Exception as e:
+        linha['erro'] = f"{type(e).__name__}: {e}"
+    linha['tempo_s'] = round(time.perf_counter() - inicio, 6)
+    return linha
+
+
+def salvar_relatorio(linhas, nome_saida, campos=CAMPOS_RELATORIO):
+    """Salva o relatório em JSON (extensão .json) ou CSV (com as colunas de campos, nessa ordem)"""
+    if nome_saida.lower().endswith('.json'):
+        with open(nome_saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(linhas, arquivo, indent=2, ensure_ascii=False)
+        return
+
+    with open(nome_saida, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.DictWriter(arquivo, fieldnames=campos)
+        escritor.writeheader()
+        for linha in linhas:
+            escritor.writerow({campo: linha.get(campo, '') for campo in campos})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa o agente em lote (headless) sobre vários labirintos")
+    parser.add_argument("entradas", nargs="+",
+                        help="arquivos, diretórios (*.txt) ou padrões glob de labirintos")
+    parser.add_argument("--sementes", type=int, default=1,
+                        help="número de sementes por labirinto (padrão: 1)")
+    parser.add_argument("--semente-inicial", type=int, default=0,
+                        help="primeira semente (padrão: 0)")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="número de processos (padrão: número de CPUs)")
+    parser.add_argument("--saida", default="relatorio_benchmark.csv",
+                        help="arquivo do relatório, .csv ou .json (padrão: relatorio_benchmark.csv)")
+    parser.add_argument("--grade", action="store_true",
+                        help="usa a grade NumPy (AmbienteGrade)")
+    parser.add_argument("--otimo", action="store_true",
+                        help="inclui a pontuação de referência do solucionador com conhecimento total")
+    argumentos = parser.parse_args()
+
+    labirintos = listar_labirintos(argumentos.entradas)
+    if not labirintos:
+        print("Nenhum labirinto encontrado.", flush=True)
+        return 1
+
+    sementes = range(argumentos.semente_inicial, argumentos.semente_inicial + argumentos.sementes)
+    rodadas = [(nome, semente) for nome in labirintos for semente in sementes]
+    print(f"Executando {len(rodadas)} rodadas ({len(labirintos)} labirintos x {len(sementes)} sementes)...", flush=True)
+
+    inicio = time.perf_counter()
+    linhas = []
+    with ProcessPoolExecutor(max_workers=argumentos.processos) as executor:
+        futuros = [executor.submit(executar_rodada, nome, semente, argumentos.grade) for nome, semente in rodadas]
+        # A referência depende só do labirinto: uma resolução por arquivo (o solucionador carrega a
+        # grade inteira, então os labirintos em ladrilhos, maiores que a memória, ficam sem referência)
+        referencias = {nome: executor.submit(resolver_labirinto, nome) for nome in labirintos
+                       if not LabirintoLadrilhos.eh_ladrilhos(nome)} if argumentos.otimo else {}
+        for futuro in as_completed(futuros):
+            linhas.append(futuro.result())
+        for nome, futuro in referencias.items():
+            referencias[nome] = futuro.result()
+
+    for linha in linhas:
+        referencia = referencias.get(linha['arquivo'], {})
+        if 'pontuacao' in referencia:
+            linha['pontuacao_otima'] = referencia['pontuacao']
+            linha['passos_otimos'] = referencia['passos']
+
+    # Ordem estável no relatório, independente da ordem de conclusão
+    linhas.sort(key=lambda linha: (linha['arquivo'], linha['semente']))
+    salvar_relatorio(linhas, argumentos.saida)
+
+    sucessos = sum(1 for linha in linhas if linha.get('sucesso'))
+    erros = sum(1 for linha in linhas if linha.get('erro'))
+    pontuacoes = [linha['pontuacao'] for linha in linhas if 'pontuacao' in linha]
+    print("\n=== RESUMO DO LOTE ===", flush=True)
+    print(f"Rodadas: {len(linhas)} | Sucessos: {sucessos} | Erros: {erros}", flush=True)
+    if pontuacoes:
+        print(f"Pontuação média: {sum(pontuacoes) / len(pontuacoes):.2f}", flush=True)
+    diferencas = [linha['pontuacao_otima'] - linha['pontuacao'] for linha in linhas
+                  if 'pontuacao' in linha and 'pontuacao_otima' in linha]
+    if diferencas:
+        print(f"Distância média para a referência: {sum(diferencas) / len(diferencas):.2f} pontos", flush=True)
+    print(f"Tempo total: {time.perf_counter() - inicio:.2f}s", flush=True)
+    print(f"Relatório salvo em: {argumentos.saida}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
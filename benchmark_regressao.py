@@ -0,0 +1,253 @@
+import io
+import os
+import sys
+import json
+import contextlib
+import time
+import argparse
+import tracemalloc
+
+from maze_agent import Ambiente, AmbienteGrade, AmbienteMapeado, Agente, RenderizadorTerminal, hash_labirinto
+from gerador_labirinto import gerar_labirinto
+
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Comida cercada por paredes: o agente esgota a fronteira e cai na recuperação de ciclos com
+# passos aleatórios, então o resultado depende da semente (os demais casos não usam o sorteio)
+LABIRINTO_COMIDA_ISOLADA = """\
+XXXXXXXXXXXXX
+XE____X_____X
+X_XXX_X_XXX_X
+X_X_o___X___X
+X_X_XXXXX_XXX
+X___X_____XoX
+XXX_X_XXX_XXX
+Xo__X___X___X
+X_XXXXX_XXX_X
+X_____X___X_S
+XXXXXXXXXXXXX
+"""
+
+# Corpus fixo: (nome, parâmetros do gerador, texto literal do labirinto ou None para o arquivo do
+# repositório, ambiente, sementes do agente)
+CORPUS = (
+    ('labirinto', None, 'Ambiente', (0,)),
+    ('eller_41x41', dict(largura=41, altura=41, semente=7), 'Ambiente', (0,)),
+    ('eller_101x101', dict(largura=101, altura=101, semente=7), 'AmbienteGrade', (0,)),
+    ('sidewinder_101x101_ciclos', dict(largura=101, altura=101, semente=7, algoritmo='sidewinder',
+                                       taxa_ciclos=0.05), 'AmbienteGrade', (0,)),
+    ('eller_201x201_ciclos', dict(largura=201, altura=201, semente=7, taxa_ciclos=0.02), 'AmbienteGrade', (0,)),
+    ('eller_301x301', dict(largura=301, altura=301, semente=7), 'AmbienteMapeado', (0,)),
+    ('eller_401x401', dict(largura=401, altura=401, semente=7), 'AmbienteMapeado', (0,)),
+    ('comida_isolada', LABIRINTO_COMIDA_ISOLADA, 'Ambiente', (0, 1)),
+)
+
+CLASSES_AMBIENTE = {'Ambiente': Ambiente, 'AmbienteGrade': AmbienteGrade, 'AmbienteMapeado': AmbienteMapeado}
+
+# Resultados que precisam ser idênticos aos de referência
+CAMPOS_EXATOS = ('hash', 'passos', 'iteracoes', 'comida_coletada', 'pontuacao')
+
+
+def calibrar(repeticoes=5):
+    """Tempo (s) de uma carga fixa em Python puro: mede a velocidade da máquina no momento.
+
+    Os tempos do agente são comparados em relação a ela, para que a referência
+    valha em máquinas diferentes e com carga variável.
+    """
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        visitados = {(0, 0)}
+        fila = [(0, 0)]
+        for linha, coluna in fila:
+            for vizinho in ((linha + 1, coluna), (linha, coluna + 1)):
+                if vizinho[0] < 150 and vizinho[1] < 150 and vizinho not in visitados:
+                    visitados.add(vizinho)
+                    fila.append(vizinho)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def preparar_corpus(diretorio):
+    """Gera (se ainda não existirem) os labirintos do corpus e retorna (nome, arquivo, ambiente, sementes)"""
+    os.makedirs(diretorio, exist_ok=True)
+    casos = []
+    for nome, parametros, ambiente, sementes in CORPUS:
+        if parametros is None:
+            arquivo = os.path.join(DIRETORIO, f"{nome}.txt")
+        else:
+            arquivo = os.path.join(diretorio, f"{nome}.txt")
+            if isinstance(parametros, str):
+                with open(arquivo, 'w', encoding='utf-8') as saida:
+                    saida.write(parametros)
+            elif not os.path.exists(arquivo):
+                gerar_labirinto(arquivo, **parametros)
+        casos.append((nome, arquivo, ambiente, sementes))
+    return casos
+
+
+def executar_agente(arquivo, classe_ambiente, semente):
+    """Uma execução headless do agente; retorna seus resultados"""
+    ambiente = classe_ambiente(arquivo)
+    agente = Agente(ambiente, ambiente.obter_total_comida(), semente)
+    agente.silencioso = True
+    agente.executar()
+    return agente.obter_resultado()
+
+
+def medir_caso(arquivo, ambiente, semente, repeticoes=3):
+    """Mede um caso: resultados, menor tempo entre as repetições e pico de memória alocada"""
+    classe_ambiente = CLASSES_AMBIENTE[ambiente]
+    tempos = []
+    resultados = set()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = executar_agente(arquivo, classe_ambiente, semente)
+        tempos.append(time.perf_counter() - inicio)
+        resultados.add((resultado['passos'], resultado['iteracoes'], resultado['comida_coletada'],
+                        resultado['pontuacao']))
+
+    # Memória medida numa execução à parte (o tracemalloc deixa a execução mais lenta)
+    tracemalloc.start()
+    try:
+        executar_agente(arquivo, classe_ambiente, semente)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    passos = max(resultado['passos'], 1)
+    return {
+        'hash': hash_labirinto(arquivo).hex(),
+        'passos': resultado['passos'],
+        'iteracoes': resultado['iteracoes'],
+        'comida_coletada': resultado['comida_coletada'],
+        'pontuacao': resultado['pontuacao'],
+        'deterministico': len(resultados) == 1,
+        'tempo_por_passo_us': round(min(tempos) / passos * 1e6, 3),
+        'memoria_por_passo_bytes': round(pico / passos, 1),
+    }
+
+
+def verificar_terminal(arquivo, estilo):
+    """Falhas do renderizador de terminal: sem limite de taxa, todo passo (e o início) precisa ser desenhado,
+    mesmo com as mensagens de acompanhamento ligadas"""
+    saida = io.StringIO()
+    ambiente = Ambiente(arquivo, None, RenderizadorTerminal(a_cada=1, saida=saida, estilo=estilo))
+    agente = Agente(ambiente, ambiente.obter_total_comida(), 0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        agente.executar()
+
+    texto = saida.getvalue()
+    if estilo == 'completo':
+        desenhos = texto.count("\n\n")  # Cada labirinto termina numa linha em branco
+    else:
+        desenhos = texto.count(f"\x1b[{ambiente.linhas + 2};1H")  # Cada desenho reescreve a linha de status
+    esperados = agente.iteracoes + 1
+    return [] if desenhos == esperados else [f"{desenhos} desenhos para {esperados} passos"]
+
+
+def comparar(medido, referencia, escala, tolerancia_tempo, tolerancia_memoria):
+    """Lista de regressões do caso medido em relação à referência.
+
+    escala = velocidade atual da máquina / velocidade na referência (pela calibração).
+    """
+    falhas = []
+    if not medido['deterministico']:
+        falhas.append("resultados diferentes entre repetições com a mesma semente")
+    for campo in CAMPOS_EXATOS:
+        if medido[campo] != referencia[campo]:
+            falhas.append(f"{campo}: {medido[campo]} (referência: {referencia[campo]})")
+    limite_tempo = referencia['tempo_por_passo_us'] * escala * tolerancia_tempo
+    if medido['tempo_por_passo_us'] > limite_tempo:
+        falhas.append(f"tempo por passo: {medido['tempo_por_passo_us']:.2f} µs (limite: {limite_tempo:.2f} µs)")
+    limite_memoria = referencia['memoria_por_passo_bytes'] * tolerancia_memoria
+    if medido['memoria_por_passo_bytes'] > limite_memoria:
+        falhas.append(f"memória por passo: {medido['memoria_por_passo_bytes']:.0f} B "
+                      f"(limite: {limite_memoria:.0f} B)")
+    return falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark de regressão: passos/iterações/pontuação idênticos e tempo/memória dentro do orçamento")
+    parser.add_argument("--referencia", default=os.path.join(DIRETORIO, "benchmark_referencia.json"),
+                        help="arquivo JSON com os valores de referência")
+    parser.add_argument("--corpus", default=os.path.join(DIRETORIO, "corpus_regressao"),
+                        help="diretório dos labirintos gerados do corpus")
+    parser.add_argument("--atualizar", action="store_true",
+                        help="grava os valores medidos como nova referência em vez de comparar")
+    parser.add_argument("--repeticoes", type=int, default=3,
+                        help="execuções cronometradas por caso; vale a mais rápida (padrão: 3)")
+    parser.add_argument("--tolerancia-tempo", type=float, default=1.5,
+                        help="tempo por passo máximo como múltiplo da referência (padrão: 1.5)")
+    parser.add_argument("--tolerancia-memoria", type=float, default=1.2,
+                        help="memória por passo máxima como múltiplo da referência (padrão: 1.2)")
+    parser.add_argument("--casos", nargs="*", default=None,
+                        help="executa só os casos cujo nome contém um destes trechos")
+    argumentos = parser.parse_args()
+
+    referencia_geral = {}
+    if not argumentos.atualizar:
+        try:
+            with open(argumentos.referencia, encoding='utf-8') as arquivo:
+                referencia_geral = json.load(arquivo)
+        except OSError:
+            print(f"Erro: referência '{argumentos.referencia}' não encontrada (gere com --atualizar)", flush=True)
+            return 1
+    referencias = referencia_geral.get('casos', {})
+
+    calibracao = calibrar()
+    escala = calibracao / referencia_geral['calibracao_s'] if referencia_geral else 1.0
+    print(f"Calibração: {calibracao * 1e3:.2f} ms (escala em relação à referência: {escala:.2f})", flush=True)
+
+    medidos = {}
+    regressoes = 0
+    for nome, arquivo, ambiente, sementes in preparar_corpus(argumentos.corpus):
+        if argumentos.casos and not any(trecho in nome for trecho in argumentos.casos):
+            continue
+        for semente in sementes:
+            caso = f"{nome}/{semente}"
+            medido = medir_caso(arquivo, ambiente, semente, argumentos.repeticoes)
+            medidos[caso] = medido
+            linha = (f"{caso:<32} passos {medido['passos']:>6} | iter {medido['iteracoes']:>6} | "
+                     f"pontos {medido['pontuacao']:>7} | {medido['tempo_por_passo_us']:>8.2f} µs/passo | "
+                     f"{medido['memoria_por_passo_bytes']:>9.0f} B/passo")
+            if argumentos.atualizar:
+                print(linha, flush=True)
+                continue
+
+            referencia = referencias.get(caso)
+            falhas = ["caso sem referência"] if referencia is None else comparar(
+                medido, referencia, escala, argumentos.tolerancia_tempo, argumentos.tolerancia_memoria)
+            print(f"{'FALHOU' if falhas else 'ok':<7}{linha}", flush=True)
+            for falha in falhas:
+                print(f"       - {falha}", flush=True)
+            regressoes += bool(falhas)
+
+    # O renderizador não tem referência gravada: só precisa desenhar todos os passos
+    verificacoes = 0
+    for estilo in ('diff', 'completo'):
+        caso = f"terminal_{estilo}"
+        if argumentos.atualizar or (argumentos.casos and not any(trecho in caso for trecho in argumentos.casos)):
+            continue
+        falhas = verificar_terminal(os.path.join(DIRETORIO, "labirinto.txt"), estilo)
+        print(f"{'FALHOU' if falhas else 'ok':<7}{caso:<32} todos os passos desenhados", flush=True)
+        for falha in falhas:
+            print(f"       - {falha}", flush=True)
+        verificacoes += 1
+        regressoes += bool(falhas)
+
+    if argumentos.atualizar:
+        with open(argumentos.referencia, 'w', encoding='utf-8') as arquivo:
+            json.dump({'calibracao_s': round(calibracao, 6), 'casos': medidos}, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write('\n')
+        print(f"Referência salva em: {argumentos.referencia}", flush=True)
+        return 0
+
+    print(f"\n{len(medidos) + verificacoes} casos | {regressoes} com regressão", flush=True)
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
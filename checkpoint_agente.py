@@ -0,0 +1,305 @@
+import os
+import queue
+import pickle
+import signal
+import struct
+import threading
+import zlib
+
+from maze_agent import ITERACOES_ENTRE_CHECKPOINTS, IndiceComida
+
+
+# Memórias do agente gravadas por blocos (só os blocos alterados entram em cada delta)
+MEMORIAS = ('mapa_conhecido', 'contador_visitas', 'posicoes_visitadas', 'posicoes_exploradas')
+
+# Conjuntos de posições gravados como diferença (adicionadas, removidas) em relação ao checkpoint anterior
+CONJUNTOS = ('fronteira', 'locais_comida')
+
+# Demais atributos do agente, gravados inteiros em todo checkpoint
+ESCALARES_AGENTE = (
+    'comida_esperada', 'passos', 'comida_coletada', 'posicao_saida', 'saida_conhecida',
+    'caminho_planejado', 'indice_caminho', 'alvo_planejado', 'celulas_caminho', 'alvo_comida',
+    'versao_comida_alvo', 'explorar_fronteira', 'alvo_fronteira', 'iteracoes', 'limite_iteracoes',
+    'detectar_ciclos', 'marco_progresso', 'estados_sem_progresso', 'recuperacoes', 'passos_recuperacao',
+    'diagnostico',
+)
+
+
+class CheckpointAgente:
+    """Checkpoints periódicos do estado do agente e do ambiente, para retomar execuções longas.
+
+    O arquivo tem um cabeçalho (assinatura, versão, SHA-256 do labirinto) e registros
+    [uint32 tamanho][uint32 crc32][pickle comprimido]: o primeiro é completo e cada
+    seguinte traz só o que mudou desde o anterior (blocos das memórias, comidas comidas,
+    diferenças da fronteira e das comidas conhecidas, posição nas saídas) mais os
+    escalares do agente. O loop só captura o estado; a compressão e a escrita (com fsync)
+    ficam com uma thread. Um registro pela metade (queda durante a escrita) não confere
+    com o crc e é ignorado na leitura; quando os deltas passam do tamanho do registro
+    completo, o arquivo é reescrito com um novo registro completo (temporário + os.replace).
+    """
+
+    ASSINATURA = b'MZCK'
+    VERSAO = 1
+    CABECALHO = struct.Struct('<4sB32s')
+    REGISTRO = struct.Struct('<II')
+    TAMANHO_BLOCO = 1 << 16  # Blocos das memórias densas (nas esparsas, cada ladrilho é um bloco)
+
+    def __init__(self, nome_arquivo, hash_labirinto, a_cada=ITERACOES_ENTRE_CHECKPOINTS, saidas=None):
+        self.nome_arquivo = nome_arquivo
+        self.hash_labirinto = hash_labirinto
+        self.a_cada = max(1, a_cada)
+        self.saidas = saidas or {}  # nome: saída com ponto_retomada() (vídeo, eventos, trajetória)
+        self.proxima_iteracao = self.a_cada
+        self.interromper = False
+
+        # Estado do último checkpoint, para gravar só as diferenças
+        self.crc_blocos = {}  # memória: {chave do bloco: crc32}
+        self.conjuntos = {}  # nome: conjunto gravado
+        self.comidas_salvas = 0
+        self.tamanho_completo = 0
+        self.tamanho_deltas = 0
+
+        self.erro_gravacao = None
+        self.fila = queue.Queue(maxsize=1)  # No máximo um checkpoint esperando a gravação
+        self.thread_gravacao = threading.Thread(target=self.processar_fila, daemon=True)
+        self.thread_gravacao.start()
+
+    def acompanhar(self, agente):
+        """Liga os checkpoints ao agente; o primeiro sai a_cada iterações depois da atual"""
+        agente.checkpoint = self
+        self.proxima_iteracao = agente.iteracoes + self.a_cada
+
+    def pedir_interrupcao(self, *_):
+        """Tratador do Ctrl-C: salva um checkpoint no fim da iteração atual e interrompe.
+
+        Um segundo Ctrl-C volta ao comportamento padrão (KeyboardInterrupt imediato).
+        """
+        self.interromper = True
+        self.proxima_iteracao = 0
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    def salvar(self, agente):
+        """Captura o estado no fim da iteração e o entrega à thread de gravação"""
+        if self.erro_gravacao is not None:
+            print(f"Erro ao gravar checkpoint: {self.erro_gravacao}", flush=True)
+            self.erro_gravacao = None
+
+        completo = not self.tamanho_completo or self.tamanho_deltas >= self.tamanho_completo
+        dados = pickle.dumps(self.capturar(agente, completo), protocol=pickle.HIGHEST_PROTOCOL)
+        if completo:
+            self.tamanho_completo = len(dados)
+            self.tamanho_deltas = 0
+        else:
+            self.tamanho_deltas += len(dados)
+        self.fila.put((completo, dados))
+        self.proxima_iteracao = agente.iteracoes + self.a_cada
+
+    def capturar(self, agente, completo):
+        """Registro do estado atual: completo ou só o que mudou desde o checkpoint anterior"""
+        if completo:
+            self.crc_blocos = {}
+            self.conjuntos = {}
+            self.comidas_salvas = 0
+        ambiente = agente.ambiente
+
+        escalares = {nome: getattr(agente, nome) for nome in ESCALARES_AGENTE}
+        escalares['rng'] = agente.rng.getstate()
+        escalares['versao_comidas'] = agente.locais_comida.versao
+        escalares['bloco_comidas'] = agente.locais_comida.tamanho_bloco
+        escalares['quantidades'] = {nome: getattr(getattr(agente, nome), 'quantidade', None) for nome in MEMORIAS}
+
+        return {
+            'completo': completo,
+            'agente': escalares,
+            'ambiente': {
+                'linhas': ambiente.linhas,
+                'colunas': ambiente.colunas,
+                'tamanho_ladrilho': getattr(ambiente, 'tamanho_ladrilho', None),
+                'posicao': (ambiente.linha_agente, ambiente.coluna_agente, ambiente.direcao_agente),
+                'total_comida': ambiente.total_comida,
+                'comida_restante': ambiente.comida_restante,
+            },
+            'comidas': self.comidas_novas(ambiente),
+            'memorias': {nome: self.blocos_alterados(nome, getattr(agente, nome)) for nome in MEMORIAS},
+            'conjuntos': {nome: self.diferenca_conjunto(nome, getattr(agente, nome)) for nome in CONJUNTOS},
+            'saidas': {nome: saida.ponto_retomada(completo, continuar=not self.interromper)
+                       for nome, saida in self.saidas.items()},
+        }
+
+    def comidas_novas(self, ambiente):
+        """Células (índices lineares) das comidas comidas desde o checkpoint anterior"""
+        if ambiente.celulas_comida is not None:
+            # Ambiente já indexado pela API headless (snapshot/restore): a máscara inteira
+            return {'mascara': ambiente.comidas_comidas}
+        comidas = ambiente.comidas_antes_do_indice
+        novas = comidas[self.comidas_salvas:]
+        self.comidas_salvas = len(comidas)
+        return {'novas': novas}
+
+    def blocos_alterados(self, nome, memoria):
+        """Blocos da memória cujo crc32 mudou desde o checkpoint anterior (blocos zerados contam como gravados)"""
+        crcs = self.crc_blocos.setdefault(nome, {})
+        alterados = {}
+        zerados = {}
+        for chave, dados in memoria.blocos(self.TAMANHO_BLOCO):
+            crc = zlib.crc32(dados)
+            anterior = crcs.get(chave)
+            if anterior is None:
+                tamanho = len(dados)
+                if tamanho not in zerados:
+                    zerados[tamanho] = zlib.crc32(bytes(tamanho))
+                anterior = zerados[tamanho]
+            if crc != anterior:
+                alterados[chave] = bytes(dados)
+                crcs[chave] = crc
+        return alterados
+
+    def diferenca_conjunto(self, nome, conjunto):
+        """(adicionadas, removidas) desde o checkpoint anterior"""
+        atual = set(conjunto)
+        anterior = self.conjuntos.get(nome, set())
+        self.conjuntos[nome] = atual
+        return atual - anterior, anterior - atual
+
+    def processar_fila(self):
+        """Thread de gravação: comprime e grava os checkpoints da fila até receber None"""
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            try:
+                self.gravar(*item)
+            except OSError as e:
+                self.erro_gravacao = e
+
+    def gravar(self, completo, dados):
+        """Grava um registro: completo em um arquivo novo (troca atômica) ou acrescentado ao atual"""
+        comprimido = zlib.compress(dados, 1)
+        registro = self.REGISTRO.pack(len(comprimido), zlib.crc32(comprimido)) + comprimido
+        if completo:
+            temporario = f"{self.nome_arquivo}.tmp"
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(self.CABECALHO.pack(self.ASSINATURA, self.VERSAO, self.hash_labirinto))
+                arquivo.write(registro)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+            os.replace(temporario, self.nome_arquivo)
+        else:
+            with open(self.nome_arquivo, 'ab') as arquivo:
+                arquivo.write(registro)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+
+    def fechar(self):
+        """Espera a gravação do último checkpoint e encerra a thread"""
+        if self.thread_gravacao is None:
+            return
+        self.fila.put(None)
+        self.thread_gravacao.join()
+        self.thread_gravacao = None
+        if self.erro_gravacao is not None:
+            print(f"Erro ao gravar checkpoint: {self.erro_gravacao}", flush=True)
+
+
+class EstadoCheckpoint:
+    """Registros lidos de um arquivo de checkpoint, para restaurar o agente e as saídas.
+
+    Os registros são pickle: só retome checkpoints gravados por você.
+    """
+
+    def __init__(self, registros):
+        self.registros = registros
+
+    @classmethod
+    def ler(cls, nome_arquivo, hash_esperado):
+        """Lê o registro completo e os deltas seguintes, até o último registro íntegro"""
+        with open(nome_arquivo, 'rb') as arquivo:
+            cabecalho = arquivo.read(CheckpointAgente.CABECALHO.size)
+            if len(cabecalho) < CheckpointAgente.CABECALHO.size:
+                raise ValueError(f"Arquivo de checkpoint truncado: {nome_arquivo}")
+            assinatura, versao, hash_conteudo = CheckpointAgente.CABECALHO.unpack(cabecalho)
+            if assinatura != CheckpointAgente.ASSINATURA:
+                raise ValueError(f"{nome_arquivo} não é um arquivo de checkpoint")
+            if versao != CheckpointAgente.VERSAO:
+                raise ValueError(f"Versão de checkpoint não suportada: {versao}")
+            if hash_conteudo != hash_esperado:
+                raise ValueError("O checkpoint foi gravado para outro labirinto (hash diferente)")
+
+            registros = []
+            while True:
+                prefixo = arquivo.read(CheckpointAgente.REGISTRO.size)
+                if len(prefixo) < CheckpointAgente.REGISTRO.size:
+                    break
+                tamanho, crc = CheckpointAgente.REGISTRO.unpack(prefixo)
+                comprimido = arquivo.read(tamanho)
+                if len(comprimido) < tamanho or zlib.crc32(comprimido) != crc:
+                    break  # Registro pela metade: vale o checkpoint anterior
+                registros.append(pickle.loads(zlib.decompress(comprimido)))
+
+        if not registros:
+            raise ValueError(f"Nenhum checkpoint íntegro em {nome_arquivo}")
+        return cls(registros)
+
+    @property
+    def iteracao(self):
+        """Iteração em que o último checkpoint foi salvo"""
+        return self.registros[-1]['agente']['iteracoes']
+
+    def estados_saida(self, nome):
+        """Estados de uma saída em cada registro (vazio se ela não era gravada)"""
+        return [registro['saidas'][nome] for registro in self.registros if nome in registro['saidas']]
+
+    def estado_saida(self, nome):
+        """Estado da saída no último checkpoint (None se ela não era gravada)"""
+        estados = self.estados_saida(nome)
+        return estados[-1] if estados else None
+
+    def restaurar(self, agente):
+        """Aplica ao agente recém-criado (e ao seu ambiente, recém-carregado) o estado do último checkpoint"""
+        ultimo = self.registros[-1]
+        ambiente = agente.ambiente
+        estado_ambiente = ultimo['ambiente']
+        if ((estado_ambiente['linhas'], estado_ambiente['colunas'], estado_ambiente['tamanho_ladrilho'])
+                != (ambiente.linhas, ambiente.colunas, getattr(ambiente, 'tamanho_ladrilho', None))):
+            raise ValueError("O checkpoint foi gravado com outras dimensões ou outra memória (--ladrilhos)")
+
+        # Ambiente: comidas comidas, posição e contagens
+        linha, coluna, direcao = estado_ambiente['posicao']
+        comidas = ultimo['comidas']
+        if 'mascara' in comidas:
+            ambiente.restore((linha, coluna, direcao, comidas['mascara']))
+        else:
+            for registro in self.registros:
+                for celula in registro['comidas']['novas']:
+                    linha_comida, coluna_comida = divmod(celula, ambiente.colunas)
+                    ambiente.definir_comida(linha_comida, coluna_comida, False)
+                    ambiente.marcar_comida_comida(linha_comida, coluna_comida)
+        ambiente.linha_agente, ambiente.coluna_agente, ambiente.direcao_agente = linha, coluna, direcao
+        ambiente.total_comida = estado_ambiente['total_comida']
+        ambiente.comida_restante = estado_ambiente['comida_restante']
+
+        # Memórias: os blocos de cada registro sobrescrevem os dos anteriores
+        for registro in self.registros:
+            for nome, blocos in registro['memorias'].items():
+                memoria = getattr(agente, nome)
+                for chave, dados in blocos.items():
+                    memoria.restaurar_bloco(chave, dados)
+
+        conjuntos = {nome: set() for nome in CONJUNTOS}
+        for registro in self.registros:
+            for nome, (adicionadas, removidas) in registro['conjuntos'].items():
+                conjuntos[nome] -= removidas
+                conjuntos[nome] |= adicionadas
+
+        escalares = ultimo['agente']
+        for nome in ESCALARES_AGENTE:
+            setattr(agente, nome, escalares[nome])
+        for nome, quantidade in escalares['quantidades'].items():
+            if quantidade is not None:
+                getattr(agente, nome).quantidade = quantidade
+        agente.rng.setstate(escalares['rng'])
+        agente.fronteira = conjuntos['fronteira']
+        agente.locais_comida = IndiceComida(escalares['bloco_comidas'])
+        for posicao in conjuntos['locais_comida']:
+            agente.locais_comida.add(posicao)
+        agente.locais_comida.versao = escalares['versao_comidas']
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import argparse
+
+from maze_agent import LabirintoBinario, LabirintoLadrilhos, codigos_do_texto, texto_dos_codigos
+
+
+EXTENSAO_BINARIA = '.lab'
+EXTENSAO_LADRILHOS = '.ladr'
+
+
+def converter(entrada, saida, verificar=False):
+    """Converte texto -> binário ou binário -> texto (conforme o formato da entrada); retorna o sentido.
+
+    Saída com extensão .ladr: grava no formato em ladrilhos, a partir de texto ou binário.
+    """
+    if saida.lower().endswith(EXTENSAO_LADRILHOS):
+        if LabirintoBinario.eh_binario(entrada):
+            codigos = LabirintoBinario.ler(entrada, verificar)
+        else:
+            with open(entrada, 'rb') as arquivo:
+                codigos = codigos_do_texto(arquivo.read())
+        LabirintoLadrilhos.gravar(saida, codigos)
+        return 'ladrilhos'
+
+    if LabirintoBinario.eh_binario(entrada):
+        with open(saida, 'wb') as arquivo:
+            arquivo.write(texto_dos_codigos(LabirintoBinario.ler(entrada, verificar)))
+        return 'texto'
+
+    with open(entrada, 'rb') as arquivo:
+        codigos = codigos_do_texto(arquivo.read())
+    LabirintoBinario.gravar(saida, codigos)
+    if verificar and (LabirintoBinario.ler(saida, verificar=True) != codigos).any():
+        raise ValueError(f"Conversão não confere com o original: {entrada}")
+    return 'binário'
+
+
+def nome_convertido(entrada, diretorio_saida):
+    """Nome de saída no diretório: troca a extensão conforme o sentido da conversão"""
+    base = os.path.splitext(os.path.basename(entrada))[0]
+    extensao = '.txt' if LabirintoBinario.eh_binario(entrada) else EXTENSAO_BINARIA
+    return os.path.join(diretorio_saida, base + extensao)
+
+
+def main():
+    # Import local, como nos demais utilitários de corpus
+    from benchmark_lote import listar_labirintos
+
+    parser = argparse.ArgumentParser(
+        description=f"Converte labirintos entre o formato texto (X/_/o/E/S) e o binário compacto ({EXTENSAO_BINARIA}), "
+                    f"ou para o formato em ladrilhos (saída {EXTENSAO_LADRILHOS})")
+    parser.add_argument("entrada", help="arquivo de labirinto, ou diretório/padrão glob de um corpus")
+    parser.add_argument("saida", help="arquivo de saída (ou diretório, para um corpus)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="confere o hash do binário lido e a ida e volta da conversão")
+    argumentos = parser.parse_args()
+
+    try:
+        if os.path.isfile(argumentos.entrada) and not os.path.isdir(argumentos.saida):
+            pares = [(argumentos.entrada, argumentos.saida)]
+        else:
+            os.makedirs(argumentos.saida, exist_ok=True)
+            pares = [(nome, nome_convertido(nome, argumentos.saida))
+                     for nome in listar_labirintos([argumentos.entrada])]
+        if not pares:
+            print("Nenhum labirinto encontrado.", flush=True)
+            return 1
+
+        inicio = time.perf_counter()
+        tamanho_entrada = tamanho_saida = 0
+        for entrada, saida in pares:
+            sentido = converter(entrada, saida, argumentos.verificar)
+            tamanho_entrada += os.path.getsize(entrada)
+            tamanho_saida += os.path.getsize(saida)
+            print(f"{entrada} -> {saida} ({sentido})", flush=True)
+
+        print(f"{len(pares)} labirintos | {tamanho_entrada} -> {tamanho_saida} bytes "
+              f"({tamanho_entrada / max(tamanho_saida, 1):.1f}x) | {time.perf_counter() - inicio:.2f}s", flush=True)
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", flush=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+
+# Algoritmos disponíveis. Ambos produzem o labirinto linha a linha, guardando
+# apenas o estado de uma linha (memória O(largura)), o que permite gerar
+# labirintos de 10k x 10k direto para o arquivo.
+ALGORITMOS = ('eller', 'sidewinder')
+
+
+def linhas_eller(colunas, linhas, rng, taxa_ciclos=0.0):
+    """Algoritmo de Eller: para cada linha lógica produz (aberturas a leste, aberturas ao norte).
+
+    Mantém só o conjunto (componente conexa) de cada célula da linha atual.
+    Sem ciclos extras o labirinto é perfeito (um único caminho entre duas células).
+    """
+    conjuntos = np.arange(colunas)
+    proximo_conjunto = colunas
+    norte = np.zeros(colunas, dtype=bool)
+
+    for linha in range(linhas):
+        ultima = linha == linhas - 1
+        sorteio = (rng.random(colunas - 1) < 0.5).tolist()
+        ciclos = (rng.random(colunas - 1) < taxa_ciclos).tolist()
+
+        # Membros de cada conjunto na linha (une sempre o menor no maior)
+        rotulos = conjuntos.tolist()
+        membros = {}
+        for coluna, conjunto in enumerate(rotulos):
+            membros.setdefault(conjunto, []).append(coluna)
+
+        leste = [False] * (colunas - 1)
+        for coluna in range(colunas - 1):
+            a, b = rotulos[coluna], rotulos[coluna + 1]
+            if a == b:
+                leste[coluna] = ciclos[coluna]
+            elif ultima or sorteio[coluna]:
+                leste[coluna] = True
+                if len(membros[a]) < len(membros[b]):
+                    a, b = b, a
+                for c in membros[b]:
+                    rotulos[c] = a
+                membros[a].extend(membros.pop(b))
+        conjuntos = np.array(rotulos)
+
+        yield np.array(leste, dtype=bool), norte
+
+        if ultima:
+            return
+
+        # Cada conjunto precisa de ao menos uma abertura para a linha de baixo
+        sul = rng.random(colunas) < 0.5
+        ordem = np.argsort(conjuntos, kind='stable')
+        ordenados = conjuntos[ordem]
+        inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+        tamanhos = np.diff(np.r_[inicios, colunas])
+        sem_abertura = ~np.logical_or.reduceat(sul[ordem], inicios)
+        escolhidos = inicios + (rng.random(len(inicios)) * tamanhos).astype(np.int64)
+        sul[ordem[escolhidos[sem_abertura]]] = True
+        sul |= rng.random(colunas) < taxa_ciclos
+
+        # Células sem abertura vinda de cima começam conjuntos novos
+        novos = np.flatnonzero(~sul)
+        conjuntos[novos] = np.arange(proximo_conjunto, proximo_conjunto + len(novos))
+        proximo_conjunto += len(novos)
+        norte = sul
+
+
+def linhas_sidewinder(colunas, linhas, rng, taxa_ciclos=0.0):
+    """Algoritmo sidewinder (totalmente vetorizado): produz (aberturas a leste, aberturas ao norte).
+
+    A primeira linha é um corredor contínuo; nas demais, cada trecho horizontal
+    abre uma passagem ao norte a partir de uma célula sorteada do trecho.
+    """
+    for linha in range(linhas):
+        if linha == 0:
+            yield np.ones(colunas - 1, dtype=bool), np.zeros(colunas, dtype=bool)
+            continue
+
+        fecha = rng.random(colunas) < 0.5
+        fecha[-1] = True
+        leste = ~fecha[:-1]
+
+        inicios = np.flatnonzero(np.r_[True, fecha[:-1]])
+        tamanhos = np.diff(np.r_[inicios, colunas])
+        norte = np.zeros(colunas, dtype=bool)
+        norte[inicios + (rng.random(len(inicios)) * tamanhos).astype(np.int64)] = True
+
+        if taxa_ciclos > 0:
+            leste |= rng.random(colunas - 1) < taxa_ciclos
+            norte |= rng.random(colunas) < taxa_ciclos
+        yield leste, norte
+
+
+def gerar_linhas(largura, altura, densidade_comida=0.05, taxa_ciclos=0.0, semente=None, algoritmo='eller'):
+    """Gera as linhas de texto (bytes, sem '\\n') do labirinto no formato X/_/o/E/S.
+
+    O labirinto é uma grade de células lógicas nas posições ímpares, separadas por
+    paredes; larguras/alturas pares ganham uma coluna/linha extra de parede.
+    E fica no canto superior esquerdo e S no canto inferior direito.
+    """
+    if largura < 3 or altura < 3 or (largura < 5 and altura < 5):
+        raise ValueError("O labirinto precisa ter ao menos 3x5 (ou 5x3) células")
+    if not 0.0 <= densidade_comida <= 1.0 or not 0.0 <= taxa_ciclos <= 1.0:
+        raise ValueError("Densidade de comida e taxa de ciclos devem estar entre 0 e 1")
+    if algoritmo not in ALGORITMOS:
+        raise ValueError(f"Algoritmo desconhecido: {algoritmo} (opções: {', '.join(ALGORITMOS)})")
+
+    rng = np.random.default_rng(semente)
+    colunas = (largura - 1) // 2
+    linhas = (altura - 1) // 2
+    gerador = linhas_eller if algoritmo == 'eller' else linhas_sidewinder
+
+    parede = np.full(largura, ord('X'), dtype=np.uint8)
+    impares = np.arange(colunas) * 2 + 1
+
+    def com_comida(linha_texto):
+        # Sorteia comida só nas células abertas
+        abertas = linha_texto == ord('_')
+        linha_texto[abertas & (rng.random(largura) < densidade_comida)] = ord('o')
+        return linha_texto
+
+    for linha, (leste, norte) in enumerate(gerador(colunas, linhas, rng, taxa_ciclos)):
+        # Linha de paredes acima (com as passagens para o norte)
+        if linha == 0:
+            yield parede.tobytes()
+        else:
+            acima = parede.copy()
+            acima[impares[norte]] = ord('_')
+            yield com_comida(acima).tobytes()
+
+        # Linha das células, com as passagens para o leste
+        celulas = parede.copy()
+        celulas[impares] = ord('_')
+        celulas[impares[:-1][leste] + 1] = ord('_')
+        celulas = com_comida(celulas)
+        if linha == 0:
+            celulas[1] = ord('E')
+        if linha == linhas - 1:
+            celulas[impares[-1]] = ord('S')
+        yield celulas.tobytes()
+
+    # Borda inferior (mais uma linha de parede se a altura for par)
+    for _ in range(altura - 2 * linhas):
+        yield parede.tobytes()
+
+
+def gerar_labirinto(nome_arquivo, largura, altura, densidade_comida=0.05, taxa_ciclos=0.0,
+                    semente=None, algoritmo='eller', tamanho_ladrilho=None):
+    """Gera um labirinto e grava linha a linha no arquivo (sem montar o labirinto em memória).
+
+    Com tamanho_ladrilho, grava no formato em ladrilhos (AmbienteLadrilhos) em vez de texto.
+    """
+    linhas = gerar_linhas(largura, altura, densidade_comida, taxa_ciclos, semente, algoritmo)
+    if tamanho_ladrilho:
+        # Import local: só o formato em ladrilhos depende do maze_agent
+        from maze_agent import LabirintoLadrilhos
+        LabirintoLadrilhos.gravar(nome_arquivo, linhas, tamanho_ladrilho)
+        return
+
+    with open(nome_arquivo, 'wb', buffering=1 << 20) as arquivo:
+        for linha in linhas:
+            arquivo.write(linha)
+            arquivo.write(b'\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera labirintos procedurais no formato X/_/o/E/S")
+    parser.add_argument("saida", help="arquivo de saída (ou diretório, com --quantidade > 1)")
+    parser.add_argument("--largura", type=int, default=41, help="número de colunas (padrão: 41)")
+    parser.add_argument("--altura", type=int, default=41, help="número de linhas (padrão: 41)")
+    parser.add_argument("--densidade-comida", type=float, default=0.05,
+                        help="probabilidade de comida em cada célula aberta (padrão: 0.05)")
+    parser.add_argument("--taxa-ciclos", type=float, default=0.0,
+                        help="probabilidade de remover paredes extras, criando ciclos (padrão: 0)")
+    parser.add_argument("--semente", type=int, default=None, help="semente do gerador")
+    parser.add_argument("--algoritmo", choices=ALGORITMOS, default='eller', help="algoritmo de geração")
+    parser.add_argument("--ladrilhos", type=int, default=None, metavar="TAMANHO",
+                        help="grava no formato em ladrilhos TAMANHO x TAMANHO, lido sob demanda (mundos enormes)")
+    parser.add_argument("--quantidade", type=int, default=1,
+                        help="gera um corpus com N labirintos (sementes consecutivas) no diretório de saída")
+    argumentos = parser.parse_args()
+
+    parametros = dict(largura=argumentos.largura, altura=argumentos.altura,
+                      densidade_comida=argumentos.densidade_comida, taxa_ciclos=argumentos.taxa_ciclos,
+                      algoritmo=argumentos.algoritmo, tamanho_ladrilho=argumentos.ladrilhos)
+    try:
+        if argumentos.quantidade <= 1:
+            gerar_labirinto(argumentos.saida, semente=argumentos.semente, **parametros)
+            print(f"Labirinto salvo em: {argumentos.saida}", flush=True)
+            return 0
+
+        os.makedirs(argumentos.saida, exist_ok=True)
+        semente_inicial = argumentos.semente or 0
+        for i in range(argumentos.quantidade):
+            nome = os.path.join(argumentos.saida, f"labirinto_{argumentos.largura}x{argumentos.altura}_"
+                                                  f"{semente_inicial + i:05d}{'.ladr' if argumentos.ladrilhos else '.txt'}")
+            gerar_labirinto(nome, semente=semente_inicial + i, **parametros)
+        print(f"{argumentos.quantidade} labirintos salvos em: {argumentos.saida}", flush=True)
+        return 0
+    except ValueError as e:
+        print(f"Erro: {e}", flush=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
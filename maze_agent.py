@@ -2,14 +2,87 @@ import sys
 import os
 import random
 import time
+import argparse
+import hashlib
+import heapq
+import json
+import mmap
+import queue
+import signal
+import struct
+import tempfile
+import threading
 import cv2           # NECESSÁRIO PARA O VIDEO RECORDER, NÃO USADO NA IMPLEMENTAÇÃO
-import numpy as np   # NECESSÁRIO PARA O VIDEO RECORDER, NÃO USADO NA IMPLEMENTAÇÃO
+import numpy as np   # NECESSÁRIO PARA O VIDEO RECORDER E PARA A GRADE DO AMBIENTE (AmbienteGrade)
+from array import array
+from collections import OrderedDict, deque
 from datetime import datetime
 
+try:
+    import resource  # Pico de memória do processo (indisponível no Windows)
+except ImportError:
+    resource = None
+
+
+# CÓDIGOS DE CÉLULA DA GRADE (um uint8 por célula)
+PAREDE, CORREDOR, COMIDA, SAIDA, ENTRADA = 0, 1, 2, 3, 4
+SIMBOLOS_CELULA = 'X_oSE'  # Símbolo de texto de cada código (indexado pelo código)
+
+# Deslocamento (linha, coluna) de cada direção
+DESLOCAMENTOS = {'N': (-1, 0), 'L': (0, 1), 'S': (1, 0), 'O': (0, -1)}
+
+# Tabelas de conversão byte -> código e código -> byte/símbolo
+# (caracteres desconhecidos são tratados como corredor, assim como em Ambiente.mover)
+_TABELA_CODIGOS = np.full(256, CORREDOR, dtype=np.uint8)
+for _codigo, _simbolo in enumerate(SIMBOLOS_CELULA):
+    _TABELA_CODIGOS[ord(_simbolo)] = _codigo
+_TABELA_BYTES = np.frombuffer(SIMBOLOS_CELULA.encode('ascii'), dtype=np.uint8)
+_SIMBOLOS_BYTE = tuple(chr(valor) for valor in range(256))
+
+def codigos_do_labirinto(labirinto):
+    """Converte o labirinto (lista de listas de símbolos, matriz 'S1', grade uint8 ou AmbienteLadrilhos) em grade de códigos"""
+    # Ladrilhos (por atributo, pois o módulo também roda como __main__): o labirinto inteiro é lido só aqui
+    if hasattr(labirinto, 'codigos_completos'):
+        return labirinto.codigos_completos()
+    if isinstance(labirinto, np.ndarray):
+        if labirinto.dtype == np.uint8:
+            return labirinto
+        return _TABELA_CODIGOS[labirinto.view(np.uint8)]  # Matriz de símbolos ASCII (AmbienteMapeado)
+    texto = ''.join(''.join(linha) for linha in labirinto).encode('ascii', 'replace')
+    brutos = np.frombuffer(texto, dtype=np.uint8).reshape(len(labirinto), -1)
+    return _TABELA_CODIGOS[brutos]
+
+
+def codigo_da_celula(labirinto, linha, coluna):
+    """Código de uma única célula do labirinto (em qualquer dos formatos de codigos_do_labirinto)"""
+    if hasattr(labirinto, 'codigos_completos'):
+        return labirinto.codigo(linha, coluna)
+    celula = labirinto[linha][coluna]
+    if isinstance(celula, str):
+        return int(_TABELA_CODIGOS[ord(celula) & 0xFF])
+    if isinstance(celula, bytes):
+        return int(_TABELA_CODIGOS[celula[0]])
+    return int(celula)
+
+
+# Orçamento de iterações do agente: proporcional ao tamanho do labirinto, com um mínimo
+ITERACOES_POR_CELULA = 4
+MINIMO_ITERACOES = 20000
+
+
+def limite_iteracoes_padrao(linhas, colunas):
+    """Número máximo de iterações do agente para um labirinto linhas x colunas"""
+    return max(MINIMO_ITERACOES, ITERACOES_POR_CELULA * linhas * colunas)
+
+
+# Intervalo padrão entre checkpoints do agente (--checkpoint), em iterações
+ITERACOES_ENTRE_CHECKPOINTS = 100000
+
 
 # CLASSE PARA GRAVAÇÃO DE VÍDEO
 class VideoRecorder:
-    def __init__(self, filename="maze_execution.mp4", fps=5.0, cell_size=30):
+    def __init__(self, filename="maze_execution.mp4", fps=5.0, cell_size=30,
+                 assincrono=False, tamanho_fila=64, descartar_frames=False):
         self.filename = filename
         self.fps = fps
         self.cell_size = cell_size
@@ -26,6 +99,37 @@ class VideoRecorder:
             'A': (0, 0, 255),       # Agente - vermelho
             'E': (255, 255, 255),   # Entrada - branco (mesmo que corredor)
         }
+
+        # Renderização incremental: imagem base (labirinto sem agente e sem texto),
+        # buffer único de saída e última posição desenhada do agente
+        self.ladrilhos = None
+        self.codigo_agente = len(SIMBOLOS_CELULA)
+        self.altura_texto = 0
+        self.base = None
+        self.frame = None
+        self.posicao_anterior = None
+
+        # Modo assíncrono: uma thread desenha e codifica os deltas de uma fila limitada.
+        # Com a fila cheia, bloqueia o agente ou (descartar_frames) pula frames intermediários
+        self.assincrono = assincrono
+        self.descartar_frames = descartar_frames
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.thread_gravacao = None
+        self.base_enviada = False
+        self.celulas_pendentes = []
+        self.ultimo_descartado = None
+        self.frames_descartados = 0
+        self.erro_gravacao = None
+
+        # Checkpoints (--checkpoint): a cada um, a parte atual do vídeo é fechada (mp4 íntegro)
+        # e a gravação segue na próxima; finalize() junta as partes em filename
+        self.arquivo_atual = filename
+        self.partes = []
+        self.quadros = 0  # Frames gravados até agora
+        self.quadros_antes_da_parte = 0
+
+        # Perfilador do agente (opcional): mede a gravação como fase própria
+        self.perfilador = None
     
     def setup_video(self, maze_rows, maze_cols):
         """Configura o gravador de vídeo com dimensões do labirinto"""
@@ -42,61 +146,790 @@ class VideoRecorder:
         if not self.video_writer.isOpened():
             print(f"Erro: Não foi possível abrir o arquivo de vídeo {self.filename}")
             return False
+
+        self.criar_ladrilhos()
+        self.base = None
+        self.frame = None
+        self.posicao_anterior = None
+        self.arquivo_atual = self.filename
+
+        if self.assincrono:
+            self.iniciar_thread()
         
         print(f"Gravação iniciada: {self.filename} ({self.frame_width}x{self.frame_height})")
         return True
+
+    def iniciar_thread(self):
+        """Modo assíncrono: inicia a thread de gravação"""
+        self.thread_gravacao = threading.Thread(target=self.processar_fila, daemon=True)
+        self.thread_gravacao.start()
+
+    def criar_ladrilhos(self):
+        """Pré-calcula um ladrilho (célula com borda preta) por código de célula, mais o do agente"""
+        cores = [self.colors[simbolo] for simbolo in SIMBOLOS_CELULA] + [self.colors['A']]
+        self.ladrilhos = np.empty((len(cores), self.cell_size, self.cell_size, 3), dtype=np.uint8)
+        self.ladrilhos[:] = np.array(cores, dtype=np.uint8)[:, None, None, :]
+
+        # Borda preta fina (equivale ao cv2.rectangle de espessura 1)
+        self.ladrilhos[:, [0, -1], :] = 0
+        self.ladrilhos[:, :, [0, -1]] = 0
+
+        # Faixa do topo coberta pelo texto de informações do passo (inclui letras com descendente)
+        (_, _), baseline = cv2.getTextSize("|gjpqy", cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        self.altura_texto = min(self.frame_height, 25 + baseline + 2)
+
+    def codigos_labirinto(self, labirinto):
+        """Converte o labirinto (lista de listas de símbolos, matriz 'S1' ou grade uint8) em grade de códigos"""
+        return codigos_do_labirinto(labirinto)
+
+    def codigo_celula(self, labirinto, linha, coluna):
+        """Código de uma única célula do labirinto"""
+        return codigo_da_celula(labirinto, linha, coluna)
+
+    def pintar_celula(self, imagem, linha, coluna, ladrilho):
+        """Copia um ladrilho para a célula (linha, coluna) da imagem"""
+        tamanho = self.cell_size
+        imagem[linha * tamanho:(linha + 1) * tamanho, coluna * tamanho:(coluna + 1) * tamanho] = ladrilho
+
+    def montar_base(self, labirinto):
+        """Monta a imagem base (e o buffer do frame) de uma vez a partir dos ladrilhos"""
+        codigos = self.codigos_labirinto(labirinto)
+        linhas, colunas = codigos.shape
+        tamanho = self.cell_size
+
+        self.base = np.zeros((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        self.base[:linhas * tamanho, :colunas * tamanho] = (
+            self.ladrilhos[codigos].transpose(0, 2, 1, 3, 4).reshape(linhas * tamanho, colunas * tamanho, 3)
+        )
+        self.frame = self.base.copy()
     
     def create_frame(self, labirinto, agent_row, agent_col, step_info=""):
-        """Cria um frame do labirinto atual"""
+        """Cria um frame do labirinto atual, redesenhando só as células alteradas.
+
+        Entre dois frames só mudam a célula anterior e a atual do agente (a comida
+        é consumida na célula onde o agente chega). O frame retornado é um buffer
+        reutilizado: é sobrescrito na próxima chamada.
+        """
         if self.video_writer is None:
             return None
-        
-        # Cria imagem em branco
-        frame = np.zeros((self.frame_height, self.frame_width, 3), dtype=np.uint8)
-        
-        # Desenha cada célula do labirinto
-        for i in range(len(labirinto)):
-            for j in range(len(labirinto[i])):
-                # Calcula posição do pixel
-                y1 = i * self.cell_size
-                x1 = j * self.cell_size
-                y2 = (i + 1) * self.cell_size
-                x2 = (j + 1) * self.cell_size
-                            
-                cell_content = labirinto[i][j]
-                           
-                if i == agent_row and j == agent_col:
-                    color = self.colors['A']
-                else:
-                    color = self.colors.get(cell_content, (128, 128, 128))  # Cinza padrão
-                             
-                cv2.rectangle(frame, (x1, y1), (x2-1, y2-1), color, -1)
-                
-                cv2.rectangle(frame, (x1, y1), (x2-1, y2-1), (0, 0, 0), 1) # borda preta fina 
+
+        if self.base is None:
+            self.montar_base(labirinto)
+
+        # A célula atual pode ter mudado (comida coletada)
+        codigo = self.codigo_celula(labirinto, agent_row, agent_col)
+        return self.desenhar_frame([(agent_row, agent_col, codigo)], agent_row, agent_col, step_info)
+
+    def desenhar_frame(self, celulas_alteradas, agent_row, agent_col, step_info=""):
+        """Aplica as células alteradas (linha, coluna, código) na base e desenha agente e texto"""
+        tamanho = self.cell_size
+
+        # Apaga o agente da posição anterior (a base já tem o conteúdo atual da célula)
+        if self.posicao_anterior is not None:
+            linha, coluna = self.posicao_anterior
+            celula = (slice(linha * tamanho, (linha + 1) * tamanho), slice(coluna * tamanho, (coluna + 1) * tamanho))
+            self.frame[celula] = self.base[celula]
+
+        for linha, coluna, codigo in celulas_alteradas:
+            self.pintar_celula(self.base, linha, coluna, self.ladrilhos[codigo])
+            self.pintar_celula(self.frame, linha, coluna, self.ladrilhos[codigo])
+
+        # Restaura a faixa do texto e desenha o agente
+        self.frame[:self.altura_texto] = self.base[:self.altura_texto]
+        self.pintar_celula(self.frame, agent_row, agent_col, self.ladrilhos[self.codigo_agente])
+        self.posicao_anterior = (agent_row, agent_col)
         
         # Adiciona texto com informações do passo (opcional)
         if step_info:
-            cv2.putText(frame, step_info, (10, 25), 
+            cv2.putText(self.frame, step_info, (10, 25), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
-        return frame
+        return self.frame
     
     def add_frame(self, labirinto, agent_row, agent_col, step_info=""):
         """Adiciona um frame ao vídeo"""
+        if self.perfilador is not None:
+            self.perfilador.medir('video', self.gravar_frame, labirinto, agent_row, agent_col, step_info)
+        else:
+            self.gravar_frame(labirinto, agent_row, agent_col, step_info)
+
+    def gravar_frame(self, labirinto, agent_row, agent_col, step_info=""):
+        """Desenha e codifica o frame (ou, no modo assíncrono, só o enfileira)"""
+        if self.assincrono and self.video_writer is not None:
+            self.enfileirar_frame(labirinto, agent_row, agent_col, step_info)
+            return
+
         frame = self.create_frame(labirinto, agent_row, agent_col, step_info)
         if frame is not None:
             self.video_writer.write(frame)
+            self.quadros += 1
+
+    def enfileirar_frame(self, labirinto, agent_row, agent_col, step_info=""):
+        """Modo assíncrono: coloca na fila apenas o delta do passo (células alteradas + agente)"""
+        codigos = None
+        if not self.base_enviada:
+            # Primeiro frame leva uma cópia da grade inteira (nunca é descartado)
+            codigos = self.codigos_labirinto(labirinto).copy()
+            self.base_enviada = True
+
+        self.celulas_pendentes.append((agent_row, agent_col, self.codigo_celula(labirinto, agent_row, agent_col)))
+        item = (codigos, self.celulas_pendentes, agent_row, agent_col, step_info)
+
+        if self.descartar_frames and codigos is None:
+            try:
+                self.fila.put_nowait(item)
+            except queue.Full:
+                # Frame descartado: as células alteradas seguem no próximo delta
+                self.frames_descartados += 1
+                self.ultimo_descartado = item
+                return
+        else:
+            self.fila.put(item)
+
+        self.celulas_pendentes = []
+        self.ultimo_descartado = None
+
+    def processar_fila(self):
+        """Thread de gravação: desenha e codifica os deltas da fila até receber None"""
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            if self.erro_gravacao is not None:
+                continue  # Continua esvaziando a fila para não travar o agente
+
+            codigos, celulas_alteradas, agent_row, agent_col, step_info = item
+            try:
+                if codigos is not None:
+                    self.montar_base(codigos)
+                self.video_writer.write(self.desenhar_frame(celulas_alteradas, agent_row, agent_col, step_info))
+                self.quadros += 1
+            except Exception as e:
+                self.erro_gravacao = e
     
     def finalize(self):
         """Finaliza gravação do vídeo"""
+        if self.perfilador is not None:
+            self.perfilador.medir('video_finalizar', self.finalizar_gravacao)
+        else:
+            self.finalizar_gravacao()
+
+    def finalizar_gravacao(self):
+        """Esvazia a fila do modo assíncrono e fecha o arquivo de vídeo"""
+        if self.thread_gravacao is not None:
+            self.esperar_fila()
+
+            if self.frames_descartados:
+                print(f"Frames descartados (fila cheia): {self.frames_descartados}")
+            if self.erro_gravacao is not None:
+                print(f"Erro na gravação assíncrona: {self.erro_gravacao}")
+
         if self.video_writer:
             self.video_writer.release()
+            self.video_writer = None
+            if self.partes:
+                self.juntar_partes()
+            elif self.arquivo_atual != self.filename:
+                os.replace(self.arquivo_atual, self.filename)
             print(f"Vídeo salvo como: {self.filename}")
 
+    def esperar_fila(self):
+        """Modo assíncrono: envia o último estado pendente, espera a fila esvaziar e encerra a thread"""
+        if self.ultimo_descartado is not None:
+            self.fila.put(self.ultimo_descartado)
+            self.ultimo_descartado = None
+            self.celulas_pendentes = []  # Já foram no item reenviado
+        self.fila.put(None)
+        self.thread_gravacao.join()
+        self.thread_gravacao = None
+
+    def nome_parte(self, indice):
+        """Arquivo da indice-ésima parte do vídeo gravado com checkpoints"""
+        raiz, extensao = os.path.splitext(os.path.abspath(self.filename))
+        return f"{raiz}.parte{indice:04d}{extensao}"
+
+    def abrir_parte(self):
+        """Abre a próxima parte do vídeo (e reinicia a thread do modo assíncrono)"""
+        self.arquivo_atual = self.nome_parte(len(self.partes))
+        self.video_writer = cv2.VideoWriter(self.arquivo_atual, cv2.VideoWriter_fourcc(*'mp4v'), self.fps,
+                                            (self.frame_width, self.frame_height))
+        if not self.video_writer.isOpened():
+            raise OSError(f"Não foi possível abrir o arquivo de vídeo {self.arquivo_atual}")
+        self.quadros_antes_da_parte = self.quadros
+        if self.assincrono:
+            self.iniciar_thread()
+
+    def fechar_parte(self):
+        """Fecha a parte atual; guarda-a na lista de partes se tiver algum frame"""
+        if self.thread_gravacao is not None:
+            self.esperar_fila()
+        self.video_writer.release()
+        self.video_writer = None
+        if self.quadros > self.quadros_antes_da_parte:
+            nome = self.nome_parte(len(self.partes))
+            if self.arquivo_atual != nome:
+                os.replace(self.arquivo_atual, nome)  # Gravação iniciada em filename, antes do 1º checkpoint
+            self.partes.append(nome)
+        else:
+            os.remove(self.arquivo_atual)
+
+    def ponto_retomada(self, completo=False, continuar=True):
+        """Checkpoint: fecha a parte atual e (se continuar) abre a próxima; retorna partes e frames gravados"""
+        if self.video_writer is not None:
+            self.fechar_parte()
+            if continuar:
+                self.abrir_parte()
+        return {'partes': list(self.partes), 'quadros': self.quadros}
+
+    def retomar(self, estados):
+        """Continua a gravação de um checkpoint: mantém as partes já gravadas e grava as próximas"""
+        estado = estados[-1]
+        faltando = [nome for nome in estado['partes'] if not os.path.exists(nome)]
+        if faltando:
+            raise ValueError(f"Partes do vídeo do checkpoint não encontradas: {', '.join(faltando)}")
+        if self.video_writer is None:
+            return
+
+        # Descarta o arquivo aberto por setup_video; o próximo frame redesenha a base inteira
+        if self.thread_gravacao is not None:
+            self.esperar_fila()
+        self.video_writer.release()
+        os.remove(self.arquivo_atual)
+        self.partes = list(estado['partes'])
+        self.quadros = estado['quadros']
+        self.base = None
+        self.frame = None
+        self.posicao_anterior = None
+        self.base_enviada = False
+        self.abrir_parte()
+
+    def juntar_partes(self):
+        """Junta as partes gravadas entre checkpoints no vídeo final e as apaga"""
+        # Import local: renderizacao_video importa este módulo
+        from renderizacao_video import concatenar_segmentos
+
+        if self.quadros > self.quadros_antes_da_parte:
+            self.partes.append(self.arquivo_atual)
+        else:
+            os.remove(self.arquivo_atual)
+        concatenar_segmentos(self.partes, self.filename, self.fps)
+        for nome in self.partes:
+            os.remove(nome)
+        self.partes = []
+
+
+# RENDERIZADOR DE TERMINAL (camada de apresentação separada da simulação)
+class RenderizadorTerminal:
+    """Desenha o labirinto no terminal por uma thread própria, sem pausar a simulação.
+
+    Estilos: 'diff' limpa a tela, escreve o labirinto inteiro uma vez e depois
+    posiciona o cursor (códigos ANSI) só nas células por onde o agente passou;
+    'completo' escreve o labirinto inteiro a cada passo, como a impressão clássica.
+
+    A simulação só registra o estado compacto de cada passo desenhado (células
+    alteradas com o novo símbolo, posição do agente e status) numa fila que nunca
+    bloqueia; a thread de escrita mantém sua própria cópia do texto do labirinto e
+    monta cada desenho a partir dela. a_cada / fps_maximo escolhem os passos
+    desenhados; com passos_por_segundo, a thread reproduz os estados registrados
+    nesse ritmo. As mensagens não ocupam a fila: ficam pendentes e vão junto com o
+    próximo desenho. silencioso não desenha nada.
+    """
+
+    def __init__(self, a_cada=1, fps_maximo=None, silencioso=False, saida=None,
+                 estilo='diff', passos_por_segundo=None):
+        self.a_cada = max(1, a_cada)
+        self.intervalo_minimo = 1.0 / fps_maximo if fps_maximo else 0.0
+        self.intervalo_reproducao = 1.0 / passos_por_segundo if passos_por_segundo else 0.0
+        self.silencioso = silencioso
+        self.saida = saida or sys.stdout
+        self.estilo = estilo
+
+        # Lado da simulação
+        self.passos = 0
+        self.passos_enviados = 0
+        self.status = ""
+        self.ultimo_desenho = 0.0
+        self.desenhou_inteiro = False
+        self.celulas_alteradas = set()
+        self.posicao_anterior = None
+        self.linhas = 0
+        self.mensagens_pendentes = []  # Mensagens desde o último desenho: vão antes do próximo
+
+        # Lado da thread de escrita: cópia do texto do labirinto (sem o agente) e início de cada linha
+        self.texto = None
+        self.inicios_linhas = None
+
+        self.fila = queue.SimpleQueue()
+        self.thread_escrita = None
+
+    def desenhar(self, ambiente, step_info=""):
+        """Registra o passo e, conforme a taxa configurada, envia o estado para a thread de escrita"""
+        if self.silencioso:
+            return
+
+        posicao = (ambiente.linha_agente, ambiente.coluna_agente)
+        if posicao != self.posicao_anterior:
+            self.celulas_alteradas.add(posicao)
+            if self.posicao_anterior is not None:
+                self.celulas_alteradas.add(self.posicao_anterior)
+            self.posicao_anterior = posicao
+
+        self.passos += 1
+        self.status = step_info
+        if self.desenhou_inteiro and self.passos % self.a_cada:
+            return
+
+        agora = time.monotonic()
+        if self.desenhou_inteiro and agora - self.ultimo_desenho < self.intervalo_minimo:
+            return
+        self.ultimo_desenho = agora
+        self.enviar_estado(ambiente)
+
+    def mensagem(self, texto):
+        """Mensagem de acompanhamento: fica pendente e é escrita antes do próximo desenho"""
+        if not self.silencioso:
+            self.mensagens_pendentes.append(texto + "\n")
+
+    def enviar_estado(self, ambiente):
+        """Enfileira o estado compacto do passo atual (o texto inteiro só no primeiro desenho)"""
+        texto_inicial = None
+        if not self.desenhou_inteiro:
+            self.desenhou_inteiro = True
+            self.linhas = ambiente.linhas
+            texto_inicial = ambiente.texto_labirinto()
+        celulas = [(linha, coluna, ambiente.simbolo_celula(linha, coluna)) for linha, coluna in self.celulas_alteradas]
+        self.celulas_alteradas.clear()
+        self.passos_enviados = self.passos
+        self.enviar((texto_inicial, celulas, self.posicao_anterior, self.status))
+
+    def enviar(self, estado):
+        """Entrega o estado (ou None, só mensagens), precedido das mensagens pendentes, sem esperar"""
+        if self.thread_escrita is None:
+            self.thread_escrita = threading.Thread(target=self.escrever, daemon=True)
+            self.thread_escrita.start()
+        self.fila.put((''.join(self.mensagens_pendentes), estado))
+        self.mensagens_pendentes = []
+
+    def montar_texto(self, texto_inicial, celulas, posicao, status):
+        """Thread de escrita: aplica as células alteradas na cópia do labirinto e monta o desenho"""
+        partes = []
+        if texto_inicial is not None:
+            self.texto = bytearray(texto_inicial.encode('ascii', 'replace'))
+            quebras = np.flatnonzero(np.frombuffer(bytes(self.texto), dtype=np.uint8) == ord('\n'))
+            self.inicios_linhas = [0] + (quebras + 1).tolist()
+            if self.estilo != 'completo':
+                partes += ["\x1b[2J\x1b[H", texto_inicial]  # O texto inicial já tem o agente
+
+        for linha, coluna, simbolo in celulas:
+            self.texto[self.inicios_linhas[linha] + coluna] = ord(simbolo) if simbolo.isascii() else ord('?')
+            if texto_inicial is None and self.estilo != 'completo':
+                partes.append(f"\x1b[{linha + 1};{coluna + 1}H{'A' if (linha, coluna) == posicao else simbolo}")
+
+        if self.estilo == 'completo':
+            indice = self.inicios_linhas[posicao[0]] + posicao[1]
+            simbolo = self.texto[indice]
+            self.texto[indice] = ord('A')  # Mostra posição do agente
+            texto = self.texto.decode('ascii')
+            self.texto[indice] = simbolo
+            return texto + "\n\n"
+
+        # Linha de status abaixo do labirinto
+        partes.append(f"\x1b[{self.linhas + 2};1H\x1b[2K{status}")
+        return ''.join(partes)
+
+    def escrever(self):
+        """Thread de escrita: desenha os estados na ordem, no ritmo configurado (e segue esvaziando a fila se o terminal falhar)"""
+        falhou = False
+        proximo_quadro = 0.0
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            if falhou:
+                continue
+
+            texto, estado = item
+            if estado is not None:
+                if self.intervalo_reproducao:
+                    espera = proximo_quadro - time.monotonic()
+                    if espera > 0:
+                        time.sleep(espera)
+                texto += self.montar_texto(*estado)
+            try:
+                self.saida.write(texto)
+                self.saida.flush()
+            except OSError:
+                falhou = True  # Ex.: pipe fechado; a simulação segue normalmente
+            if estado is not None and self.intervalo_reproducao:
+                # O ritmo recomeça a cada desenho (um terminal lento não gera rajadas depois)
+                proximo_quadro = time.monotonic() + self.intervalo_reproducao
+
+    def finalizar(self, ambiente):
+        """Desenha o estado final pendente, espera a reprodução e posiciona o cursor abaixo do labirinto"""
+        if self.silencioso:
+            return
+        if self.passos != self.passos_enviados:
+            self.enviar_estado(ambiente)
+        if self.estilo == 'diff' and self.desenhou_inteiro:
+            self.mensagens_pendentes.append(f"\x1b[{self.linhas + 3};1H\n")
+        if self.mensagens_pendentes:
+            self.enviar(None)
+        if self.thread_escrita is not None:
+            self.fila.put(None)
+            self.thread_escrita.join()
+            self.thread_escrita = None
+
+
+def hash_labirinto(nome_arquivo, tamanho_bloco=1 << 20):
+    """SHA-256 do conteúdo do arquivo do labirinto (lido em blocos)"""
+    resumo = hashlib.sha256()
+    with open(nome_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            resumo.update(bloco)
+    return resumo.digest()
+
+
+# LOG BINÁRIO DE TRAJETÓRIA
+class RegistroTrajetoria:
+    """Grava a trajetória do agente em formato binário compacto.
+
+    Cabeçalho: assinatura, versão, SHA-256 do labirinto, semente, dimensões e
+    número de tentativas. Cada tentativa de movimento ocupa 2 bits de direção
+    mais 1 bit de moveu/bloqueado; as tentativas são gravadas em blocos de
+    TENTATIVAS_POR_BLOCO ([uint32 quantidade][direções][flags]), então a
+    memória usada não cresce com o tamanho da execução.
+    """
+
+    ASSINATURA = b'MZTR'
+    VERSAO = 1
+    CABECALHO = struct.Struct('<4sB?q32sIIQ')
+    BLOCO = struct.Struct('<I')
+    TENTATIVAS_POR_BLOCO = 1 << 16
+    CODIGOS_DIRECAO = {direcao: codigo for codigo, direcao in enumerate(DESLOCAMENTOS)}
+
+    def __init__(self, nome_arquivo, hash_labirinto, semente=None, linhas=0, colunas=0, retomar=None):
+        self.nome_arquivo = nome_arquivo
+        self.hash_labirinto = hash_labirinto
+        self.semente = semente
+        self.linhas = linhas
+        self.colunas = colunas
+        self.total = 0
+        self.pendentes = bytearray()  # Um byte por tentativa: direção | moveu << 2
+        if retomar is None:
+            self.arquivo = open(nome_arquivo, 'wb')
+            self.escrever_cabecalho()
+        else:
+            # Retomada de checkpoint (tamanho, total): descarta as tentativas gravadas depois dele
+            tamanho, self.total = retomar
+            self.arquivo = open(nome_arquivo, 'r+b')
+            self.arquivo.truncate(tamanho)
+            self.arquivo.seek(tamanho)
+
+    def escrever_cabecalho(self):
+        """Escreve (ou reescreve) o cabeçalho no início do arquivo"""
+        self.arquivo.seek(0)
+        self.arquivo.write(self.CABECALHO.pack(
+            self.ASSINATURA, self.VERSAO, self.semente is not None, self.semente or 0,
+            self.hash_labirinto, self.linhas, self.colunas, self.total))
+
+    def registrar(self, direcao, moveu):
+        """Registra uma tentativa de movimento"""
+        self.pendentes.append(self.CODIGOS_DIRECAO[direcao] | (moveu << 2))
+        if len(self.pendentes) >= self.TENTATIVAS_POR_BLOCO:
+            self.gravar_bloco()
+
+    def gravar_bloco(self):
+        """Compacta as tentativas pendentes (4 direções e 8 flags por byte) e grava o bloco"""
+        if not self.pendentes:
+            return
+        codigos = np.frombuffer(bytes(self.pendentes), dtype=np.uint8)
+        quantidade = len(codigos)
+        direcoes = np.zeros(-(-quantidade // 4) * 4, dtype=np.uint8)
+        direcoes[:quantidade] = codigos & 3
+        direcoes = direcoes.reshape(-1, 4)
+        compactadas = direcoes[:, 0] | (direcoes[:, 1] << 2) | (direcoes[:, 2] << 4) | (direcoes[:, 3] << 6)
+
+        self.arquivo.write(self.BLOCO.pack(quantidade))
+        self.arquivo.write(compactadas.astype(np.uint8).tobytes())
+        self.arquivo.write(np.packbits(codigos >> 2, bitorder='little').tobytes())
+        self.total += quantidade
+        self.pendentes.clear()
+
+    def ponto_retomada(self, completo=False, continuar=True):
+        """Checkpoint: grava as tentativas pendentes e o total; retorna (tamanho do arquivo, total)"""
+        self.gravar_bloco()
+        self.escrever_cabecalho()
+        self.arquivo.seek(0, os.SEEK_END)
+        self.arquivo.flush()
+        return (self.arquivo.tell(), self.total)
+
+    def fechar(self):
+        """Grava o último bloco e atualiza o total no cabeçalho"""
+        if self.arquivo.closed:
+            return
+        self.gravar_bloco()
+        self.escrever_cabecalho()
+        self.arquivo.close()
+
+
+class LeitorTrajetoria:
+    """Lê um log gravado por RegistroTrajetoria"""
+
+    def __init__(self, nome_arquivo):
+        self.nome_arquivo = nome_arquivo
+        with open(nome_arquivo, 'rb') as arquivo:
+            cabecalho = arquivo.read(RegistroTrajetoria.CABECALHO.size)
+            if len(cabecalho) < RegistroTrajetoria.CABECALHO.size:
+                raise ValueError(f"Log de trajetória inválido: {nome_arquivo}")
+            (assinatura, versao, tem_semente, semente, self.hash_labirinto,
+             self.linhas, self.colunas, self.total) = RegistroTrajetoria.CABECALHO.unpack(cabecalho)
+            if assinatura != RegistroTrajetoria.ASSINATURA or versao != RegistroTrajetoria.VERSAO:
+                raise ValueError(f"Log de trajetória inválido ou de versão desconhecida: {nome_arquivo}")
+            self.semente = semente if tem_semente else None
+            self.dados = arquivo.read()
+
+    def tentativas(self):
+        """Retorna (direções, moveu): arrays com o código de direção e a flag de cada tentativa"""
+        direcoes, movimentos = [], []
+        posicao = 0
+        while posicao < len(self.dados):
+            (quantidade,) = RegistroTrajetoria.BLOCO.unpack_from(self.dados, posicao)
+            posicao += RegistroTrajetoria.BLOCO.size
+            bytes_direcoes = -(-quantidade // 4)
+            bytes_flags = -(-quantidade // 8)
+
+            compactadas = np.frombuffer(self.dados, dtype=np.uint8, count=bytes_direcoes, offset=posicao)
+            posicao += bytes_direcoes
+            separadas = (compactadas[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+            direcoes.append(separadas.ravel()[:quantidade])
+
+            flags = np.frombuffer(self.dados, dtype=np.uint8, count=bytes_flags, offset=posicao)
+            posicao += bytes_flags
+            movimentos.append(np.unpackbits(flags, count=quantidade, bitorder='little').astype(bool))
+
+        if not direcoes:
+            return np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=bool)
+        return np.concatenate(direcoes), np.concatenate(movimentos)
+
+    def __iter__(self):
+        """Itera sobre as tentativas como (direção 'N'/'L'/'S'/'O', moveu)"""
+        nomes = tuple(DESLOCAMENTOS)
+        direcoes, movimentos = self.tentativas()
+        for codigo, moveu in zip(direcoes.tolist(), movimentos.tolist()):
+            yield nomes[codigo], moveu
+
+    def __len__(self):
+        return self.total
+
+
+# FORMATO BINÁRIO DE LABIRINTO
+class LabirintoBinario:
+    """Labirinto em formato binário compacto (convertido com conversor_labirinto.py).
+
+    Cabeçalho: assinatura, versão, dimensões, entrada, número de comidas e de saídas,
+    largura dos deltas de comida e SHA-256 do corpo; logo após, as coordenadas
+    (uint32 linha, coluna) das saídas. Corpo: plano de paredes com 1 bit por célula
+    (packbits little-endian, linha a linha) e a lista esparsa de comidas como deltas
+    entre índices lineares ordenados (uint8/16/32/64, a menor largura que couber).
+    """
+
+    ASSINATURA = b'MZLB'
+    VERSAO = 1
+    CABECALHO = struct.Struct('<4sBIIiiQIB32s')
+    SEM_ENTRADA = -1
+
+    @classmethod
+    def eh_binario(cls, nome_arquivo):
+        """Se o arquivo começa com a assinatura do formato binário"""
+        with open(nome_arquivo, 'rb') as arquivo:
+            return arquivo.read(len(cls.ASSINATURA)) == cls.ASSINATURA
+
+    @classmethod
+    def gravar(cls, nome_arquivo, codigos):
+        """Grava a grade de códigos (com ENTRADA marcada) no formato binário"""
+        linhas, colunas = codigos.shape
+        entradas = np.argwhere(codigos == ENTRADA)
+        linha_entrada, coluna_entrada = (int(v) for v in entradas[0]) if len(entradas) else (cls.SEM_ENTRADA,) * 2
+        saidas = np.argwhere(codigos == SAIDA).astype('<u4')
+
+        comidas = np.flatnonzero(codigos == COMIDA)
+        deltas = np.diff(comidas, prepend=0)
+        largura = next(tipo for tipo in (1, 2, 4, 8) if not len(deltas) or int(deltas.max()) < 1 << (8 * tipo))
+        corpo = (np.packbits(codigos == PAREDE, bitorder='little').tobytes()
+                 + deltas.astype(f'<u{largura}').tobytes())
+
+        with open(nome_arquivo, 'wb') as arquivo:
+            arquivo.write(cls.CABECALHO.pack(cls.ASSINATURA, cls.VERSAO, linhas, colunas, linha_entrada,
+                                             coluna_entrada, len(comidas), len(saidas), largura,
+                                             hashlib.sha256(corpo).digest()))
+            arquivo.write(saidas.tobytes())
+            arquivo.write(corpo)
+
+    @classmethod
+    def ler(cls, nome_arquivo, verificar=False):
+        """Lê o arquivo binário e monta a grade de códigos (vetorizado, sem trabalho por célula)"""
+        with open(nome_arquivo, 'rb') as arquivo:
+            dados = arquivo.read()
+        if len(dados) < cls.CABECALHO.size:
+            raise ValueError(f"Labirinto binário inválido: {nome_arquivo}")
+        (assinatura, versao, linhas, colunas, linha_entrada, coluna_entrada,
+         quantidade_comida, quantidade_saidas, largura, hash_corpo) = cls.CABECALHO.unpack_from(dados)
+        if assinatura != cls.ASSINATURA or versao != cls.VERSAO:
+            raise ValueError(f"Labirinto binário inválido ou de versão desconhecida: {nome_arquivo}")
+
+        posicao = cls.CABECALHO.size
+        saidas = np.frombuffer(dados, dtype='<u4', count=2 * quantidade_saidas, offset=posicao).reshape(-1, 2)
+        posicao += saidas.nbytes
+        if verificar and hashlib.sha256(memoryview(dados)[posicao:]).digest() != hash_corpo:
+            raise ValueError(f"Labirinto binário corrompido (hash não confere): {nome_arquivo}")
+
+        celulas = linhas * colunas
+        bytes_paredes = -(-celulas // 8)
+        paredes = np.unpackbits(np.frombuffer(dados, dtype=np.uint8, count=bytes_paredes, offset=posicao),
+                                count=celulas, bitorder='little')
+        posicao += bytes_paredes
+        deltas = np.frombuffer(dados, dtype=f'<u{largura}', count=quantidade_comida, offset=posicao)
+
+        codigos = np.where(paredes, PAREDE, CORREDOR).astype(np.uint8)
+        codigos[np.cumsum(deltas, dtype=np.int64)] = COMIDA
+        codigos = codigos.reshape(linhas, colunas)
+        codigos[saidas[:, 0], saidas[:, 1]] = SAIDA
+        if linha_entrada != cls.SEM_ENTRADA:
+            codigos[linha_entrada, coluna_entrada] = ENTRADA
+        return codigos
+
+
+# FORMATO EM LADRILHOS (mundos maiores que a memória)
+class LabirintoLadrilhos:
+    """Labirinto dividido em ladrilhos quadrados de tamanho fixo, lidos sob demanda (AmbienteLadrilhos).
+
+    Cabeçalho: assinatura, versão, dimensões, tamanho do ladrilho, entrada e total de
+    comida. Corpo: os ladrilhos em ordem de linhas, cada um com tamanho x tamanho
+    códigos uint8 (os da borda completados com parede). A entrada já vem como corredor.
+    """
+
+    ASSINATURA = b'MZLT'
+    VERSAO = 1
+    CABECALHO = struct.Struct('<4sBIIIiiQ')
+    SEM_ENTRADA = -1
+    TAMANHO_PADRAO = 256
+
+    @classmethod
+    def eh_ladrilhos(cls, nome_arquivo):
+        """Se o arquivo começa com a assinatura do formato em ladrilhos"""
+        with open(nome_arquivo, 'rb') as arquivo:
+            return arquivo.read(len(cls.ASSINATURA)) == cls.ASSINATURA
+
+    @classmethod
+    def gravar(cls, nome_arquivo, linhas, tamanho=TAMANHO_PADRAO):
+        """Grava no arquivo as linhas do labirinto (bytes de texto ou códigos uint8), uma a uma"""
+        with open(nome_arquivo, 'wb', buffering=1 << 20) as arquivo:
+            cls.escrever(arquivo, linhas, tamanho)
+
+    @classmethod
+    def escrever(cls, arquivo, linhas, tamanho=TAMANHO_PADRAO):
+        """Escreve o labirinto em ladrilhos num arquivo binário aberto.
+
+        Só uma faixa de `tamanho` linhas fica em memória; o cabeçalho é escrito no fim,
+        quando dimensões, entrada e total de comida já são conhecidos.
+        """
+        arquivo.write(bytes(cls.CABECALHO.size))
+        faixa = None
+        colunas = quantidade = linha_faixa = comida = 0
+        entrada = (cls.SEM_ENTRADA, cls.SEM_ENTRADA)
+
+        for linha in linhas:
+            if isinstance(linha, bytes):
+                linha = _TABELA_CODIGOS[np.frombuffer(linha.rstrip(b'\r'), dtype=np.uint8)]
+            if faixa is None:
+                colunas = len(linha)
+                faixa = np.full((tamanho, -(-colunas // tamanho) * tamanho), PAREDE, dtype=np.uint8)
+            if len(linha) > colunas:
+                raise ValueError(f"Linha {quantidade} maior que a primeira ({len(linha)} > {colunas} colunas)")
+
+            faixa[linha_faixa, :len(linha)] = linha
+            if entrada[0] == cls.SEM_ENTRADA:
+                posicoes = np.flatnonzero(linha == ENTRADA)
+                if len(posicoes):
+                    entrada = (quantidade, int(posicoes[0]))
+                    faixa[linha_faixa, posicoes[0]] = CORREDOR
+            comida += int(np.count_nonzero(linha == COMIDA))
+            quantidade += 1
+            linha_faixa += 1
+            if linha_faixa == tamanho:
+                cls.escrever_faixa(arquivo, faixa, tamanho)
+                linha_faixa = 0
+
+        if faixa is None:
+            raise ValueError("Labirinto vazio")
+        if linha_faixa:
+            faixa[linha_faixa:] = PAREDE
+            cls.escrever_faixa(arquivo, faixa, tamanho)
+
+        arquivo.seek(0)
+        arquivo.write(cls.CABECALHO.pack(cls.ASSINATURA, cls.VERSAO, quantidade, colunas, tamanho,
+                                         entrada[0], entrada[1], comida))
+        arquivo.flush()
+
+    @staticmethod
+    def escrever_faixa(arquivo, faixa, tamanho):
+        """Escreve uma faixa de linhas como a sequência dos seus ladrilhos e a limpa para a próxima"""
+        ladrilhos = faixa.reshape(tamanho, -1, tamanho).transpose(1, 0, 2)
+        arquivo.write(np.ascontiguousarray(ladrilhos).tobytes())
+        faixa[:] = PAREDE
+
+    @classmethod
+    def ler_cabecalho(cls, arquivo):
+        """(linhas, colunas, tamanho do ladrilho, linha e coluna da entrada, total de comida)"""
+        arquivo.seek(0)
+        dados = arquivo.read(cls.CABECALHO.size)
+        if len(dados) < cls.CABECALHO.size:
+            raise ValueError("Labirinto em ladrilhos inválido")
+        assinatura, versao, *campos = cls.CABECALHO.unpack(dados)
+        if assinatura != cls.ASSINATURA or versao != cls.VERSAO:
+            raise ValueError("Labirinto em ladrilhos inválido ou de versão desconhecida")
+        return tuple(campos)
+
+
+def codigos_do_texto(dados):
+    """Converte o texto do labirinto (str ou bytes) em grade de códigos (linhas curtas completadas com X)"""
+    dados = dados.encode('ascii') if isinstance(dados, str) else dados
+    dados = dados.replace(b'\r', b'').strip()
+
+    linhas = dados.split(b'\n')
+    colunas = max(len(l) for l in linhas) if linhas else 0
+
+    if all(len(l) == colunas for l in linhas):
+        # Linhas uniformes: a grade é uma simples visão dos bytes do arquivo
+        brutos = np.frombuffer(dados + b'\n', dtype=np.uint8)
+        brutos = brutos.reshape(len(linhas), colunas + 1)[:, :colunas]
+    else:
+        # Preenche cada linha para o mesmo tamanho (com X se faltar)
+        brutos = np.full((len(linhas), colunas), ord('X'), dtype=np.uint8)
+        for i, linha in enumerate(linhas):
+            brutos[i, :len(linha)] = np.frombuffer(linha, dtype=np.uint8)
+    return _TABELA_CODIGOS[brutos]
+
+
+def texto_dos_codigos(codigos):
+    """Texto do labirinto (bytes, linhas separadas por quebra de linha) a partir da grade de códigos"""
+    linhas, colunas = codigos.shape
+    texto = np.empty((linhas, colunas + 1), dtype=np.uint8)
+    texto[:, :colunas] = _TABELA_BYTES[codigos]
+    texto[:, colunas] = ord('\n')
+    return texto.tobytes()
+
 
 # DEFINIÇÃO DO AMBIENTE 
 class Ambiente:
-    def __init__(self, nome_arquivo, video_recorder=None):
+    __slots__ = (
+        'labirinto', 'linha_agente', 'coluna_agente', 'direcao_agente', 'linhas', 'colunas',
+        'total_comida', 'comida_restante', 'video_recorder', 'renderizador',
+        'posicao_inicial', 'celulas_comida', 'comidas_comidas', 'comidas_antes_do_indice',
+        'nome_arquivo', 'analise',
+    )
+
+    def __init__(self, nome_arquivo=None, video_recorder=None, renderizador=None, texto=None):
         self.labirinto = []
         self.linha_agente = 0
         self.coluna_agente = 0
@@ -106,9 +939,27 @@ class Ambiente:
         self.total_comida = 0
         self.comida_restante = 0
         self.video_recorder = video_recorder
-
-        self.carregar_labirinto(nome_arquivo)
+        self.renderizador = renderizador  # None = impressão completa a cada passo
+
+        # Estado mutável para reset/step/snapshot/restore: comidas comidas como máscara de bits
+        # (bit i = i-ésima célula de celulas_comida), indexada só quando a API é usada
+        self.celulas_comida = None
+        self.comidas_comidas = 0
+        self.comidas_antes_do_indice = []
+
+        # Análise estática (componentes, becos, distância à saída), feita sob demanda por analisar()
+        self.nome_arquivo = nome_arquivo if texto is None else None
+        self.analise = None
+
+        # O labirinto vem de um arquivo (texto ou binário) ou, sem arquivo, direto do texto
+        if texto is not None:
+            self.carregar_texto(texto)
+        elif LabirintoBinario.eh_binario(nome_arquivo):
+            self.carregar_codigos(LabirintoBinario.ler(nome_arquivo))
+        else:
+            self.carregar_labirinto(nome_arquivo)
         self.encontrar_posicao_agente()
+        self.posicao_inicial = (self.linha_agente, self.coluna_agente, self.direcao_agente)
         self.contar_comida()
         
         # Configura gravador de vídeo se fornecido
@@ -118,7 +969,11 @@ class Ambiente:
     def carregar_labirinto(self, nome_arquivo):
         """Carrega labirinto do arquivo de texto"""
         with open(nome_arquivo, 'r') as arquivo:
-            linhas = arquivo.read().strip().split('\n')
+            self.carregar_texto(arquivo.read())
+
+    def carregar_texto(self, texto):
+        """Carrega labirinto a partir do texto (linhas separadas por quebra de linha)"""
+        linhas = texto.replace('\r\n', '\n').strip().split('\n')
 
         # Normaliza comprimento de linhas (se houver variação) - pega o maior
         self.linhas = len(linhas)
@@ -127,6 +982,10 @@ class Ambiente:
         # Preenche cada linha para o mesmo tamanho (com X se faltar)
         self.labirinto = [list(l.ljust(self.colunas, 'X')) for l in linhas]
 
+    def carregar_codigos(self, codigos):
+        """Carrega labirinto a partir da grade de códigos (formato binário)"""
+        self.carregar_texto(texto_dos_codigos(codigos).decode('ascii'))
+
     def encontrar_posicao_agente(self): # Encontrar e definir a posição inicial do agente
         """Encontra posição inicial do agente (E)"""
         for i in range(self.linhas):
@@ -195,6 +1054,7 @@ class Ambiente:
             if self.labirinto[nova_linha][nova_coluna] == 'o':
                 self.comida_restante -= 1
                 self.labirinto[nova_linha][nova_coluna] = '_'  # Come a comida
+                self.marcar_comida_comida(nova_linha, nova_coluna)
 
             self.linha_agente = nova_linha
             self.coluna_agente = nova_coluna
@@ -218,8 +1078,12 @@ class Ambiente:
         """Obtém contagem de comida restante"""
         return self.comida_restante
 
-    def imprimir_labirinto(self, step_info=""):
-        """Imprime estado atual do labirinto com posição do agente (com flush)"""
+    def simbolo_celula(self, linha, coluna):
+        """Símbolo de uma célula do labirinto"""
+        return self.labirinto[linha][coluna]
+
+    def texto_labirinto(self):
+        """Texto do labirinto com a posição do agente (A)"""
         linhas = []
         for i in range(self.linhas):
             linha_chars = []
@@ -229,69 +1093,1469 @@ class Ambiente:
                 else:
                     linha_chars.append(self.labirinto[i][j])
             linhas.append(''.join(linha_chars))
-        # Imprime tudo de uma vez e força flush para evitar buffering evitando problema na exibição via console
-        print('\n'.join(linhas), flush=True)
-        print(flush=True)
+        return '\n'.join(linhas)
+
+    def labirinto_video(self):
+        """Labirinto no formato aceito pelo VideoRecorder"""
+        return self.labirinto
+
+    def imprimir_labirinto(self, step_info=""):
+        """Imprime estado atual do labirinto com posição do agente (com flush)"""
+        if self.renderizador is not None:
+            # Renderizador de terminal (diferencial/limitado/silencioso)
+            self.renderizador.desenhar(self, step_info)
+        else:
+            # Imprime tudo de uma vez e força flush para evitar buffering evitando problema na exibição via console
+            print(self.texto_labirinto(), flush=True)
+            print(flush=True)
         
         # Adiciona frame ao vídeo se gravador estiver ativo
         if self.video_recorder:
             self.video_recorder.add_frame(
-                self.labirinto, 
+                self.labirinto_video(), 
                 self.linha_agente, 
                 self.coluna_agente, 
                 step_info
             )
 
+    def finalizar_exibicao(self):
+        """Finaliza o renderizador de terminal (desenha o último estado pendente)"""
+        if self.renderizador is not None:
+            self.renderizador.finalizar(self)
+
+    def codigos_celulas(self):
+        """Grade uint8 com o código (PAREDE, CORREDOR, COMIDA, ...) de cada célula"""
+        return codigos_do_labirinto(self.labirinto_video())
+
+    def analisar(self, excluir_comida_inalcancavel=False, usar_cache=True):
+        """Análise estática do labirinto (chamar logo após carregar, antes de comer comida).
+
+        Com excluir_comida_inalcancavel, as comidas fora da componente da entrada deixam
+        de fazer parte do objetivo (total e restante). Retorna a AnaliseLabirinto.
+        """
+        # Import local: analise_labirinto importa este módulo
+        from analise_labirinto import analisar_grade, analisar_labirinto
+
+        codigos = self.codigos_celulas()
+        entrada = self.posicao_inicial[:2]
+        if self.nome_arquivo is not None:
+            self.analise = analisar_labirinto(self.nome_arquivo, codigos, entrada, usar_cache)
+        else:
+            self.analise = analisar_grade(codigos, entrada)
+
+        if excluir_comida_inalcancavel:
+            inalcancaveis = len(self.analise.comida_inalcancavel)
+            self.total_comida -= inalcancaveis
+            self.comida_restante -= inalcancaveis
+        return self.analise
+
+    # API headless (estilo Gym) para planejadores por busca: sem impressão nem vídeo
+    def reset(self):
+        """Volta ao estado inicial (agente na entrada, nenhuma comida comida) e retorna o sensor"""
+        self.restore(self.posicao_inicial + (0,))
+        return self.obter_sensor()
+
+    def step(self, direcao):
+        """Tenta mover na direção dada; retorna (sensor, recompensa, concluído, info).
+
+        A recompensa segue a pontuação: +10 por comida, -1 por passo efetivo.
+        """
+        self.definir_direcao(direcao)
+        comida_antes = self.comida_restante
+        moveu = self.mover()
+        comeu = self.comida_restante < comida_antes
+        recompensa = (10 if comeu else 0) - (1 if moveu else 0)
+        concluido = self.toda_comida_coletada() and self.esta_na_saida()
+        return self.obter_sensor(), recompensa, concluido, {'moveu': moveu, 'comeu': comeu}
+
+    def snapshot(self):
+        """Estado mutável atual: (linha, coluna, direção, máscara de comidas comidas)"""
+        if self.celulas_comida is None:
+            self.indexar_comida()
+        return (self.linha_agente, self.coluna_agente, self.direcao_agente, self.comidas_comidas)
+
+    def restore(self, estado):
+        """Restaura um estado de snapshot(); só as comidas que diferem são reescritas na grade"""
+        if self.celulas_comida is None:
+            self.indexar_comida()
+        self.linha_agente, self.coluna_agente, self.direcao_agente, comidas = estado
+
+        diferentes = self.comidas_comidas ^ comidas
+        while diferentes:
+            bit = diferentes & -diferentes
+            indice = bit.bit_length() - 1
+            linha, coluna = divmod(int(self.celulas_comida[indice]), self.colunas)
+            self.definir_comida(linha, coluna, not comidas & bit)
+            diferentes ^= bit
+
+        self.comidas_comidas = comidas
+        self.comida_restante = self.total_comida - comidas.bit_count()
+
+    def marcar_comida_comida(self, linha, coluna):
+        """Registra na máscara de estado a comida comida na célula"""
+        celula = linha * self.colunas + coluna
+        if self.celulas_comida is None:
+            self.comidas_antes_do_indice.append(celula)
+        else:
+            self.comidas_comidas |= 1 << int(np.searchsorted(self.celulas_comida, celula))
+
+    def indexar_comida(self):
+        """Indexa as células com comida no início (as atuais mais as já comidas)"""
+        comidas = np.array(self.comidas_antes_do_indice, dtype=np.int64)
+        self.celulas_comida = np.union1d(self.celulas_com_comida(), comidas)
+        self.comidas_comidas = 0
+        for indice in np.searchsorted(self.celulas_comida, comidas).tolist():
+            self.comidas_comidas |= 1 << indice
+        self.comidas_antes_do_indice = []
+
+    def celulas_com_comida(self):
+        """Índices lineares (linha * colunas + coluna) das células com comida agora"""
+        return np.array([i * self.colunas + j for i, linha in enumerate(self.labirinto)
+                         for j, simbolo in enumerate(linha) if simbolo == 'o'], dtype=np.int64)
+
+    def definir_comida(self, linha, coluna, presente):
+        """Coloca (ou remove) comida em uma célula"""
+        self.labirinto[linha][coluna] = 'o' if presente else '_'
+
+
+# AMBIENTE COM GRADE NUMPY (para labirintos grandes)
+class AmbienteGrade(Ambiente):
+    """Ambiente com o labirinto em uma grade uint8 (mesma interface pública de Ambiente)"""
+
+    __slots__ = ('grade', 'grade_borda')
+
+    def carregar_labirinto(self, nome_arquivo):
+        """Carrega labirinto do arquivo direto para a grade de códigos"""
+        with open(nome_arquivo, 'rb') as arquivo:
+            self.carregar_texto(arquivo.read())
+
+    def carregar_texto(self, texto):
+        """Carrega labirinto a partir do texto (str ou bytes) para a grade de códigos"""
+        self.carregar_codigos(codigos_do_texto(texto))
+
+    def carregar_codigos(self, codigos):
+        """Carrega a grade de códigos (do texto ou do formato binário)"""
+        self.linhas, self.colunas = codigos.shape
+
+        # Borda de paredes ao redor da grade: o sensor vira um fatiamento 3x3
+        # e o teste de limites do movimento fica implícito
+        self.grade_borda = np.pad(codigos, 1, constant_values=PAREDE)
+        self.grade = self.grade_borda[1:-1, 1:-1]
+
+    def celulas_com_comida(self):
+        """Índices lineares (linha * colunas + coluna) das células com comida agora"""
+        return np.flatnonzero(self.grade == COMIDA)
+
+    def definir_comida(self, linha, coluna, presente):
+        """Coloca (ou remove) comida em uma célula"""
+        self.grade[linha, coluna] = COMIDA if presente else CORREDOR
+
+    def encontrar_posicao_agente(self):
+        """Encontra posição inicial do agente (E)"""
+        entradas = np.argwhere(self.grade == ENTRADA)
+        if len(entradas):
+            self.linha_agente, self.coluna_agente = (int(v) for v in entradas[0])
+            self.direcao_agente = 'N'  # Direção padrão
+            self.grade[self.linha_agente, self.coluna_agente] = CORREDOR  # Substitui entrada por corredor
+
+    def contar_comida(self):
+        """Conta total de comida no labirinto"""
+        self.total_comida = int(np.count_nonzero(self.grade == COMIDA))
+        self.comida_restante = self.total_comida
+
+    def obter_sensor(self):
+        """Retorna matriz 3x3 do sensor ao redor do agente"""
+        bloco = self.grade_borda[self.linha_agente:self.linha_agente + 3,
+                                 self.coluna_agente:self.coluna_agente + 3]
+        sensor = [[SIMBOLOS_CELULA[codigo] for codigo in linha] for linha in bloco.tolist()]
+
+        # Define direção do agente no centro (1,1)
+        sensor[1][1] = self.direcao_agente
+
+        return sensor
+
+    def mover(self):
+        """Move agente na direção atual"""
+        delta_linha, delta_coluna = DESLOCAMENTOS.get(self.direcao_agente, (0, 0))
+        nova_linha = self.linha_agente + delta_linha
+        nova_coluna = self.coluna_agente + delta_coluna
+
+        # A borda de paredes cobre os limites do labirinto
+        codigo = self.grade_borda[nova_linha + 1, nova_coluna + 1]
+        if codigo == PAREDE:
+            return False  # Movimento inválido
+
+        # Verifica se há comida na nova posição
+        if codigo == COMIDA:
+            self.comida_restante -= 1
+            self.grade[nova_linha, nova_coluna] = CORREDOR  # Come a comida
+            self.marcar_comida_comida(nova_linha, nova_coluna)
+
+        self.linha_agente = nova_linha
+        self.coluna_agente = nova_coluna
+        return True
+
+    def esta_na_saida(self):
+        """Verifica se agente está na saída"""
+        return bool(self.grade[self.linha_agente, self.coluna_agente] == SAIDA)
+
+    def simbolo_celula(self, linha, coluna):
+        """Símbolo de uma célula do labirinto"""
+        return SIMBOLOS_CELULA[self.grade[linha, coluna]]
+
+    def texto_labirinto(self):
+        """Texto do labirinto com a posição do agente (A)"""
+        texto = np.empty((self.linhas, self.colunas + 1), dtype=np.uint8)
+        texto[:, :self.colunas] = _TABELA_BYTES[self.grade]
+        texto[:, self.colunas] = ord('\n')
+        texto[self.linha_agente, self.coluna_agente] = ord('A')  # Mostra posição do agente
+        return texto.tobytes()[:-1].decode('ascii')
+
+    def labirinto_video(self):
+        """Labirinto no formato aceito pelo VideoRecorder (a própria grade de códigos)"""
+        return self.grade
+
+
+# AMBIENTE MAPEADO EM MEMÓRIA (para arquivos de labirinto muito grandes)
+class AmbienteMapeado(Ambiente):
+    """Ambiente que lê as células direto do arquivo mapeado em memória (mmap), sem cópia.
+
+    O mapeamento é copy-on-write: comer comida altera só a página afetada em
+    memória, nunca o arquivo. Com linhas de tamanho uniforme as células são uma
+    visão 2D de passo fixo sobre o arquivo; caso contrário usa-se um índice com
+    o deslocamento de cada linha.
+    """
+
+    __slots__ = ('mapa', 'bytes', 'inicio', 'fim', 'passo', 'celulas', 'deslocamentos', 'comprimentos', 'simbolos')
+
+    TAMANHO_BLOCO = 1 << 26  # Bytes por bloco nas varreduras (limita memória temporária)
+
+    def carregar_labirinto(self, nome_arquivo):
+        """Mapeia o arquivo do labirinto e indexa suas linhas"""
+        with open(nome_arquivo, 'rb') as arquivo:
+            self.mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.indexar_linhas()
+
+    def carregar_texto(self, texto):
+        """Copia o texto (str ou bytes) para um mapeamento anônimo e indexa suas linhas"""
+        dados = texto.encode('ascii') if isinstance(texto, str) else texto
+        self.mapa = mmap.mmap(-1, max(len(dados), 1))
+        self.mapa[:len(dados)] = dados
+        if not dados:
+            self.mapa[:1] = b'\n'
+        self.indexar_linhas()
+
+    def carregar_codigos(self, codigos):
+        """Escreve a grade de códigos (formato binário) como texto em um mapeamento anônimo"""
+        self.carregar_texto(texto_dos_codigos(codigos))
+
+    def indexar_linhas(self):
+        """Indexa as linhas do labirinto no mapeamento"""
+        self.bytes = np.frombuffer(self.mapa, dtype=np.uint8)
+        self.simbolos = None  # Matriz de símbolos das linhas irregulares, montada no primeiro uso
+
+        # Ignora espaços/linhas em branco no início e no fim (como o strip() de Ambiente)
+        inicio, fim = 0, len(self.bytes)
+        while inicio < fim and chr(self.bytes[inicio]).isspace():
+            inicio += 1
+        while fim > inicio and chr(self.bytes[fim - 1]).isspace():
+            fim -= 1
+        self.inicio, self.fim = inicio, fim
+
+        primeira_quebra = self.mapa.find(b'\n', inicio, fim)
+        if primeira_quebra < 0:
+            primeira_quebra = fim
+        fim_linha = primeira_quebra - 1 if primeira_quebra > inicio and self.bytes[primeira_quebra - 1] == ord('\r') else primeira_quebra
+        largura_quebra = primeira_quebra - fim_linha + 1
+        self.colunas = fim_linha - inicio
+        self.passo = self.colunas + largura_quebra
+
+        # Passo fixo: o tamanho bate e todas as linhas terminam com quebra no lugar certo (verificação O(linhas))
+        total = fim - inicio + largura_quebra
+        self.celulas = None
+        if total % self.passo == 0:
+            linhas = total // self.passo
+            quebras = self.bytes[inicio + self.passo - 1:fim:self.passo]
+            if len(quebras) == linhas - 1 and np.all(quebras == ord('\n')):
+                self.linhas = linhas
+                self.celulas = np.ndarray((self.linhas, self.colunas), dtype='S1', buffer=self.mapa,
+                                          offset=inicio, strides=(self.passo, 1))
+                return
+
+        # Linhas irregulares: índice com início e comprimento de cada linha
+        quebras = np.concatenate([inicio + self.indices_do_byte(ord('\n'), inicio, fim), [fim]])
+        self.deslocamentos = np.concatenate([[inicio], quebras[:-1] + 1]).astype(np.int64)
+        finais = quebras - (self.bytes[np.maximum(quebras - 1, 0)] == ord('\r'))
+        self.comprimentos = np.maximum(finais - self.deslocamentos, 0)
+        self.linhas = len(self.deslocamentos)
+        self.colunas = int(self.comprimentos.max()) if self.linhas else 0
+
+    def indices_do_byte(self, valor, inicio, fim):
+        """Posições (relativas a inicio) de um byte no arquivo, varrendo em blocos"""
+        partes = []
+        for bloco in range(inicio, fim, self.TAMANHO_BLOCO):
+            trecho = self.bytes[bloco:min(bloco + self.TAMANHO_BLOCO, fim)]
+            partes.append(np.flatnonzero(trecho == valor) + (bloco - inicio))
+        return np.concatenate(partes) if partes else np.zeros(0, dtype=np.int64)
+
+    def deslocamento(self, linha, coluna):
+        """Posição da célula no arquivo, ou None se estiver fora do labirinto"""
+        if linha < 0 or linha >= self.linhas or coluna < 0:
+            return None
+        if self.celulas is not None:
+            return self.inicio + linha * self.passo + coluna if coluna < self.colunas else None
+        return int(self.deslocamentos[linha]) + coluna if coluna < self.comprimentos[linha] else None
+
+    def celula(self, linha, coluna):
+        """Símbolo da célula (X fora dos limites ou além do fim de uma linha curta)"""
+        posicao = self.deslocamento(linha, coluna)
+        return 'X' if posicao is None else chr(self.mapa[posicao])
+
+    def posicao_da_celula(self, posicao):
+        """Converte uma posição no arquivo em (linha, coluna)"""
+        if self.celulas is not None:
+            return divmod(posicao - self.inicio, self.passo)
+        linha = int(np.searchsorted(self.deslocamentos, posicao, side='right')) - 1
+        return linha, posicao - int(self.deslocamentos[linha])
+
+    def celulas_com_comida(self):
+        """Índices lineares (linha * colunas + coluna) das células com comida agora"""
+        posicoes = self.inicio + self.indices_do_byte(ord('o'), self.inicio, self.fim)
+        if self.celulas is not None:
+            linhas, colunas = np.divmod(posicoes - self.inicio, self.passo)
+        else:
+            linhas = np.searchsorted(self.deslocamentos, posicoes, side='right') - 1
+            colunas = posicoes - self.deslocamentos[linhas]
+        return linhas * self.colunas + colunas
+
+    def definir_comida(self, linha, coluna, presente):
+        """Coloca (ou remove) comida em uma célula (só na cópia em memória)"""
+        self.escrever_celula(self.deslocamento(linha, coluna), linha, coluna, ord('o') if presente else ord('_'))
+
+    def escrever_celula(self, posicao, linha, coluna, valor):
+        """Altera uma célula no mapeamento e na matriz de símbolos já montada"""
+        self.mapa[posicao] = valor
+        if self.simbolos is not None:
+            self.simbolos[linha, coluna] = _SIMBOLOS_BYTE[valor]
+
+    def encontrar_posicao_agente(self):
+        """Encontra posição inicial do agente (E)"""
+        posicao = self.mapa.find(b'E', self.inicio, self.fim)
+        if posicao >= 0:
+            self.linha_agente, self.coluna_agente = self.posicao_da_celula(posicao)
+            self.direcao_agente = 'N'  # Direção padrão
+            self.mapa[posicao] = ord('_')  # Substitui entrada por corredor
+
+    def contar_comida(self):
+        """Conta total de comida no labirinto (varredura vetorizada em blocos)"""
+        self.total_comida = sum(
+            int(np.count_nonzero(self.bytes[bloco:min(bloco + self.TAMANHO_BLOCO, self.fim)] == ord('o')))
+            for bloco in range(self.inicio, self.fim, self.TAMANHO_BLOCO)
+        )
+        self.comida_restante = self.total_comida
+
+    def obter_sensor(self):
+        """Retorna matriz 3x3 do sensor ao redor do agente"""
+        sensor = [[self.celula(self.linha_agente - 1 + i, self.coluna_agente - 1 + j) for j in range(3)]
+                  for i in range(3)]
+
+        # Define direção do agente no centro (1,1)
+        sensor[1][1] = self.direcao_agente
+
+        return sensor
+
+    def mover(self):
+        """Move agente na direção atual"""
+        delta_linha, delta_coluna = DESLOCAMENTOS.get(self.direcao_agente, (0, 0))
+        nova_linha = self.linha_agente + delta_linha
+        nova_coluna = self.coluna_agente + delta_coluna
+
+        posicao = self.deslocamento(nova_linha, nova_coluna)
+        if posicao is None or self.mapa[posicao] == ord('X'):
+            return False  # Movimento inválido
+
+        # Verifica se há comida na nova posição
+        if self.mapa[posicao] == ord('o'):
+            self.comida_restante -= 1
+            self.escrever_celula(posicao, nova_linha, nova_coluna, ord('_'))  # Come a comida (só na cópia em memória)
+            self.marcar_comida_comida(nova_linha, nova_coluna)
+
+        self.linha_agente = nova_linha
+        self.coluna_agente = nova_coluna
+        return True
+
+    def esta_na_saida(self):
+        """Verifica se agente está na saída"""
+        return self.celula(self.linha_agente, self.coluna_agente) == 'S'
+
+    def obter_simbolos(self):
+        """Matriz 'S1' com os símbolos do labirinto (visão sem cópia quando o passo é fixo).
+
+        Com linhas irregulares, a matriz é montada uma vez e mantida em dia por escrever_celula.
+        """
+        if self.celulas is not None:
+            return self.celulas
+        if self.simbolos is None:
+            self.simbolos = np.full((self.linhas, self.colunas), b'X', dtype='S1')
+            for i in range(self.linhas):
+                inicio = int(self.deslocamentos[i])
+                self.simbolos[i, :self.comprimentos[i]] = self.bytes[inicio:inicio + self.comprimentos[i]].view('S1')
+        return self.simbolos
+
+    def simbolo_celula(self, linha, coluna):
+        """Símbolo de uma célula do labirinto"""
+        return self.celula(linha, coluna)
+
+    def texto_labirinto(self):
+        """Texto do labirinto com a posição do agente (A)"""
+        texto = np.empty((self.linhas, self.colunas + 1), dtype=np.uint8)
+        texto[:, :self.colunas] = self.obter_simbolos().view(np.uint8)
+        texto[:, self.colunas] = ord('\n')
+        texto[self.linha_agente, self.coluna_agente] = ord('A')  # Mostra posição do agente
+        return texto.tobytes()[:-1].decode('ascii', 'replace')
+
+    def labirinto_video(self):
+        """Labirinto no formato aceito pelo VideoRecorder (matriz 'S1' de símbolos)"""
+        return self.obter_simbolos()
+
+
+# AMBIENTE EM LADRILHOS (mundos maiores que a memória)
+class AmbienteLadrilhos(Ambiente):
+    """Ambiente que lê ladrilhos de tamanho fixo do disco sob demanda, com cache LRU.
+
+    Só capacidade_cache ladrilhos ficam em memória; sensor e movimento atravessam as
+    fronteiras entre ladrilhos normalmente. A comida comida fica num registro de
+    alterações por ladrilho, reaplicado quando um ladrilho descartado é relido. Arquivos
+    que não estão no formato em ladrilhos são convertidos para um arquivo temporário.
+    texto_labirinto e celulas_com_comida (snapshot) percorrem o labirinto inteiro; o vídeo
+    lê o labirinto inteiro só para a imagem base e depois apenas a célula do agente.
+    """
+
+    __slots__ = ('arquivo', 'tamanho_ladrilho', 'ladrilhos_colunas', 'entrada', 'cache', 'capacidade_cache',
+                 'alteracoes', 'acertos', 'faltas')
+
+    CAPACIDADE_CACHE = 256  # Ladrilhos em memória (256 ladrilhos de 256x256 = 16 MiB)
+
+    def carregar_labirinto(self, nome_arquivo):
+        """Abre o arquivo em ladrilhos (ou converte o texto para um temporário)"""
+        if LabirintoLadrilhos.eh_ladrilhos(nome_arquivo):
+            self.abrir(open(nome_arquivo, 'rb'))
+            return
+        with open(nome_arquivo, 'rb') as arquivo:
+            self.carregar_texto(arquivo.read())
+
+    def carregar_texto(self, texto):
+        """Carrega labirinto a partir do texto (str ou bytes)"""
+        self.carregar_codigos(codigos_do_texto(texto))
+
+    def carregar_codigos(self, codigos):
+        """Grava a grade de códigos em ladrilhos num arquivo temporário e o abre"""
+        arquivo = tempfile.TemporaryFile()
+        LabirintoLadrilhos.escrever(arquivo, codigos)
+        self.abrir(arquivo)
+
+    def abrir(self, arquivo):
+        """Lê o cabeçalho e prepara o cache (vazio) de ladrilhos"""
+        self.arquivo = arquivo
+        (self.linhas, self.colunas, self.tamanho_ladrilho, linha_entrada, coluna_entrada,
+         self.total_comida) = LabirintoLadrilhos.ler_cabecalho(arquivo)
+        self.entrada = None if linha_entrada == LabirintoLadrilhos.SEM_ENTRADA else (linha_entrada, coluna_entrada)
+        self.ladrilhos_colunas = -(-self.colunas // self.tamanho_ladrilho)
+        self.cache = OrderedDict()
+        self.capacidade_cache = self.CAPACIDADE_CACHE
+        self.alteracoes = {}  # (linha, coluna) do ladrilho: {índice no ladrilho: código}
+        self.acertos = 0
+        self.faltas = 0
+
+    def ler_ladrilho(self, linha_ladrilho, coluna_ladrilho):
+        """Lê um ladrilho do disco e reaplica as alterações feitas nele"""
+        tamanho = self.tamanho_ladrilho
+        self.arquivo.seek(LabirintoLadrilhos.CABECALHO.size
+                          + (linha_ladrilho * self.ladrilhos_colunas + coluna_ladrilho) * tamanho * tamanho)
+        ladrilho = np.frombuffer(bytearray(self.arquivo.read(tamanho * tamanho)), dtype=np.uint8)
+        for indice, codigo in self.alteracoes.get((linha_ladrilho, coluna_ladrilho), {}).items():
+            ladrilho[indice] = codigo
+        return ladrilho.reshape(tamanho, tamanho)
+
+    def ladrilho(self, linha_ladrilho, coluna_ladrilho):
+        """Ladrilho do cache (conta acerto) ou do disco (conta falta, descarta o menos usado)"""
+        chave = (linha_ladrilho, coluna_ladrilho)
+        ladrilho = self.cache.get(chave)
+        if ladrilho is not None:
+            self.acertos += 1
+            self.cache.move_to_end(chave)
+            return ladrilho
+
+        self.faltas += 1
+        ladrilho = self.cache[chave] = self.ler_ladrilho(linha_ladrilho, coluna_ladrilho)
+        while len(self.cache) > self.capacidade_cache:
+            self.cache.popitem(last=False)
+        return ladrilho
+
+    def codigo(self, linha, coluna):
+        """Código da célula (parede fora dos limites)"""
+        if 0 <= linha < self.linhas and 0 <= coluna < self.colunas:
+            linha_ladrilho, linha_dentro = divmod(linha, self.tamanho_ladrilho)
+            coluna_ladrilho, coluna_dentro = divmod(coluna, self.tamanho_ladrilho)
+            return int(self.ladrilho(linha_ladrilho, coluna_ladrilho)[linha_dentro, coluna_dentro])
+        return PAREDE
+
+    def definir_codigo(self, linha, coluna, codigo):
+        """Altera uma célula no ladrilho em cache e no registro de alterações"""
+        linha_ladrilho, linha_dentro = divmod(linha, self.tamanho_ladrilho)
+        coluna_ladrilho, coluna_dentro = divmod(coluna, self.tamanho_ladrilho)
+        self.ladrilho(linha_ladrilho, coluna_ladrilho)[linha_dentro, coluna_dentro] = codigo
+        self.alteracoes.setdefault((linha_ladrilho, coluna_ladrilho), {})[
+            linha_dentro * self.tamanho_ladrilho + coluna_dentro] = codigo
+
+    def estatisticas_cache(self):
+        """Acertos, faltas e ocupação do cache de ladrilhos"""
+        consultas = self.acertos + self.faltas
+        return {
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            'ladrilhos_em_cache': len(self.cache),
+            'capacidade': self.capacidade_cache,
+        }
+
+    def codigos_completos(self):
+        """Grade de códigos do labirinto inteiro (lida ladrilho a ladrilho, sem passar pelo cache)"""
+        tamanho = self.tamanho_ladrilho
+        codigos = np.empty((-(-self.linhas // tamanho) * tamanho, self.ladrilhos_colunas * tamanho), dtype=np.uint8)
+        for linha_ladrilho in range(-(-self.linhas // tamanho)):
+            for coluna_ladrilho in range(self.ladrilhos_colunas):
+                ladrilho = self.cache.get((linha_ladrilho, coluna_ladrilho))
+                if ladrilho is None:
+                    ladrilho = self.ler_ladrilho(linha_ladrilho, coluna_ladrilho)
+                codigos[linha_ladrilho * tamanho:(linha_ladrilho + 1) * tamanho,
+                        coluna_ladrilho * tamanho:(coluna_ladrilho + 1) * tamanho] = ladrilho
+        return codigos[:self.linhas, :self.colunas]
+
+    def celulas_com_comida(self):
+        """Índices lineares (linha * colunas + coluna) das células com comida agora"""
+        return np.flatnonzero(self.codigos_completos() == COMIDA)
+
+    def definir_comida(self, linha, coluna, presente):
+        """Coloca (ou remove) comida em uma célula"""
+        self.definir_codigo(linha, coluna, COMIDA if presente else CORREDOR)
+
+    def encontrar_posicao_agente(self):
+        """Posição inicial do agente (E), registrada no cabeçalho"""
+        if self.entrada is not None:
+            self.linha_agente, self.coluna_agente = self.entrada
+            self.direcao_agente = 'N'  # Direção padrão
+
+    def contar_comida(self):
+        """Total de comida no labirinto, registrado no cabeçalho"""
+        self.comida_restante = self.total_comida
+
+    def obter_sensor(self):
+        """Retorna matriz 3x3 do sensor ao redor do agente"""
+        tamanho = self.tamanho_ladrilho
+        linha_ladrilho, linha_dentro = divmod(self.linha_agente, tamanho)
+        coluna_ladrilho, coluna_dentro = divmod(self.coluna_agente, tamanho)
+        if 0 < linha_dentro < tamanho - 1 and 0 < coluna_dentro < tamanho - 1:
+            # Janela inteira dentro de um ladrilho (a borda dos ladrilhos do fim já é parede)
+            bloco = self.ladrilho(linha_ladrilho, coluna_ladrilho)[linha_dentro - 1:linha_dentro + 2,
+                                                                   coluna_dentro - 1:coluna_dentro + 2].tolist()
+        else:
+            bloco = [[self.codigo(self.linha_agente + i, self.coluna_agente + j) for j in (-1, 0, 1)]
+                     for i in (-1, 0, 1)]
+        sensor = [[SIMBOLOS_CELULA[codigo] for codigo in linha] for linha in bloco]
+
+        # Define direção do agente no centro (1,1)
+        sensor[1][1] = self.direcao_agente
+
+        return sensor
+
+    def mover(self):
+        """Move agente na direção atual"""
+        delta_linha, delta_coluna = DESLOCAMENTOS.get(self.direcao_agente, (0, 0))
+        nova_linha = self.linha_agente + delta_linha
+        nova_coluna = self.coluna_agente + delta_coluna
+
+        codigo = self.codigo(nova_linha, nova_coluna)
+        if codigo == PAREDE:
+            return False  # Movimento inválido
+
+        # Verifica se há comida na nova posição
+        if codigo == COMIDA:
+            self.comida_restante -= 1
+            self.definir_codigo(nova_linha, nova_coluna, CORREDOR)  # Come a comida
+            self.marcar_comida_comida(nova_linha, nova_coluna)
+
+        self.linha_agente = nova_linha
+        self.coluna_agente = nova_coluna
+        return True
+
+    def esta_na_saida(self):
+        """Verifica se agente está na saída"""
+        return self.codigo(self.linha_agente, self.coluna_agente) == SAIDA
+
+    def simbolo_celula(self, linha, coluna):
+        """Símbolo de uma célula do labirinto"""
+        return SIMBOLOS_CELULA[self.codigo(linha, coluna)]
+
+    def texto_labirinto(self):
+        """Texto do labirinto com a posição do agente (A)"""
+        texto = np.empty((self.linhas, self.colunas + 1), dtype=np.uint8)
+        texto[:, :self.colunas] = _TABELA_BYTES[self.codigos_completos()]
+        texto[:, self.colunas] = ord('\n')
+        texto[self.linha_agente, self.coluna_agente] = ord('A')  # Mostra posição do agente
+        return texto.tobytes()[:-1].decode('ascii')
+
+    def labirinto_video(self):
+        """Labirinto no formato aceito pelo VideoRecorder: o próprio ambiente, lido célula a célula pelo cache"""
+        return self
+
+
+# MEMÓRIA COMPACTA DO AGENTE (um índice linear por posição em vez de dicts/sets de tuplas)
+class GradeMemoria:
+    """Base das memórias do agente: converte (linha, coluna) em índice linear.
+
+    A grade tem uma borda de uma célula além do labirinto, pois o sensor
+    enxerga as posições logo fora dos limites.
+    """
+
+    __slots__ = ('linhas', 'largura')
+
+    def __init__(self, linhas, colunas):
+        self.linhas = linhas + 2
+        self.largura = colunas + 2
+
+    def indice(self, posicao):
+        """Índice linear da posição, ou -1 se estiver fora da grade"""
+        linha = posicao[0] + 1
+        coluna = posicao[1] + 1
+        if 0 <= linha < self.linhas and 0 <= coluna < self.largura:
+            return linha * self.largura + coluna
+        return -1
+
+    def memoria_bruta(self):
+        """Bytes da memória (para os checkpoints)"""
+        return memoryview(self.dados).cast('B')
+
+    def blocos(self, tamanho):
+        """(deslocamento, bytes) de cada bloco de tamanho bytes da memória"""
+        bruta = self.memoria_bruta()
+        for inicio in range(0, len(bruta), tamanho):
+            yield inicio, bruta[inicio:inicio + tamanho]
+
+    def restaurar_bloco(self, chave, dados):
+        """Reescreve um bloco gravado por blocos()"""
+        self.memoria_bruta()[chave:chave + len(dados)] = dados
+
+
+class MapaConhecido(GradeMemoria):
+    """Mapa do agente: um byte por célula com o símbolo conhecido (0 = desconhecida)"""
+
+    __slots__ = ('dados', 'quantidade')
+
+    def __init__(self, linhas, colunas):
+        super().__init__(linhas, colunas)
+        self.dados = bytearray(self.linhas * self.largura)
+        self.quantidade = 0
+
+    def get(self, posicao, padrao=None):
+        # Índice calculado em linha: esta é a consulta mais frequente do agente
+        linha = posicao[0] + 1
+        coluna = posicao[1] + 1
+        if 0 <= linha < self.linhas and 0 <= coluna < self.largura:
+            valor = self.dados[linha * self.largura + coluna]
+            if valor:
+                return _SIMBOLOS_BYTE[valor]
+        return padrao
+
+    def __getitem__(self, posicao):
+        simbolo = self.get(posicao)
+        if simbolo is None:
+            raise KeyError(posicao)
+        return simbolo
+
+    def __setitem__(self, posicao, simbolo):
+        self.definir(posicao, simbolo)
+
+    def definir(self, posicao, simbolo):
+        """Grava o símbolo da célula; retorna True se ela era desconhecida"""
+        indice = self.indice(posicao)
+        if indice < 0:
+            raise KeyError(posicao)
+        nova = not self.dados[indice]
+        if nova:
+            self.quantidade += 1
+        self.dados[indice] = ord(simbolo)
+        return nova
+
+    def __contains__(self, posicao):
+        linha = posicao[0] + 1
+        coluna = posicao[1] + 1
+        return (0 <= linha < self.linhas and 0 <= coluna < self.largura
+                and self.dados[linha * self.largura + coluna] != 0)
+
+    def __len__(self):
+        return self.quantidade
+
+
+class ContadorVisitas(GradeMemoria):
+    """Número de visitas por célula (array('I'), 4 bytes por célula)"""
+
+    __slots__ = ('dados',)
+
+    def __init__(self, linhas, colunas):
+        super().__init__(linhas, colunas)
+        self.dados = array('I', bytes(4 * self.linhas * self.largura))
+
+    def get(self, posicao, padrao=0):
+        indice = self.indice(posicao)
+        return self.dados[indice] if indice >= 0 else padrao
+
+    def __getitem__(self, posicao):
+        return self.get(posicao)
+
+    def __setitem__(self, posicao, valor):
+        indice = self.indice(posicao)
+        if indice < 0:
+            raise KeyError(posicao)
+        self.dados[indice] = valor
+
+
+class ConjuntoPosicoes(GradeMemoria):
+    """Conjunto de posições como mapa de bits (um bit por célula)"""
+
+    __slots__ = ('bits', 'quantidade')
+
+    def __init__(self, linhas, colunas):
+        super().__init__(linhas, colunas)
+        self.bits = bytearray((self.linhas * self.largura + 7) // 8)
+        self.quantidade = 0
+
+    def memoria_bruta(self):
+        return memoryview(self.bits)
+
+    def add(self, posicao):
+        indice = self.indice(posicao)
+        if indice < 0:
+            raise KeyError(posicao)
+        mascara = 1 << (indice & 7)
+        if not self.bits[indice >> 3] & mascara:
+            self.bits[indice >> 3] |= mascara
+            self.quantidade += 1
+
+    def discard(self, posicao):
+        indice = self.indice(posicao)
+        if indice >= 0 and self.bits[indice >> 3] & (1 << (indice & 7)):
+            self.bits[indice >> 3] &= ~(1 << (indice & 7)) & 0xFF
+            self.quantidade -= 1
+
+    def __contains__(self, posicao):
+        indice = self.indice(posicao)
+        return indice >= 0 and bool(self.bits[indice >> 3] & (1 << (indice & 7)))
+
+    def __len__(self):
+        return self.quantidade
+
+
+# MEMÓRIA ESPARSA DO AGENTE PARA MUNDOS EM LADRILHOS (só os ladrilhos visitados ocupam memória)
+class GradeMemoriaLadrilhos:
+    """Base das memórias esparsas: ladrilhos alocados na primeira escrita.
+
+    Cobre as mesmas posições de GradeMemoria (uma célula de borda além do labirinto).
+    """
+
+    __slots__ = ('linhas', 'colunas', 'tamanho', 'ladrilhos')
+
+    def __init__(self, linhas, colunas, tamanho_ladrilho=LabirintoLadrilhos.TAMANHO_PADRAO):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.tamanho = tamanho_ladrilho
+        self.ladrilhos = {}  # (linha, coluna) do ladrilho: dados do ladrilho
+
+    def localizar(self, posicao):
+        """(chave do ladrilho, índice dentro dele), ou (None, -1) se estiver fora da grade"""
+        linha = posicao[0] + 1
+        coluna = posicao[1] + 1
+        if 0 <= linha < self.linhas + 2 and 0 <= coluna < self.colunas + 2:
+            linha_ladrilho, linha_dentro = divmod(linha, self.tamanho)
+            coluna_ladrilho, coluna_dentro = divmod(coluna, self.tamanho)
+            return (linha_ladrilho, coluna_ladrilho), linha_dentro * self.tamanho + coluna_dentro
+        return None, -1
+
+    def ladrilho_escrita(self, posicao):
+        """(dados do ladrilho, criado se preciso, e índice); KeyError fora da grade"""
+        chave, indice = self.localizar(posicao)
+        if chave is None:
+            raise KeyError(posicao)
+        dados = self.ladrilhos.get(chave)
+        if dados is None:
+            dados = self.ladrilhos[chave] = self.novo_ladrilho()
+        return dados, indice
+
+    def blocos(self, tamanho=None):
+        """(chave, bytes) de cada ladrilho alocado (os blocos dos checkpoints são os próprios ladrilhos)"""
+        for chave, dados in self.ladrilhos.items():
+            yield chave, memoryview(dados).cast('B')
+
+    def restaurar_bloco(self, chave, dados):
+        """Recria um ladrilho gravado por blocos()"""
+        ladrilho = self.novo_ladrilho()
+        memoryview(ladrilho).cast('B')[:] = dados
+        self.ladrilhos[chave] = ladrilho
+
+
+class MapaConhecidoLadrilhos(GradeMemoriaLadrilhos):
+    """MapaConhecido esparso: um bytearray por ladrilho com o símbolo conhecido (0 = desconhecida)"""
+
+    __slots__ = ('quantidade',)
+
+    def __init__(self, linhas, colunas, tamanho_ladrilho=LabirintoLadrilhos.TAMANHO_PADRAO):
+        super().__init__(linhas, colunas, tamanho_ladrilho)
+        self.quantidade = 0
+
+    def novo_ladrilho(self):
+        return bytearray(self.tamanho * self.tamanho)
+
+    def get(self, posicao, padrao=None):
+        chave, indice = self.localizar(posicao)
+        dados = self.ladrilhos.get(chave)
+        if dados is not None and dados[indice]:
+            return _SIMBOLOS_BYTE[dados[indice]]
+        return padrao
+
+    def __getitem__(self, posicao):
+        simbolo = self.get(posicao)
+        if simbolo is None:
+            raise KeyError(posicao)
+        return simbolo
+
+    def __setitem__(self, posicao, simbolo):
+        self.definir(posicao, simbolo)
+
+    def definir(self, posicao, simbolo):
+        """Grava o símbolo da célula; retorna True se ela era desconhecida"""
+        dados, indice = self.ladrilho_escrita(posicao)
+        nova = not dados[indice]
+        if nova:
+            self.quantidade += 1
+        dados[indice] = ord(simbolo)
+        return nova
+
+    def __contains__(self, posicao):
+        return self.get(posicao) is not None
+
+    def __len__(self):
+        return self.quantidade
+
+
+class ContadorVisitasLadrilhos(GradeMemoriaLadrilhos):
+    """ContadorVisitas esparso: um array('I') por ladrilho"""
+
+    __slots__ = ()
+
+    def novo_ladrilho(self):
+        return array('I', bytes(4 * self.tamanho * self.tamanho))
+
+    def get(self, posicao, padrao=0):
+        chave, indice = self.localizar(posicao)
+        if chave is None:
+            return padrao
+        dados = self.ladrilhos.get(chave)
+        return dados[indice] if dados is not None else 0
+
+    def __getitem__(self, posicao):
+        return self.get(posicao)
+
+    def __setitem__(self, posicao, valor):
+        dados, indice = self.ladrilho_escrita(posicao)
+        dados[indice] = valor
+
+
+class ConjuntoPosicoesLadrilhos(GradeMemoriaLadrilhos):
+    """ConjuntoPosicoes esparso: um mapa de bits por ladrilho"""
+
+    __slots__ = ('quantidade',)
+
+    def __init__(self, linhas, colunas, tamanho_ladrilho=LabirintoLadrilhos.TAMANHO_PADRAO):
+        super().__init__(linhas, colunas, tamanho_ladrilho)
+        self.quantidade = 0
+
+    def novo_ladrilho(self):
+        return bytearray((self.tamanho * self.tamanho + 7) // 8)
+
+    def add(self, posicao):
+        bits, indice = self.ladrilho_escrita(posicao)
+        mascara = 1 << (indice & 7)
+        if not bits[indice >> 3] & mascara:
+            bits[indice >> 3] |= mascara
+            self.quantidade += 1
+
+    def discard(self, posicao):
+        chave, indice = self.localizar(posicao)
+        bits = self.ladrilhos.get(chave)
+        if bits is not None and bits[indice >> 3] & (1 << (indice & 7)):
+            bits[indice >> 3] &= ~(1 << (indice & 7)) & 0xFF
+            self.quantidade -= 1
+
+    def __contains__(self, posicao):
+        chave, indice = self.localizar(posicao)
+        bits = self.ladrilhos.get(chave)
+        return bits is not None and bool(bits[indice >> 3] & (1 << (indice & 7)))
+
+    def __len__(self):
+        return self.quantidade
+
+
+# Versão esparsa de cada memória, usada com o AmbienteLadrilhos
+MEMORIAS_LADRILHOS = {
+    MapaConhecido: MapaConhecidoLadrilhos,
+    ContadorVisitas: ContadorVisitasLadrilhos,
+    ConjuntoPosicoes: ConjuntoPosicoesLadrilhos,
+}
+
+
+def criar_memoria(classe, ambiente):
+    """Memória do agente para o labirinto do ambiente: densa, ou esparsa por ladrilhos em AmbienteLadrilhos"""
+    tamanho_ladrilho = getattr(ambiente, 'tamanho_ladrilho', None)
+    if tamanho_ladrilho:
+        return MEMORIAS_LADRILHOS[classe](ambiente.linhas, ambiente.colunas, tamanho_ladrilho)
+    return classe(ambiente.linhas, ambiente.colunas)
+
+
+# ÍNDICE ESPACIAL DAS COMIDAS CONHECIDAS
+class IndiceComida:
+    """Conjunto de posições de comida indexado por blocos da grade.
+
+    Tem a interface de um set (add, remove, discard, in, len, iteração), com
+    inserção e remoção O(1), e responde às consultas de comida mais próxima
+    examinando só os blocos em anéis ao redor da posição consultada.
+    """
+
+    def __init__(self, tamanho_bloco=16):
+        self.tamanho_bloco = tamanho_bloco
+        self.blocos = {}  # (linha // tamanho, coluna // tamanho): set de posições
+        self.quantidade = 0
+        self.versao = 0  # Incrementada a cada inserção/remoção efetiva
+
+    def bloco(self, posicao):
+        return (posicao[0] // self.tamanho_bloco, posicao[1] // self.tamanho_bloco)
+
+    def add(self, posicao):
+        posicoes = self.blocos.setdefault(self.bloco(posicao), set())
+        if posicao not in posicoes:
+            posicoes.add(posicao)
+            self.quantidade += 1
+            self.versao += 1
+
+    def discard(self, posicao):
+        chave = self.bloco(posicao)
+        posicoes = self.blocos.get(chave)
+        if posicoes and posicao in posicoes:
+            posicoes.remove(posicao)
+            if not posicoes:
+                del self.blocos[chave]
+            self.quantidade -= 1
+            self.versao += 1
+
+    def remove(self, posicao):
+        if posicao not in self:
+            raise KeyError(posicao)
+        self.discard(posicao)
+
+    def __contains__(self, posicao):
+        posicoes = self.blocos.get(self.bloco(posicao))
+        return posicoes is not None and posicao in posicoes
+
+    def __len__(self):
+        return self.quantidade
+
+    def __iter__(self):
+        for posicoes in self.blocos.values():
+            yield from posicoes
+
+    def mais_proximas(self, posicao):
+        """Gera (distância de Manhattan, posição) em ordem crescente de distância.
+
+        Percorre anéis de blocos ao redor da posição: depois do anel r, toda
+        comida a distância <= r * tamanho_bloco já foi encontrada e pode sair.
+        """
+        linha_bloco, coluna_bloco = self.bloco(posicao)
+        candidatos = []
+        encontradas = 0
+        anel = 0
+        while encontradas < self.quantidade or candidatos:
+            if encontradas < self.quantidade:
+                for chave in self.blocos_do_anel(linha_bloco, coluna_bloco, anel):
+                    for comida in self.blocos.get(chave, ()):
+                        distancia = abs(comida[0] - posicao[0]) + abs(comida[1] - posicao[1])
+                        heapq.heappush(candidatos, (distancia, comida))
+                        encontradas += 1
+                limite = anel * self.tamanho_bloco
+            else:
+                limite = float('inf')  # Todas encontradas: libera o resto em ordem
+
+            while candidatos and candidatos[0][0] <= limite:
+                yield heapq.heappop(candidatos)
+            anel += 1
+
+    def blocos_do_anel(self, linha_bloco, coluna_bloco, anel):
+        """Chaves dos blocos à distância de Chebyshev exatamente igual a anel"""
+        if anel == 0:
+            yield (linha_bloco, coluna_bloco)
+            return
+        for coluna in range(coluna_bloco - anel, coluna_bloco + anel + 1):
+            yield (linha_bloco - anel, coluna)
+            yield (linha_bloco + anel, coluna)
+        for linha in range(linha_bloco - anel + 1, linha_bloco + anel):
+            yield (linha, coluna_bloco - anel)
+            yield (linha, coluna_bloco + anel)
+
+
+# PERFILADOR DO LOOP DO AGENTE (ativado com --perfil)
+class Perfilador:
+    """Tempo acumulado, chamadas e histograma de latência de cada fase do loop do agente.
+
+    As fases são delimitadas por marcações: marcar(fase) atribui à fase o tempo desde
+    a marcação anterior. Sem perfilador (None no agente) nada é medido.
+    """
+
+    __slots__ = ('fases', 'ultimo', 'inicio', 'fim')
+
+    BALDES = 64  # Histograma em potências de 2 de nanossegundos
+
+    def __init__(self):
+        self.fases = {}  # fase: [tempo total (ns), chamadas, máximo (ns), histograma]
+        self.ultimo = 0
+        self.inicio = None
+        self.fim = None
+
+    def iniciar(self):
+        """Começa a contar a partir de agora (início da execução ou de uma iteração)"""
+        self.ultimo = time.perf_counter_ns()
+        if self.inicio is None:
+            self.inicio = self.ultimo
+
+    def marcar(self, fase):
+        """Atribui à fase o tempo desde a marcação anterior"""
+        agora = time.perf_counter_ns()
+        self.adicionar(fase, agora - self.ultimo)
+        self.ultimo = agora
+
+    def medir(self, fase, funcao, *argumentos):
+        """Chama funcao medindo-a como fase própria (descontada da fase que a envolve)"""
+        inicio = time.perf_counter_ns()
+        resultado = funcao(*argumentos)
+        duracao = time.perf_counter_ns() - inicio
+        self.adicionar(fase, duracao)
+        self.ultimo += duracao
+        return resultado
+
+    def adicionar(self, fase, duracao):
+        """Registra uma medição de duracao nanossegundos na fase"""
+        dados = self.fases.get(fase)
+        if dados is None:
+            dados = self.fases[fase] = [0, 0, 0, [0] * self.BALDES]
+        dados[0] += duracao
+        dados[1] += 1
+        if duracao > dados[2]:
+            dados[2] = duracao
+        dados[3][min(duracao.bit_length(), self.BALDES - 1)] += 1
+
+    def terminar(self):
+        """Marca o fim da execução medida"""
+        self.fim = time.perf_counter_ns()
+
+    @staticmethod
+    def percentil(histograma, chamadas, maximo, fracao):
+        """Limite superior (ns) do balde do histograma que contém o percentil"""
+        alvo = fracao * chamadas
+        acumulado = 0
+        for balde, quantidade in enumerate(histograma):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return min(1 << balde, maximo)
+        return 0
+
+    @staticmethod
+    def pico_memoria_kib():
+        """Pico de memória residente do processo em KiB (None se indisponível)"""
+        if resource is None:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico // 1024 if sys.platform == 'darwin' else pico  # macOS informa em bytes
+
+    def resumo(self):
+        """Dicionário (serializável em JSON) com as estatísticas de cada fase"""
+        fim = self.fim if self.fim is not None else time.perf_counter_ns()
+        total = fim - self.inicio if self.inicio is not None else 0
+        fases = {}
+        for fase, (tempo, chamadas, maximo, histograma) in self.fases.items():
+            fases[fase] = {
+                'tempo_s': tempo / 1e9,
+                'fracao': tempo / total if total else 0.0,
+                'chamadas': chamadas,
+                'media_us': tempo / chamadas / 1e3,
+                'p50_us': self.percentil(histograma, chamadas, maximo, 0.50) / 1e3,
+                'p99_us': self.percentil(histograma, chamadas, maximo, 0.99) / 1e3,
+                'maximo_us': maximo / 1e3,
+                'histograma_ns': {str(1 << balde): quantidade
+                                  for balde, quantidade in enumerate(histograma) if quantidade},
+            }
+        return {'tempo_total_s': total / 1e9, 'pico_memoria_kib': self.pico_memoria_kib(), 'fases': fases}
+
+    def linhas_relatorio(self):
+        """Linhas de texto da tabela de fases (percentis aproximados pelo histograma)"""
+        return self.formatar_resumo(self.resumo())
+
+    @staticmethod
+    def formatar_resumo(resumo):
+        """Linhas de texto da tabela de fases a partir de um resumo()"""
+        linhas = [f"{'fase':<27}{'total (ms)':>11}{'%':>7}{'chamadas':>10}"
+                  f"{'média (µs)':>12}{'p50 (µs)':>10}{'p99 (µs)':>10}{'máx (µs)':>11}"]
+        for fase, dados in sorted(resumo['fases'].items(), key=lambda item: -item[1]['tempo_s']):
+            linhas.append(f"{fase:<27}{dados['tempo_s'] * 1e3:>11.2f}{dados['fracao'] * 100:>6.1f}%"
+                          f"{dados['chamadas']:>10}{dados['media_us']:>12.2f}{dados['p50_us']:>10.2f}"
+                          f"{dados['p99_us']:>10.2f}{dados['maximo_us']:>11.2f}")
+        linhas.append(f"Tempo total medido: {resumo['tempo_total_s'] * 1e3:.2f} ms")
+        if resumo['pico_memoria_kib'] is not None:
+            linhas.append(f"Pico de memória (RSS): {resumo['pico_memoria_kib'] / 1024:.1f} MiB")
+        return linhas
+
+    def salvar(self, nome_arquivo):
+        """Grava o resumo em JSON"""
+        with open(nome_arquivo, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.resumo(), arquivo, indent=2, ensure_ascii=False)
+
+
+# REGISTRO ESTRUTURADO DE EVENTOS DO AGENTE
+# Níveis de detalhe: cada saída recebe os eventos até o seu nível
+NIVEIS_EVENTO = {'resumo': 0, 'eventos': 1, 'passos': 2}
+NIVEL_DO_EVENTO = {
+    'resultado': 0, 'perfil': 0, 'interrupcao': 0,
+    'inicio': 1, 'comida': 1, 'saida_encontrada': 1, 'saida_detectada': 1, 'bloqueado': 1,
+    'ciclo': 1, 'limite': 1,
+    'tentativa': 2, 'estado': 2, 'rumo_saida': 2,
+}
+
+
+class RegistroEventos:
+    """Distribui os eventos do agente para as saídas (JSON Lines, texto), cada uma com seu nível"""
+
+    __slots__ = ('saidas', 'nivel')
+
+    def __init__(self):
+        self.saidas = []
+        self.nivel = -1  # Maior nível entre as saídas (-1 = nenhuma: eventos são descartados sem custo)
+
+    def adicionar(self, saida):
+        """Acrescenta uma saída de eventos"""
+        self.saidas.append(saida)
+        self.nivel = max(self.nivel, saida.nivel)
+
+    def emitir(self, evento, nivel):
+        """Entrega o evento às saídas cujo nível o inclui"""
+        for saida in self.saidas:
+            if nivel <= saida.nivel:
+                saida.escrever(evento, nivel)
+
+    def descarregar(self):
+        """Esvazia os buffers de todas as saídas"""
+        for saida in self.saidas:
+            saida.descarregar()
+
+    def fechar(self):
+        """Descarrega e fecha todas as saídas"""
+        for saida in self.saidas:
+            saida.fechar()
+
+
+class SaidaEventosJsonl:
+    """Grava os eventos em JSON Lines, em lotes e com buffer grande.
+
+    No modo assíncrono os lotes são serializados e gravados por uma thread separada.
+    """
+
+    TAMANHO_LOTE = 1024
+
+    def __init__(self, nome_arquivo, nivel='passos', assincrono=False, retomar_em=None):
+        self.nivel = NIVEIS_EVENTO[nivel]
+        if retomar_em is None:
+            self.arquivo = open(nome_arquivo, 'w', encoding='utf-8', buffering=1 << 20)
+        else:
+            # Retomada de checkpoint: descarta os eventos gravados depois dele e continua no fim
+            os.truncate(nome_arquivo, retomar_em)
+            self.arquivo = open(nome_arquivo, 'a', encoding='utf-8', buffering=1 << 20)
+        self.lote = []
+        self.fila = None
+        self.thread_gravacao = None
+        if assincrono:
+            self.fila = queue.Queue(maxsize=64)
+            self.thread_gravacao = threading.Thread(target=self.processar_fila, daemon=True)
+            self.thread_gravacao.start()
+
+    def escrever(self, evento, nivel):
+        """Acumula o evento no lote atual"""
+        self.lote.append(evento)
+        if len(self.lote) >= self.TAMANHO_LOTE:
+            self.enviar_lote()
+
+    def enviar_lote(self):
+        """Grava o lote (ou o entrega à thread de gravação)"""
+        lote, self.lote = self.lote, []
+        if self.fila is not None:
+            self.fila.put(lote)
+        else:
+            self.gravar_lote(lote)
+
+    def gravar_lote(self, lote):
+        """Serializa e escreve um lote de eventos"""
+        self.arquivo.write(''.join(json.dumps(evento, ensure_ascii=False) + '\n' for evento in lote))
+
+    def processar_fila(self):
+        """Thread de gravação: grava os lotes da fila até receber None"""
+        while True:
+            lote = self.fila.get()
+            if lote is None:
+                break
+            self.gravar_lote(lote)
+            self.fila.task_done()
+
+    def descarregar(self):
+        """Envia o lote pendente"""
+        if self.lote:
+            self.enviar_lote()
+
+    def ponto_retomada(self, completo=False, continuar=True):
+        """Checkpoint: grava todos os eventos emitidos até aqui; retorna o tamanho do arquivo"""
+        self.descarregar()
+        if self.fila is not None:
+            self.fila.join()
+        self.arquivo.flush()
+        return self.arquivo.tell()
+
+    def fechar(self):
+        """Grava tudo o que falta, espera a thread e fecha o arquivo"""
+        if self.arquivo.closed:
+            return
+        self.descarregar()
+        if self.thread_gravacao is not None:
+            self.fila.put(None)
+            self.thread_gravacao.join()
+            self.thread_gravacao = None
+        self.arquivo.close()
+
+
+class SaidaEventosTexto:
+    """Formata os eventos como as mensagens de acompanhamento para leitura humana.
+
+    Mensagens de passo vão pelo renderizador de terminal (na ordem dos desenhos),
+    quando houver; o resumo final vai direto para a saída padrão. A saída padrão
+    é descarregada só ao final (e a cada desenho do labirinto).
+    """
+
+    FORMATOS = {
+        'inicio': "Agente iniciou exploração!\nPasso 0 (inicial):",
+        'tentativa': "Iteração {iteracao} — Tentativa de mover: {direcao} (Passos efetivos: {passos})",
+        'saida_encontrada': "SAÍDA ENCONTRADA e memorizada na posição: {saida}!",
+        'saida_detectada': "SAÍDA DETECTADA pelo sensor na posição: {saida}!",
+        'comida': "Comida coletada! Total: {comida_coletada}",
+        'bloqueado': "Movimento bloqueado (parede/limite).",
+        'estado': "-- Estado após iteração {iteracao} (passos efetivos: {passos}) --",
+        'rumo_saida': "Toda comida coletada! Dirigindo-se à saída memorizada...",
+        'ciclo': "Ciclo detectado na posição {posicao}: recuperação {recuperacao}/{limite}, {estrategia}",
+        'interrupcao': "{diagnostico}",
+        'limite': "Número máximo de iterações atingido! Interrompendo.",
+    }
+
+    def __init__(self, nivel='passos', renderizador=None, saida=None):
+        self.nivel = NIVEIS_EVENTO[nivel]
+        self.renderizador = renderizador
+        self.saida = saida or sys.stdout
+
+    def formatar(self, evento):
+        """Texto do evento (pode ter várias linhas)"""
+        tipo = evento['tipo']
+        if tipo == 'resultado':
+            return self.formatar_resultado(evento)
+        if tipo == 'perfil':
+            return '\n'.join(["\n=== PERFIL POR FASE ==="] + Perfilador.formatar_resumo(evento['perfil']))
+        return self.FORMATOS[tipo].format(**evento)
+
+    @staticmethod
+    def formatar_resultado(evento):
+        """Bloco de resultados finais e pontuação"""
+        linhas = [
+            "\n=== RESULTADOS FINAIS ===",
+            f"Passos dados: {evento['passos']}",
+            f"Comida coletada: {evento['comida_coletada']}",
+            f"Comida esperada: {evento['comida_esperada']}",
+        ]
+        if evento['saida'] is not None:
+            linhas.append(f"Saída memorizada na posição: {evento['saida']}")
+        else:
+            linhas.append("Saída não foi encontrada durante a exploração")
+
+        linhas += [
+            "\n=== PONTUAÇÃO ===",
+            f"Pontos por comida (10 por comida): {evento['pontos_comida']}",
+            f"Penalidade por passos (-1 por passo): -{evento['penalidade_passos']}",
+            f"PONTUAÇÃO TOTAL: {evento['pontuacao']}",
+        ]
+        if evento['situacao'] == 'sucesso':
+            linhas.append(" SUCESSO: Toda comida coletada e chegou na saída!")
+        elif evento['situacao'] == 'parcial':
+            linhas.append(" Sucesso parcial: Toda comida coletada mas não chegou na saída")
+        else:
+            linhas.append(f" Missão incompleta: {evento['comida_restante']} comida restante")
+            if evento['diagnostico']:
+                linhas.append(f" Motivo da interrupção: {evento['diagnostico']}")
+        return '\n'.join(linhas)
+
+    def escrever(self, evento, nivel):
+        """Escreve o evento formatado"""
+        texto = self.formatar(evento)
+        if nivel > NIVEIS_EVENTO['resumo'] and self.renderizador is not None:
+            self.renderizador.mensagem(texto)  # Mantém a ordem com os desenhos do labirinto
+        else:
+            self.saida.write(texto + '\n')
+
+    def descarregar(self):
+        """Descarrega a saída padrão"""
+        self.saida.flush()
+
+    def fechar(self):
+        self.descarregar()
+
 
 # DEFINIÇÃO DO AGENTE (modificada para incluir memória da saída)
 class Agente:
-    def __init__(self, ambiente, comida_esperada):
+    __slots__ = (
+        'ambiente', 'comida_esperada', 'passos', 'comida_coletada', 'posicoes_visitadas', 'direcoes',
+        'modo_detalhado', 'silencioso', 'mensagens_passo',
+        'mapa_conhecido', 'contador_visitas', 'locais_comida', 'posicoes_exploradas',
+        'posicao_saida', 'saida_conhecida',
+        'caminho_planejado', 'indice_caminho', 'alvo_planejado', 'celulas_caminho',
+        'alvo_comida', 'versao_comida_alvo', 'explorar_fronteira', 'fronteira', 'alvo_fronteira',
+        'iteracoes', 'trajetoria', 'perfilador', 'rng',
+        'limite_iteracoes', 'detectar_ciclos', 'marco_progresso', 'estados_sem_progresso',
+        'recuperacoes', 'passos_recuperacao', 'diagnostico', 'eventos', 'checkpoint',
+    )
+
+    LIMITE_RECUPERACOES = 3  # Ciclos seguidos (sem progresso entre eles) antes de desistir
+    PASSOS_RECUPERACAO = 64  # Passos aleatórios da recuperação sem fronteira (dobra a cada nova)
+
+    def __init__(self, ambiente, comida_esperada, semente=None):
         self.ambiente = ambiente
         self.comida_esperada = comida_esperada
         self.passos = 0                # Contador de movimentos
         self.comida_coletada = 0
-        self.posicoes_visitadas = set()
+        self.posicoes_visitadas = criar_memoria(ConjuntoPosicoes, ambiente)
         self.direcoes = ['N', 'L', 'S', 'O']  # Norte, Leste, Sul, Oeste
-        self.modo_detalhado = True  # Controla nível de detalhes e pausas pra melhor impressão no console
+        self.modo_detalhado = True  # Nível de detalhes (o ritmo de exibição fica no RenderizadorTerminal, não no loop)
+        self.silencioso = False  # Execução headless: sem mensagens, sem impressão do labirinto e sem pausas
+        self.mensagens_passo = True  # Mensagens de cada iteração (desligadas com o renderizador diferencial)
 
         # Sistema de memória
-        self.mapa_conhecido = {}  # (linha, coluna): 'X', '_', 'o', 'S'
-        self.contador_visitas = {}  # (linha, coluna): número de vezes visitado
-        self.locais_comida = set()  # Posições conhecidas de comida
-        self.posicoes_exploradas = set()  # Posições exploradas
+        self.mapa_conhecido = criar_memoria(MapaConhecido, ambiente)  # (linha, coluna): 'X', '_', 'o', 'S'
+        self.contador_visitas = criar_memoria(ContadorVisitas, ambiente)  # (linha, coluna): número de vezes visitado
+        self.locais_comida = IndiceComida()  # Posições conhecidas de comida (índice espacial)
+        self.posicoes_exploradas = criar_memoria(ConjuntoPosicoes, ambiente)  # Posições exploradas
         
         # NOVA FUNCIONALIDADE: Memória da saída
         self.posicao_saida = None  # Armazena posição da saída quando encontrada
         self.saida_conhecida = False  # Flag indicando se a saída foi encontrada
 
-        # Contador de iterações
+        # Planejamento de caminho (A*) sobre o mapa conhecido, com cache do último caminho
+        self.caminho_planejado = None  # Lista de posições da posição de partida até o alvo
+        self.indice_caminho = 0  # Índice da posição atual do agente no caminho planejado
+        self.alvo_planejado = None
+        self.celulas_caminho = set()  # Células do caminho (para invalidar o cache)
+        self.alvo_comida = None  # Comida escolhida como alvo
+        self.versao_comida_alvo = -1  # Versão de locais_comida quando o alvo foi escolhido
+
+        # Exploração por fronteira: células conhecidas abertas vizinhas de células desconhecidas
+        self.explorar_fronteira = True
+        self.fronteira = set()
+        self.alvo_fronteira = None
+
+        # Contador de iterações e orçamento (proporcional ao tamanho do labirinto)
         self.iteracoes = 0
+        self.limite_iteracoes = limite_iteracoes_padrao(ambiente.linhas, ambiente.colunas)
+
+        # Detecção de ciclos: estados (posição, direção, faixa de visitas) vistos desde o
+        # último progresso (célula nova conhecida, comida coletada ou saída encontrada)
+        self.detectar_ciclos = True
+        self.marco_progresso = None
+        self.estados_sem_progresso = set()
+        self.recuperacoes = 0
+        self.passos_recuperacao = 0
+        self.diagnostico = None  # Motivo da interrupção antecipada, se houver
+
+        # Gerador do desempate aleatório (mesma semente = mesma execução)
+        self.rng = random.Random(semente)
+
+        # Log binário de trajetória (RegistroTrajetoria), opcional
+        self.trajetoria = None
+
+        # Medição de tempo por fase do loop (Perfilador), opcional
+        self.perfilador = None
+
+        # Fluxo de eventos (JSON Lines e/ou texto); a saída de texto é acrescentada em executar()
+        self.eventos = RegistroEventos()
+
+        # Checkpoints periódicos do estado (CheckpointAgente, de checkpoint_agente.py), opcional
+        self.checkpoint = None
 
     def executar(self):
-        """Loop principal de execução do agente (imprime passo-a-passo desde o início)"""
-        print("Agente iniciou exploração!", flush=True)
-        print("Passo 0 (inicial):", flush=True)
-        
-        step_info = f"Inicio - Comida: {self.comida_coletada}/{self.comida_esperada}"
-        self.ambiente.imprimir_labirinto(step_info)
+        """Loop principal de execução do agente (imprime passo-a-passo desde o início).
+
+        Restaurado de um checkpoint, continua da iteração seguinte à dele, sem repetir o início.
+        """
+        retomada = self.iteracoes > 0
+        if not self.silencioso:
+            # Texto para leitura humana: só o resumo quando as mensagens de passo estão desligadas
+            nivel_texto = 'passos' if self.mensagens_passo else 'resumo'
+            self.eventos.adicionar(SaidaEventosTexto(nivel_texto, getattr(self.ambiente, 'renderizador', None)))
+        if not retomada:
+            self.evento('inicio')
+        perfilador = self.perfilador
+        if perfilador is not None:
+            perfilador.iniciar()
+
+        if not self.silencioso and not retomada:
+            step_info = f"Inicio - Comida: {self.comida_coletada}/{self.comida_esperada}"
+            self.ambiente.imprimir_labirinto(step_info)
+            if perfilador is not None:
+                perfilador.marcar('imprimir_labirinto')
 
         # Loop Principal do agente
         while not (self.ambiente.toda_comida_coletada() and self.ambiente.esta_na_saida()):
             self.iteracoes += 1
+            if perfilador is not None:
+                perfilador.iniciar()
 
             sensor = self.ambiente.obter_sensor()
+            if perfilador is not None:
+                perfilador.marcar('obter_sensor')
 
             # Atualiza mapa interno com dados do sensor
             self.atualizar_memoria(sensor)
+            if perfilador is not None:
+                perfilador.marcar('atualizar_memoria')
 
             # Estratégia: tentar mover em direção à comida ou áreas não exploradas
             proxima_direcao = self.decidir_proximo_movimento(sensor)
+            if perfilador is not None:
+                perfilador.marcar('decidir_proximo_movimento')
             self.ambiente.definir_direcao(proxima_direcao)
 
             # Mostra a tentativa antes de executar o movimento (ajuda a acompanhar passo-a-passo)
-            print(f"Iteração {self.iteracoes} — Tentativa de mover: {proxima_direcao} (Passos efetivos: {self.passos})", flush=True)
+            self.evento('tentativa')
 
             moveu = self.ambiente.mover()
+            if perfilador is not None:
+                perfilador.marcar('mover')
+            if self.trajetoria is not None:
+                self.trajetoria.registrar(proxima_direcao, moveu)
 
             if moveu:
                 self.passos += 1
@@ -304,44 +2568,94 @@ class Agente:
                 if self.ambiente.esta_na_saida() and not self.saida_conhecida:
                     self.posicao_saida = posicao_atual
                     self.saida_conhecida = True
-                    print(f"SAÍDA ENCONTRADA e memorizada na posição: {posicao_atual}!", flush=True)
+                    self.evento('saida_encontrada', saida=posicao_atual)
 
                 # Verifica se comida foi coletada
                 comida_restante_atual = self.ambiente.obter_comida_restante()
                 comida_coletada_atual = self.comida_esperada - comida_restante_atual
                 if comida_coletada_atual > self.comida_coletada:
                     self.comida_coletada = comida_coletada_atual
-                    print(f"Comida coletada! Total: {self.comida_coletada}", flush=True)
+                    self.evento('comida')
                     # Remove comida da memória já que foi coletada
                     if posicao_atual in self.locais_comida:
                         self.locais_comida.remove(posicao_atual)
 
             else:
-                print("Movimento bloqueado (parede/limite).", flush=True)
-
-            # Imprime o labirinto a cada iteração (assim você verá passo a passo)
-            print(f"-- Estado após iteração {self.iteracoes} (passos efetivos: {self.passos}) --", flush=True)
-            
-            # Cria informação para o frame do vídeo
-            saida_info = " | Saída: Memorizada" if self.saida_conhecida else " | Saída: Procurando"
-            step_info = f"Iter: {self.iteracoes} | Passos: {self.passos} | Comida: {self.comida_coletada}/{self.comida_esperada}{saida_info}"
-            self.ambiente.imprimir_labirinto(step_info)
-
-            # Pequena pausa quando em modo detalhado, para facilitar leitura humana
-            if self.modo_detalhado:
-                time.sleep(0.05)
-
-            # Previne loops infinitos: limite de iterações
-            if self.iteracoes > 20000:
-                print("Número máximo de iterações atingido! Interrompendo.", flush=True)
+                self.evento('bloqueado')
+            if perfilador is not None:
+                perfilador.marcar('registros')
+
+            if not self.silencioso:
+                # Imprime o labirinto a cada iteração (assim você verá passo a passo)
+                self.evento('estado')
+
+                # Cria informação para o frame do vídeo
+                saida_info = " | Saída: Memorizada" if self.saida_conhecida else " | Saída: Procurando"
+                step_info = f"Iter: {self.iteracoes} | Passos: {self.passos} | Comida: {self.comida_coletada}/{self.comida_esperada}{saida_info}"
+                self.ambiente.imprimir_labirinto(step_info)
+                if perfilador is not None:
+                    perfilador.marcar('imprimir_labirinto')
+
+            # Previne loops infinitos: ciclos sem progresso e limite de iterações
+            if self.detectar_ciclos and self.verificar_ciclo():
+                self.evento('interrupcao', diagnostico=self.diagnostico)
+                break
+            if self.iteracoes > self.limite_iteracoes:
+                self.diagnostico = f"Limite de {self.limite_iteracoes} iterações atingido"
+                self.evento('limite', limite_iteracoes=self.limite_iteracoes)
                 break
 
+            # Checkpoint no fim da iteração: periódico ou pedido pelo Ctrl-C (que também interrompe)
+            if self.checkpoint is not None and self.iteracoes >= self.checkpoint.proxima_iteracao:
+                self.checkpoint.salvar(self)
+                if perfilador is not None:
+                    perfilador.marcar('checkpoint')
+                if self.checkpoint.interromper:
+                    self.diagnostico = (f"Interrompido na iteração {self.iteracoes}; "
+                                        f"checkpoint salvo em {self.checkpoint.nome_arquivo}")
+                    self.evento('interrupcao', diagnostico=self.diagnostico)
+                    break
+
+        if not self.silencioso:
+            if perfilador is not None:
+                perfilador.iniciar()
+                self.ambiente.finalizar_exibicao()
+                perfilador.marcar('imprimir_labirinto')
+            else:
+                self.ambiente.finalizar_exibicao()
+        if perfilador is not None:
+            perfilador.terminar()
         self.imprimir_resultados_finais()
 
+    def evento(self, tipo, **campos):
+        """Emite um evento com o estado atual (iteração, posição, direção, passos, comida).
+
+        Sem nenhuma saída interessada no nível do evento, retorna sem montá-lo.
+        """
+        nivel = NIVEL_DO_EVENTO[tipo]
+        if nivel > self.eventos.nivel:
+            return
+        evento = {
+            'iteracao': self.iteracoes,
+            'tipo': tipo,
+            'posicao': self.obter_posicao_atual(),
+            'direcao': self.ambiente.direcao_agente,
+            'passos': self.passos,
+            'comida_coletada': self.comida_coletada,
+            'comida_esperada': self.comida_esperada,
+        }
+        evento.update(campos)
+        self.eventos.emitir(evento, nivel)
+
     def atualizar_memoria(self, sensor):
         """Atualiza mapa interno baseado nos dados do sensor"""
         posicao_atual = self.obter_posicao_atual()
 
+        # A célula de partida nunca aparece como vizinha: registra como corredor
+        if posicao_atual not in self.mapa_conhecido:
+            self.mapa_conhecido[posicao_atual] = '_'
+            self.atualizar_fronteira_ao_redor(posicao_atual)
+
         # Atualiza conhecimento da área circundante
         for i in range(3):
             for j in range(3):
@@ -357,7 +2671,12 @@ class Agente:
                 conteudo_celula = sensor[i][j]
 
                 # Atualiza nosso mapa
-                self.mapa_conhecido[pos] = conteudo_celula
+                if self.mapa_conhecido.definir(pos, conteudo_celula):
+                    self.atualizar_fronteira_ao_redor(pos)
+
+                # Caminho planejado passa por uma célula que se revelou parede: replaneja
+                if conteudo_celula == 'X' and pos in self.celulas_caminho:
+                    self.caminho_planejado = None
 
                 # Rastreia locais de comida
                 if conteudo_celula == 'o':
@@ -370,7 +2689,65 @@ class Agente:
                 if conteudo_celula == 'S' and not self.saida_conhecida:
                     self.posicao_saida = pos
                     self.saida_conhecida = True
-                    print(f"SAÍDA DETECTADA pelo sensor na posição: {pos}!", flush=True)
+                    self.evento('saida_detectada', saida=pos)
+
+    def atualizar_fronteira_ao_redor(self, posicao):
+        """Reavalia na fronteira a célula recém-conhecida e suas 4 vizinhas"""
+        for delta_linha, delta_coluna in ((0, 0), *DESLOCAMENTOS.values()):
+            celula = (posicao[0] + delta_linha, posicao[1] + delta_coluna)
+            conteudo = self.mapa_conhecido.get(celula)
+            if conteudo is not None and conteudo != 'X' and any(
+                    (celula[0] + dl, celula[1] + dc) not in self.mapa_conhecido for dl, dc in DESLOCAMENTOS.values()):
+                self.fronteira.add(celula)
+            else:
+                self.fronteira.discard(celula)
+
+    def verificar_ciclo(self):
+        """Detecta o agente repetindo um estado sem progresso; retorna True para interromper.
+
+        O estado é a posição, a direção e a faixa (potência de 2) de visitas da célula;
+        o mapa conhecido e as comidas restantes não mudam enquanto não há progresso.
+        Cada ciclo aciona uma recuperação: seguir para a fronteira mais próxima ou, sem
+        fronteira, passos aleatórios cada vez mais longos. Após LIMITE_RECUPERACOES ciclos
+        seguidos, desiste com um diagnóstico.
+        """
+        marco = (len(self.mapa_conhecido), self.comida_coletada, self.saida_conhecida)
+        if marco != self.marco_progresso:
+            self.marco_progresso = marco
+            self.estados_sem_progresso.clear()
+            self.recuperacoes = 0
+            self.passos_recuperacao = 0
+            return False
+        if self.passos_recuperacao:
+            return False  # Passos aleatórios repetem estados por natureza
+
+        posicao = self.obter_posicao_atual()
+        estado = (posicao, self.ambiente.direcao_agente, self.contador_visitas.get(posicao, 0).bit_length())
+        if estado not in self.estados_sem_progresso:
+            self.estados_sem_progresso.add(estado)
+            return False
+
+        sem_progresso = len(self.estados_sem_progresso)
+        if self.recuperacoes >= self.LIMITE_RECUPERACOES:
+            self.diagnostico = (f"Ciclo detectado na posição {posicao} (direção {estado[1]}) na iteração "
+                                f"{self.iteracoes}: {sem_progresso} estados sem progresso e "
+                                f"{self.recuperacoes} recuperações sem sucesso. Interrompendo.")
+            return True
+
+        # Recuperação: descarta os alvos e caminhos em cache; sem fronteira, anda aleatoriamente
+        self.recuperacoes += 1
+        self.estados_sem_progresso.clear()
+        self.caminho_planejado = None
+        self.alvo_comida = None
+        self.versao_comida_alvo = -1
+        self.alvo_fronteira = None
+        if self.fronteira:
+            estrategia = "seguindo para a fronteira mais próxima"
+        else:
+            self.passos_recuperacao = self.PASSOS_RECUPERACAO << (self.recuperacoes - 1)
+            estrategia = f"{self.passos_recuperacao} passos aleatórios"
+        self.evento('ciclo', recuperacao=self.recuperacoes, limite=self.LIMITE_RECUPERACOES, estrategia=estrategia)
+        return False
 
     def obter_posicao_atual(self):
         """Obtém posição atual do agente do ambiente"""
@@ -395,12 +2772,21 @@ class Agente:
         if direcoes_comida:
             return direcoes_comida[0]  # Vai para primeira comida disponível
 
+        # Recuperação de ciclo: fronteira mais próxima ou passos aleatórios para sair da oscilação
+        if self.passos_recuperacao:
+            self.passos_recuperacao -= 1
+            return self.direcao_aleatoria_valida(sensor) or direcao_atual
+        if self.recuperacoes and self.fronteira:
+            melhor_direcao = self.encontrar_direcao_para_fronteira_mais_proxima(posicao_atual)
+            if melhor_direcao and self.pode_mover_na_direcao(sensor, melhor_direcao):
+                return melhor_direcao
+
         # Prioridade 2: Se toda comida coletada, ir para saída
         if self.ambiente.toda_comida_coletada():
             # FUNCIONALIDADE MELHORADA: Usa saída memorizada se disponível
             if self.saida_conhecida and self.posicao_saida:
-                print("Toda comida coletada! Dirigindo-se à saída memorizada...", flush=True)
-                melhor_direcao = self.encontrar_direcao_para_posicao_alvo(posicao_atual, self.posicao_saida)
+                self.evento('rumo_saida', saida=self.posicao_saida)
+                melhor_direcao = self.encontrar_direcao_por_caminho(posicao_atual, self.posicao_saida)
                 if melhor_direcao and self.pode_mover_na_direcao(sensor, melhor_direcao):
                     return melhor_direcao
             
@@ -424,7 +2810,13 @@ class Agente:
             if melhor_direcao and self.pode_mover_na_direcao(sensor, melhor_direcao):
                 return melhor_direcao
 
-        # Prioridade 4: Explorar áreas não visitadas (evita posições muito visitadas)
+        # Prioridade 4: Explorar a fronteira mais próxima (borda entre o conhecido e o desconhecido)
+        if self.explorar_fronteira and self.fronteira:
+            melhor_direcao = self.encontrar_direcao_para_fronteira_mais_proxima(posicao_atual)
+            if melhor_direcao and self.pode_mover_na_direcao(sensor, melhor_direcao):
+                return melhor_direcao
+
+        # Prioridade 5: Explorar áreas não visitadas (evita posições muito visitadas)
         direcoes_disponiveis = []
         posicoes_direcoes = {
             'N': (posicao_atual[0] - 1, posicao_atual[1]),
@@ -443,11 +2835,15 @@ class Agente:
             direcoes_disponiveis.sort(key=lambda x: x[1])
             return direcoes_disponiveis[0][0]
 
-        # Prioridade 5: Continuar na direção atual se possível (a ideia é garantir que o agente irá percorrer toda a linha antes de descer/subir);
+        # Prioridade 6: Continuar na direção atual se possível (a ideia é garantir que o agente irá percorrer toda a linha antes de descer/subir);
         if self.pode_mover_na_direcao(sensor, direcao_atual):
             return direcao_atual
 
         # Último recurso: direção válida aleatória (afim de garantir uma movimentação)
+        return self.direcao_aleatoria_valida(sensor) or direcao_atual  # Travado, tenta direção atual
+
+    def direcao_aleatoria_valida(self, sensor):
+        """Direção sorteada entre as que não dão em parede (None se não houver)"""
         direcoes_validas = []
         if sensor[0][1] != 'X':
             direcoes_validas.append('N')
@@ -459,20 +2855,154 @@ class Agente:
             direcoes_validas.append('O')
 
         if direcoes_validas:
-            return random.choice(direcoes_validas)
-
-        return direcao_atual  # Travado, tenta direção atual
+            return self.rng.choice(direcoes_validas)
+        return None
 
     def encontrar_direcao_para_comida_mais_proxima(self, posicao_atual):
-        """Encontra direção geral para comida conhecida mais próxima"""
+        """Encontra direção para a comida conhecida mais próxima pelo caminho conhecido"""
         if not self.locais_comida:
             return None
 
-        # Encontra comida mais próxima
-        comida_mais_proxima = min(self.locais_comida,
-                                  key=lambda pos: abs(pos[0] - posicao_atual[0]) + abs(pos[1] - posicao_atual[1]))
+        # Só reescolhe o alvo quando o conjunto de comidas conhecidas muda
+        if self.versao_comida_alvo != self.locais_comida.versao or self.alvo_comida not in self.locais_comida:
+            self.alvo_comida = self.escolher_comida_mais_proxima(posicao_atual)
+            self.versao_comida_alvo = self.locais_comida.versao
+
+        return self.encontrar_direcao_por_caminho(posicao_atual, self.alvo_comida)
+
+    def escolher_comida_mais_proxima(self, posicao_atual, limite_candidatos=8):
+        """Escolhe a comida com menor distância pelo caminho conhecido.
+
+        Examina as candidatas em ordem de distância de Manhattan (que nunca excede a
+        distância pelo caminho) e para assim que nenhuma outra pode ser melhor.
+        Sem caminho conhecido para nenhuma, fica com a mais próxima em linha reta.
+        """
+        mais_proxima = None
+        melhor_caminho = None
+        for examinadas, (distancia, comida) in enumerate(self.locais_comida.mais_proximas(posicao_atual)):
+            if mais_proxima is None:
+                mais_proxima = comida
+            if examinadas >= limite_candidatos or (melhor_caminho and distancia >= len(melhor_caminho) - 1):
+                break
+            caminho = self.planejar_caminho(posicao_atual, comida)
+            if caminho and (melhor_caminho is None or len(caminho) < len(melhor_caminho)):
+                melhor_caminho = caminho
+
+        if melhor_caminho is None:
+            return mais_proxima
+
+        # Aproveita o caminho já calculado como cache do A*
+        self.caminho_planejado = melhor_caminho
+        self.indice_caminho = 0
+        self.alvo_planejado = melhor_caminho[-1]
+        self.celulas_caminho = set(melhor_caminho)
+        return melhor_caminho[-1]
+
+    def encontrar_direcao_para_fronteira_mais_proxima(self, posicao_atual):
+        """Encontra direção para a célula de fronteira mais próxima pelo caminho conhecido"""
+        # Mantém o alvo enquanto ele continuar na fronteira
+        if self.alvo_fronteira not in self.fronteira:
+            caminho = self.caminho_para_fronteira_mais_proxima(posicao_atual)
+            if caminho is None:
+                self.alvo_fronteira = None
+                return None
+
+            # Aproveita o caminho da busca como cache do A*
+            self.alvo_fronteira = caminho[-1]
+            self.caminho_planejado = caminho
+            self.indice_caminho = 0
+            self.alvo_planejado = caminho[-1]
+            self.celulas_caminho = set(caminho)
+
+        return self.encontrar_direcao_por_caminho(posicao_atual, self.alvo_fronteira)
+
+    def caminho_para_fronteira_mais_proxima(self, posicao_atual):
+        """Busca em largura pelo mapa conhecido até a primeira célula de fronteira"""
+        anteriores = {posicao_atual: None}
+        fila = deque([posicao_atual])
+        while fila:
+            posicao = fila.popleft()
+            if posicao in self.fronteira:
+                caminho = []
+                while posicao is not None:
+                    caminho.append(posicao)
+                    posicao = anteriores[posicao]
+                return caminho[::-1]
+
+            for delta_linha, delta_coluna in DESLOCAMENTOS.values():
+                vizinho = (posicao[0] + delta_linha, posicao[1] + delta_coluna)
+                if vizinho not in anteriores and self.mapa_conhecido.get(vizinho, 'X') != 'X':
+                    anteriores[vizinho] = posicao
+                    fila.append(vizinho)
+
+        return None
+
+    def encontrar_direcao_por_caminho(self, posicao_atual, posicao_alvo):
+        """Direção do primeiro passo do menor caminho conhecido até o alvo.
+
+        O caminho calculado pelo A* é reaproveitado nos passos seguintes enquanto o
+        alvo não muda, o agente segue por ele e nenhuma célula dele vira parede.
+        Sem caminho conhecido, usa a direção geral (encontrar_direcao_para_posicao_alvo).
+        """
+        caminho = self.caminho_planejado
+        if caminho and self.alvo_planejado == posicao_alvo:
+            # Avança no caminho se o agente andou para a próxima posição
+            if self.indice_caminho + 1 < len(caminho) and caminho[self.indice_caminho + 1] == posicao_atual:
+                self.indice_caminho += 1
+            if caminho[self.indice_caminho] != posicao_atual:
+                caminho = None
+        else:
+            caminho = None
+
+        if caminho is None:
+            caminho = self.planejar_caminho(posicao_atual, posicao_alvo)
+            self.caminho_planejado = caminho
+            self.indice_caminho = 0
+            self.alvo_planejado = posicao_alvo
+            self.celulas_caminho = set(caminho) if caminho else set()
+            if caminho is None:
+                return self.encontrar_direcao_para_posicao_alvo(posicao_atual, posicao_alvo)
+
+        if self.indice_caminho + 1 >= len(caminho):
+            return None  # Já está no alvo
+
+        return self.encontrar_direcao_para_posicao_alvo(posicao_atual, caminho[self.indice_caminho + 1])
+
+    def planejar_caminho(self, origem, destino):
+        """A* sobre o mapa conhecido (células conhecidas e diferentes de X).
+
+        Retorna a lista de posições de origem até destino, ou None se não houver
+        caminho só por células conhecidas.
+        """
+        if origem == destino:
+            return [origem]
+
+        abertos = [(abs(destino[0] - origem[0]) + abs(destino[1] - origem[1]), 0, origem)]
+        custos = {origem: 0}
+        anteriores = {origem: None}
+
+        while abertos:
+            _, custo, posicao = heapq.heappop(abertos)
+            if posicao == destino:
+                caminho = []
+                while posicao is not None:
+                    caminho.append(posicao)
+                    posicao = anteriores[posicao]
+                return caminho[::-1]
+            if custo > custos[posicao]:
+                continue  # Entrada obsoleta do heap
+
+            for delta_linha, delta_coluna in DESLOCAMENTOS.values():
+                vizinho = (posicao[0] + delta_linha, posicao[1] + delta_coluna)
+                conteudo = self.mapa_conhecido.get(vizinho, 'X') if vizinho != origem else '_'
+                if conteudo == 'X' or custo + 1 >= custos.get(vizinho, float('inf')):
+                    continue
+                custos[vizinho] = custo + 1
+                anteriores[vizinho] = posicao
+                estimativa = abs(destino[0] - vizinho[0]) + abs(destino[1] - vizinho[1])
+                heapq.heappush(abertos, (custo + 1 + estimativa, custo + 1, vizinho))
 
-        return self.encontrar_direcao_para_posicao_alvo(posicao_atual, comida_mais_proxima)
+        return None
 
     def encontrar_direcao_para_posicao_alvo(self, posicao_atual, posicao_alvo):
         """NOVA FUNÇÃO: Encontra direção geral para uma posição alvo específica"""
@@ -502,35 +3032,43 @@ class Agente:
         posicao_atual = self.obter_posicao_atual()
         self.posicoes_visitadas.add(posicao_atual)
 
-    def imprimir_resultados_finais(self):
-        """Imprime resultados finais e pontuação"""
-        print("\n=== RESULTADOS FINAIS ===", flush=True)
-        print(f"Passos dados: {self.passos}", flush=True)
-        print(f"Comida coletada: {self.comida_coletada}", flush=True)
-        print(f"Comida esperada: {self.comida_esperada}", flush=True)
-        
-        # NOVA INFO: Status da saída
-        if self.saida_conhecida:
-            print(f"Saída memorizada na posição: {self.posicao_saida}", flush=True)
-        else:
-            print("Saída não foi encontrada durante a exploração", flush=True)
-
+    def calcular_pontuacao(self):
+        """Calcula (pontos por comida, penalidade por passos, pontuação total)"""
         pontos_comida = self.comida_coletada * 10
         penalidade_passos = self.passos * 1
-        pontuacao_total = pontos_comida - penalidade_passos
+        return pontos_comida, penalidade_passos, pontos_comida - penalidade_passos
+
+    def obter_resultado(self):
+        """Resume a execução em um dicionário (usado pelo benchmark em lote)"""
+        return {
+            'passos': self.passos,
+            'iteracoes': self.iteracoes,
+            'comida_coletada': self.comida_coletada,
+            'comida_esperada': self.comida_esperada,
+            'pontuacao': self.calcular_pontuacao()[2],
+            'saida_conhecida': self.saida_conhecida,
+            'sucesso': self.ambiente.toda_comida_coletada() and self.ambiente.esta_na_saida(),
+            'diagnostico': self.diagnostico,
+        }
 
-        print("\n=== PONTUAÇÃO ===", flush=True)
-        print(f"Pontos por comida (10 por comida): {pontos_comida}", flush=True)
-        print(f"Penalidade por passos (-1 por passo): -{penalidade_passos}", flush=True)
-        print(f"PONTUAÇÃO TOTAL: {pontuacao_total}", flush=True)
+    def imprimir_resultados_finais(self):
+        """Emite os resultados finais e a pontuação (e o perfil por fase, se medido)"""
+        pontos_comida, penalidade_passos, pontuacao_total = self.calcular_pontuacao()
 
         if self.ambiente.toda_comida_coletada() and self.ambiente.esta_na_saida():
-            print(" SUCESSO: Toda comida coletada e chegou na saída!", flush=True)
+            situacao = 'sucesso'
         elif self.ambiente.toda_comida_coletada():
-            print(" Sucesso parcial: Toda comida coletada mas não chegou na saída", flush=True)
+            situacao = 'parcial'
         else:
-            restante = self.ambiente.obter_comida_restante()
-            print(f" Missão incompleta: {restante} comida restante", flush=True)
+            situacao = 'incompleta'
+
+        self.evento('resultado', saida=self.posicao_saida if self.saida_conhecida else None,
+                    pontos_comida=pontos_comida, penalidade_passos=penalidade_passos, pontuacao=pontuacao_total,
+                    situacao=situacao, comida_restante=self.ambiente.obter_comida_restante(),
+                    diagnostico=self.diagnostico)
+        if self.perfilador is not None:
+            self.evento('perfil', perfil=self.perfilador.resumo())
+        self.eventos.descarregar()
 
 
 # Criação de um arquivo de labirinto exemplo
@@ -550,23 +3088,115 @@ XXXXXXSXX"""
         f.write(labirinto_exemplo)
 
 
+def resolucao_video(texto):
+    """Converte 'LARGURAxALTURA' (ex.: 1280x720) em (largura, altura) para o argparse"""
+    try:
+        largura, altura = (int(valor) for valor in texto.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"resolução inválida: '{texto}' (use LARGURAxALTURA)")
+    if largura <= 0 or altura <= 0:
+        raise argparse.ArgumentTypeError(f"resolução inválida: '{texto}'")
+    return largura, altura
+
+
+# Argumentos da linha de comando
+def criar_parser_argumentos():
+    """Cria o parser da linha de comando (mantém os argumentos posicionais originais)"""
+    parser = argparse.ArgumentParser(description="Agente explorador de labirinto")
+    parser.add_argument("arquivo", nargs="?", default="labirinto.txt",
+                        help="arquivo do labirinto (padrão: labirinto.txt)")
+    parser.add_argument("modo", nargs="?", default="",
+                        help="'simples' = modo menos detalhado")
+    parser.add_argument("video", nargs="?", default="",
+                        help="'no-video' = desativa a gravação de vídeo")
+    parser.add_argument("nome_video", nargs="?", default=None,
+                        help="nome do arquivo de vídeo")
+    carregamento = parser.add_mutually_exclusive_group()
+    carregamento.add_argument("--grade", action="store_true",
+                              help="usa a grade NumPy (AmbienteGrade), indicada para labirintos grandes")
+    carregamento.add_argument("--mmap", action="store_true",
+                              help="lê o labirinto direto do arquivo mapeado em memória (AmbienteMapeado)")
+    carregamento.add_argument("--ladrilhos", action="store_true",
+                              help="lê o labirinto em ladrilhos sob demanda, com cache LRU (AmbienteLadrilhos); "
+                                   "automático para arquivos gerados em ladrilhos")
+    parser.add_argument("--cache-ladrilhos", type=int, default=AmbienteLadrilhos.CAPACIDADE_CACHE,
+                        help=f"ladrilhos mantidos em memória com --ladrilhos (padrão: {AmbienteLadrilhos.CAPACIDADE_CACHE})")
+    parser.add_argument("--terminal", choices=("completo", "diff", "silencioso"), default="completo",
+                        help="saída no terminal: labirinto inteiro a cada passo, só as células alteradas "
+                             "(ANSI) ou nada além do resultado final; em ladrilhos, completo vira diff")
+    parser.add_argument("--desenhar-a-cada", type=int, default=1,
+                        help="no modo diff, desenha o terminal a cada N passos (padrão: 1)")
+    parser.add_argument("--fps-terminal", type=float, default=None,
+                        help="no modo diff, limita os desenhos do terminal a K por segundo")
+    parser.add_argument("--passos-por-segundo", type=float, default=None,
+                        help="reproduz no terminal os passos registrados nesse ritmo (padrão: 20 no modo "
+                             "detalhado com a saída num terminal); a simulação nunca espera pela exibição")
+    parser.add_argument("--video-assincrono", action="store_true",
+                        help="desenha e codifica o vídeo em uma thread separada")
+    parser.add_argument("--fila-video", type=int, default=64,
+                        help="tamanho máximo da fila de frames no modo assíncrono (padrão: 64)")
+    parser.add_argument("--descartar-frames", action="store_true",
+                        help="com a fila cheia, descarta frames intermediários em vez de esperar")
+    parser.add_argument("--video-pos-execucao", action="store_true",
+                        help="durante a execução guarda só o estado de cada passo; o vídeo é renderizado "
+                             "ao final, em segmentos paralelos")
+    parser.add_argument("--processos-video", type=int, default=None,
+                        help="processos da renderização pós-execução (padrão: número de CPUs; "
+                             "sem ffmpeg no PATH, sempre um)")
+    parser.add_argument("--video-a-cada", type=int, default=1,
+                        help="na renderização pós-execução, um quadro a cada K passos (padrão: 1)")
+    parser.add_argument("--video-so-eventos", action="store_true",
+                        help="na renderização pós-execução, só os quadros em que uma comida é comida")
+    parser.add_argument("--resolucao-video", type=resolucao_video, default=None, metavar="LARGURAxALTURA",
+                        help="resolução do vídeo da renderização pós-execução (padrão: 40 px por célula)")
+    parser.add_argument("--semente", type=int, default=None,
+                        help="semente do desempate aleatório do agente")
+    parser.add_argument("--trajetoria", default=None,
+                        help="grava o log binário da trajetória (reproduzível com replay.py)")
+    parser.add_argument("--limite-iteracoes", type=int, default=None,
+                        help=f"máximo de iterações (padrão: {ITERACOES_POR_CELULA} por célula, "
+                             f"no mínimo {MINIMO_ITERACOES})")
+    parser.add_argument("--sem-deteccao-ciclos", action="store_true",
+                        help="desliga a detecção de ciclos (só o limite de iterações interrompe)")
+    parser.add_argument("--analise", action="store_true",
+                        help="analisa o labirinto ao carregar (componentes, comida inalcançável, becos, "
+                             "distância à saída), com cache ao lado do arquivo")
+    parser.add_argument("--ignorar-comida-inalcancavel", action="store_true",
+                        help="exclui do objetivo a comida inalcançável a partir da entrada (implica --analise)")
+    parser.add_argument("--eventos", default=None,
+                        help="grava o fluxo de eventos do agente neste arquivo (JSON Lines)")
+    parser.add_argument("--nivel-eventos", choices=tuple(NIVEIS_EVENTO), default="passos",
+                        help="detalhe do arquivo de eventos: só o resumo, eventos relevantes ou cada passo "
+                             "(padrão: passos)")
+    parser.add_argument("--eventos-assincrono", action="store_true",
+                        help="serializa e grava os eventos em uma thread separada")
+    parser.add_argument("--perfil", action="store_true",
+                        help="mede tempo, chamadas e latência de cada fase do loop e o pico de memória")
+    parser.add_argument("--perfil-json", default=None,
+                        help="grava o perfil por fase neste arquivo JSON (implica --perfil)")
+    parser.add_argument("--checkpoint", default=None, metavar="ARQUIVO",
+                        help="grava checkpoints periódicos do estado do agente e do ambiente neste arquivo; "
+                             "Ctrl-C salva um último checkpoint e interrompe")
+    parser.add_argument("--checkpoint-a-cada", type=int, default=ITERACOES_ENTRE_CHECKPOINTS,
+                        help=f"iterações entre checkpoints (padrão: {ITERACOES_ENTRE_CHECKPOINTS})")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma do último checkpoint de --checkpoint, com o mesmo resultado da execução "
+                             "sem interrupção (repita os demais argumentos da execução original)")
+    return parser
+
+
 # Fluxo principal
 def main():
     try:
-        # Verifica se nome do arquivo foi fornecido como argumento
-        nome_arquivo = "labirinto.txt"
-        modo_detalhado = True
-        gravar_video = True  # Novo parâmetro para controlar gravação
-        nome_video = f"maze_execution_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
-
-        if len(sys.argv) > 1:
-            nome_arquivo = sys.argv[1]
-        if len(sys.argv) > 2 and sys.argv[2] == "simples":
-            modo_detalhado = False
-        if len(sys.argv) > 3 and sys.argv[3] == "no-video":
-            gravar_video = False
-        if len(sys.argv) > 4:
-            nome_video = sys.argv[4]
+        parser = criar_parser_argumentos()
+        argumentos = parser.parse_args()
+        if argumentos.resume and not argumentos.checkpoint:
+            parser.error("--resume precisa de --checkpoint ARQUIVO")
+
+        nome_arquivo = argumentos.arquivo
+        modo_detalhado = argumentos.modo != "simples"
+        gravar_video = argumentos.video != "no-video"  # Novo parâmetro para controlar gravação
+        nome_video = argumentos.nome_video or f"maze_execution_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
 
         print(f"Carregando labirinto de: {nome_arquivo}", flush=True)
 
@@ -582,7 +3212,19 @@ def main():
         video_recorder = None
         if gravar_video:
             try:
-                video_recorder = VideoRecorder(nome_video, fps=5.0, cell_size=40)
+                if argumentos.video_pos_execucao:
+                    # Import local: renderizacao_video importa este módulo
+                    from renderizacao_video import GravadorEstados
+                    video_recorder = GravadorEstados(nome_video, fps=5.0, cell_size=40,
+                                                     processos=argumentos.processos_video,
+                                                     a_cada=argumentos.video_a_cada,
+                                                     somente_eventos=argumentos.video_so_eventos,
+                                                     resolucao=argumentos.resolucao_video)
+                else:
+                    video_recorder = VideoRecorder(nome_video, fps=5.0, cell_size=40,
+                                                   assincrono=argumentos.video_assincrono,
+                                                   tamanho_fila=argumentos.fila_video,
+                                                   descartar_frames=argumentos.descartar_frames)
                 print(f"Gravação de vídeo ativada: {nome_video}", flush=True)
             except ImportError:
                 print("OpenCV não encontrado. Gravação de vídeo desabilitada.", flush=True)
@@ -590,22 +3232,125 @@ def main():
                 video_recorder = None
 
         # Cria ambiente
-        ambiente = Ambiente(nome_arquivo, video_recorder)
+        classe_ambiente = Ambiente
+        if argumentos.grade:
+            classe_ambiente = AmbienteGrade
+        elif argumentos.mmap:
+            classe_ambiente = AmbienteMapeado
+        if argumentos.ladrilhos or LabirintoLadrilhos.eh_ladrilhos(nome_arquivo):
+            classe_ambiente = AmbienteLadrilhos
+            if argumentos.terminal == "completo":
+                # O estilo completo leria todos os ladrilhos a cada passo; o diff lê só as células alteradas
+                print("Labirinto em ladrilhos: terminal no modo diff (use --terminal silencioso para nada)", flush=True)
+                argumentos.terminal = "diff"
+        # A simulação roda em velocidade máxima; o ritmo de leitura humana (antes uma pausa
+        # de 0.05s por iteração) é aplicado só na reprodução pelo terminal
+        # (só com a saída num terminal: redirecionada, para um log ou CI, não há quem acompanhe)
+        passos_por_segundo = argumentos.passos_por_segundo
+        if passos_por_segundo is None and modo_detalhado and sys.stdout.isatty():
+            passos_por_segundo = 20.0
+
+        renderizador = None
+        if argumentos.terminal != "completo" or passos_por_segundo:
+            renderizador = RenderizadorTerminal(a_cada=argumentos.desenhar_a_cada,
+                                                fps_maximo=argumentos.fps_terminal,
+                                                silencioso=argumentos.terminal == "silencioso",
+                                                estilo="completo" if argumentos.terminal == "completo" else "diff",
+                                                passos_por_segundo=passos_por_segundo)
+        ambiente = classe_ambiente(nome_arquivo, video_recorder, renderizador)
+        if classe_ambiente is AmbienteLadrilhos:
+            ambiente.capacidade_cache = max(1, argumentos.cache_ladrilhos)
+
+        if argumentos.analise or argumentos.ignorar_comida_inalcancavel:
+            resumo = ambiente.analisar(argumentos.ignorar_comida_inalcancavel).resumo()
+            distancia = resumo['distancia_entrada_saida']
+            print(f"Análise: {resumo['componentes']} componentes | comida inalcançável: "
+                  f"{resumo['comida_inalcancavel']}/{resumo['comida_total']} | células em becos: "
+                  f"{resumo['celulas_beco']} | entrada -> saída: "
+                  f"{'inalcançável' if distancia is None else f'{distancia} passos'}", flush=True)
 
         # Obtém contagem total de comida
         total_comida = ambiente.obter_total_comida()
         print(f"Total de comida no labirinto: {total_comida}", flush=True)
 
         # Cria e executa agente
-        agente = Agente(ambiente, total_comida)
+        agente = Agente(ambiente, total_comida, argumentos.semente)
         agente.modo_detalhado = modo_detalhado
-        agente.executar()
-
-        # Finaliza gravação de vídeo
-        if video_recorder:
+        agente.mensagens_passo = argumentos.terminal == "completo"
+        agente.detectar_ciclos = not argumentos.sem_deteccao_ciclos
+        if argumentos.limite_iteracoes is not None:
+            agente.limite_iteracoes = argumentos.limite_iteracoes
+        if argumentos.perfil or argumentos.perfil_json:
+            agente.perfilador = Perfilador()
+            if video_recorder:
+                video_recorder.perfilador = agente.perfilador
+        hash_conteudo = None
+        if argumentos.trajetoria or argumentos.checkpoint:
+            hash_conteudo = hash_labirinto(nome_arquivo)
+
+        # Retomada: restaura agente e ambiente; vídeo, eventos e trajetória continuam de onde o checkpoint parou
+        retomada = None
+        if argumentos.resume:
+            # Import local: checkpoint_agente importa este módulo
+            from checkpoint_agente import EstadoCheckpoint
+            try:
+                retomada = EstadoCheckpoint.ler(argumentos.checkpoint, hash_conteudo)
+                retomada.restaurar(agente)
+                if video_recorder and retomada.estados_saida('video'):
+                    video_recorder.retomar(retomada.estados_saida('video'))
+            except (OSError, ValueError) as e:
+                print(f"Erro ao retomar o checkpoint: {e}", flush=True)
+                return
+            print(f"Retomando do checkpoint {argumentos.checkpoint} (iteração {retomada.iteracao})", flush=True)
+
+        saida_eventos = None
+        if argumentos.eventos:
+            saida_eventos = SaidaEventosJsonl(argumentos.eventos, argumentos.nivel_eventos,
+                                              argumentos.eventos_assincrono,
+                                              retomada.estado_saida('eventos') if retomada else None)
+            agente.eventos.adicionar(saida_eventos)
+        if argumentos.trajetoria:
+            agente.trajetoria = RegistroTrajetoria(argumentos.trajetoria, hash_conteudo,
+                                                   argumentos.semente, ambiente.linhas, ambiente.colunas,
+                                                   retomada.estado_saida('trajetoria') if retomada else None)
+
+        checkpoint = None
+        if argumentos.checkpoint:
+            from checkpoint_agente import CheckpointAgente
+            saidas = {'video': video_recorder, 'eventos': saida_eventos, 'trajetoria': agente.trajetoria}
+            checkpoint = CheckpointAgente(argumentos.checkpoint, hash_conteudo, argumentos.checkpoint_a_cada,
+                                          {nome: saida for nome, saida in saidas.items() if saida})
+            checkpoint.acompanhar(agente)
+            signal.signal(signal.SIGINT, checkpoint.pedir_interrupcao)
+        try:
+            agente.executar()
+        finally:
+            if checkpoint is not None:
+                checkpoint.fechar()
+            agente.eventos.fechar()
+            if argumentos.eventos:
+                print(f"Eventos salvos em: {argumentos.eventos}", flush=True)
+            if agente.trajetoria is not None:
+                agente.trajetoria.fechar()
+                print(f"Trajetória salva em: {argumentos.trajetoria}", flush=True)
+
+        if classe_ambiente is AmbienteLadrilhos:
+            cache = ambiente.estatisticas_cache()
+            print(f"Cache de ladrilhos: {cache['acertos']} acertos | {cache['faltas']} faltas "
+                  f"({cache['taxa_acerto']:.2%} de acerto) | {cache['ladrilhos_em_cache']}/{cache['capacidade']} "
+                  f"ladrilhos de {ambiente.tamanho_ladrilho}x{ambiente.tamanho_ladrilho} em memória", flush=True)
+
+        # Finaliza gravação de vídeo (interrompida, o vídeo fica nas partes para a retomada)
+        if checkpoint is not None and checkpoint.interromper:
+            print("Execução interrompida; para continuar, repita o comando com --resume", flush=True)
+        elif video_recorder:
             video_recorder.finalize()
             print(f"\n Vídeo da execução salvo como: {nome_video}")
 
+        if argumentos.perfil_json:
+            agente.perfilador.salvar(argumentos.perfil_json)
+            print(f"Perfil salvo em: {argumentos.perfil_json}", flush=True)
+
     # Tratamento de possívels erros
     except FileNotFoundError:
         print(f"Erro: Não foi possível encontrar o arquivo do labirinto", flush=True)
@@ -622,8 +3367,11 @@ def main():
         print("o = comida", flush=True)
         print("E = entrada (início do agente)", flush=True)
         print("S = saída", flush=True)
-        print("\nUso: python programa.py [arquivo] [simples]", flush=True)
+        print("\nUso: python programa.py [arquivo] [simples] [no-video] [nome_video] [--grade | --mmap | --ladrilhos]", flush=True)
         print("  simples = modo menos detalhado", flush=True)
+        print("  --grade = usa grade NumPy (labirintos grandes)", flush=True)
+        print("  --mmap  = lê o labirinto direto do arquivo mapeado (arquivos muito grandes)", flush=True)
+        print("  --ladrilhos = lê o labirinto em ladrilhos sob demanda (mundos maiores que a memória)", flush=True)
 
     except Exception as e:
         print(f"Erro inesperado: {e}", flush=True)
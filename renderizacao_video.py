@@ -0,0 +1,244 @@
+import os
+import shutil
+import tempfile
+import subprocess
+import cv2
+import numpy as np
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from maze_agent import VideoRecorder, codigo_da_celula, codigos_do_labirinto
+
+
+QUADROS_MINIMOS_SEGMENTO = 256  # Segmentos menores não compensam um processo próprio
+
+
+class GravadorEstados:
+    """Gravação pós-execução: durante a execução guarda só o estado compacto de cada passo.
+
+    Por passo ficam a posição do agente e o texto de informações; das células, só as
+    mudanças (comida comida) com o passo em que ocorreram. Em finalize() os quadros
+    escolhidos (a cada k passos ou só nos eventos) são divididos em segmentos,
+    desenhados e codificados em paralelo por um pool de processos e concatenados no mp4
+    pelo ffmpeg. Sem o ffmpeg no PATH, o vídeo sai de um único segmento, já no arquivo final.
+    Usa a mesma interface do VideoRecorder (setup_video/add_frame/finalize).
+    """
+
+    def __init__(self, filename="maze_execution.mp4", fps=5.0, cell_size=30, processos=None,
+                 a_cada=1, somente_eventos=False, resolucao=None):
+        self.filename = filename
+        self.fps = fps
+        self.cell_size = cell_size
+        # Sem o ffmpeg, juntar os segmentos exigiria recodificá-los em série (mais lento que não dividir)
+        self.ffmpeg = shutil.which('ffmpeg') is not None
+        self.processos = (processos or os.cpu_count() or 1) if self.ffmpeg else 1
+        self.a_cada = max(1, a_cada)
+        self.somente_eventos = somente_eventos
+        self.resolucao = resolucao  # (largura, altura) do vídeo final; None = cell_size por célula
+
+        self.maze_rows = 0
+        self.maze_cols = 0
+        self.codigos_iniciais = None
+        self.codigos = None  # Estado atual das células, para detectar as mudanças
+        self.posicoes = array('i')  # linha, coluna do agente em cada passo
+        self.textos = []
+        self.mudancas = array('i')  # passo, linha, coluna, novo código de cada célula alterada
+
+        # Quantidades (passos, mudanças) já entregues ao último checkpoint e se os códigos iniciais foram junto
+        self.salvos = (0, 0)
+        self.iniciais_salvos = False
+
+        # Perfilador do agente (opcional): mede o registro e a renderização como fases próprias
+        self.perfilador = None
+
+    def setup_video(self, maze_rows, maze_cols):
+        """Guarda as dimensões do labirinto (o vídeo só é aberto na renderização final)"""
+        self.maze_rows = maze_rows
+        self.maze_cols = maze_cols
+        detalhe = f"em até {self.processos} processos" if self.ffmpeg else "em um processo: ffmpeg não encontrado"
+        print(f"Gravação pós-execução: {self.filename} (renderização ao final {detalhe})")
+        return True
+
+    def add_frame(self, labirinto, agent_row, agent_col, step_info=""):
+        """Registra o estado do passo"""
+        if self.perfilador is not None:
+            self.perfilador.medir('video', self.registrar_estado, labirinto, agent_row, agent_col, step_info)
+        else:
+            self.registrar_estado(labirinto, agent_row, agent_col, step_info)
+
+    def registrar_estado(self, labirinto, agent_row, agent_col, step_info=""):
+        """Guarda posição e texto do passo, e a célula do agente se ela mudou (comida comida)"""
+        if self.codigos_iniciais is None:
+            self.codigos_iniciais = codigos_do_labirinto(labirinto).copy()
+            self.codigos = self.codigos_iniciais.copy()
+
+        codigo = codigo_da_celula(labirinto, agent_row, agent_col)
+        if codigo != self.codigos[agent_row, agent_col]:
+            self.codigos[agent_row, agent_col] = codigo
+            self.mudancas.extend((len(self.textos), agent_row, agent_col, codigo))
+        self.posicoes.extend((agent_row, agent_col))
+        self.textos.append(step_info)
+
+    def ponto_retomada(self, completo=False, continuar=True):
+        """Checkpoint: estados registrados desde o checkpoint anterior (todos, se completo)"""
+        if completo:
+            self.salvos = (0, 0)
+            self.iniciais_salvos = False
+        passos, mudancas = self.salvos
+        estado = {
+            'codigos_iniciais': None if self.iniciais_salvos else self.codigos_iniciais,
+            'posicoes': self.posicoes[2 * passos:].tobytes(),
+            'textos': self.textos[passos:],
+            'mudancas': self.mudancas[4 * mudancas:].tobytes(),
+        }
+        self.salvos = (len(self.textos), len(self.mudancas) // 4)
+        self.iniciais_salvos = self.codigos_iniciais is not None
+        return estado
+
+    def retomar(self, estados):
+        """Reconstrói os estados registrados a partir dos checkpoints (o completo e os deltas seguintes)"""
+        for estado in estados:
+            if estado['codigos_iniciais'] is not None:
+                self.codigos_iniciais = estado['codigos_iniciais']
+            self.posicoes.frombytes(estado['posicoes'])
+            self.textos.extend(estado['textos'])
+            self.mudancas.frombytes(estado['mudancas'])
+        if self.codigos_iniciais is not None:
+            self.codigos = self.codigos_iniciais.copy()
+            mudancas = np.frombuffer(self.mudancas, dtype=np.int32).reshape(-1, 4)
+            self.codigos[mudancas[:, 1], mudancas[:, 2]] = mudancas[:, 3]
+        self.salvos = (len(self.textos), len(self.mudancas) // 4)
+        self.iniciais_salvos = self.codigos_iniciais is not None
+
+    def finalize(self):
+        """Renderiza o vídeo a partir dos estados registrados"""
+        if self.perfilador is not None:
+            self.perfilador.medir('video_finalizar', self.renderizar)
+        else:
+            self.renderizar()
+
+    def quadros_escolhidos(self, mudancas):
+        """Índices dos passos que viram quadro (o primeiro e o último sempre entram)"""
+        total = len(self.textos)
+        if self.somente_eventos:
+            quadros = np.concatenate(([0], mudancas[:, 0], [total - 1]))
+        else:
+            quadros = np.concatenate((np.arange(0, total, self.a_cada), [total - 1]))
+        return np.unique(quadros)
+
+    def tamanho_celula(self):
+        """Tamanho da célula no desenho: com resolução fixa, o maior que ainda cabe nela"""
+        if self.resolucao is None:
+            return self.cell_size
+        largura, altura = self.resolucao
+        return max(1, min(largura // self.maze_cols, altura // (2 * self.maze_rows), self.cell_size))
+
+    def renderizar(self):
+        """Divide os quadros em segmentos, renderiza em paralelo e concatena no arquivo final"""
+        if not self.textos:
+            return
+
+        mudancas = np.frombuffer(self.mudancas, dtype=np.int32).reshape(-1, 4)
+        posicoes = np.frombuffer(self.posicoes, dtype=np.int32).reshape(-1, 2)
+        quadros = self.quadros_escolhidos(mudancas)
+        quantidade = max(1, min(self.processos, len(quadros) // QUADROS_MINIMOS_SEGMENTO))
+        cell_size = self.tamanho_celula()
+
+        # Cada segmento começa do estado das células no seu primeiro quadro
+        tarefas = []
+        diretorio = tempfile.mkdtemp(prefix='segmentos_', dir=os.path.dirname(os.path.abspath(self.filename)))
+        try:
+            for indice, parte in enumerate(np.array_split(quadros, quantidade)):
+                inicio, fim = int(parte[0]), int(parte[-1])
+                anteriores = mudancas[mudancas[:, 0] <= inicio]
+                codigos = self.codigos_iniciais.copy()
+                codigos[anteriores[:, 1], anteriores[:, 2]] = anteriores[:, 3]
+                nome = self.filename if quantidade == 1 else os.path.join(diretorio, f"{indice:04d}.mp4")
+                tarefas.append((nome, codigos, parte, posicoes[parte], [self.textos[i] for i in parte.tolist()],
+                                mudancas[(mudancas[:, 0] > inicio) & (mudancas[:, 0] <= fim)],
+                                self.fps, cell_size, self.resolucao))
+
+            if quantidade == 1:
+                renderizar_segmento(*tarefas[0])
+            else:
+                with ProcessPoolExecutor(max_workers=quantidade) as executor:
+                    segmentos = list(executor.map(renderizar_segmento, *zip(*tarefas)))
+                concatenar_segmentos(segmentos, self.filename, self.fps)
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+        print(f"Vídeo salvo como: {self.filename} ({len(quadros)} quadros de {len(self.textos)} passos, "
+              f"{quantidade} segmentos)")
+
+
+def renderizar_segmento(nome, codigos, quadros, posicoes, textos, mudancas, fps, cell_size, resolucao=None):
+    """Desenha e codifica um segmento de quadros (executado em um processo do pool); retorna o arquivo.
+
+    codigos é o estado das células no primeiro quadro; mudancas traz as células
+    alteradas depois dele (passo, linha, coluna, código), aplicadas em cada quadro.
+    """
+    linhas, colunas = codigos.shape
+    desenho = VideoRecorder(nome, fps, cell_size)
+    desenho.frame_width = colunas * cell_size
+    desenho.frame_height = linhas * cell_size * 2
+    desenho.criar_ladrilhos()
+    desenho.montar_base(codigos)
+
+    tamanho = resolucao or (desenho.frame_width, desenho.frame_height)
+    escritor = cv2.VideoWriter(nome, cv2.VideoWriter_fourcc(*'mp4v'), fps, tamanho)
+    if not escritor.isOpened():
+        raise OSError(f"Não foi possível abrir o arquivo de vídeo {nome}")
+
+    proxima = 0
+    try:
+        for quadro, (linha, coluna), texto in zip(quadros.tolist(), posicoes.tolist(), textos):
+            celulas = []
+            while proxima < len(mudancas) and mudancas[proxima, 0] <= quadro:
+                celulas.append(tuple(int(v) for v in mudancas[proxima, 1:]))
+                proxima += 1
+            frame = desenho.desenhar_frame(celulas, linha, coluna, texto)
+            if resolucao is not None and (desenho.frame_width, desenho.frame_height) != resolucao:
+                frame = cv2.resize(frame, resolucao, interpolation=cv2.INTER_AREA)
+            escritor.write(frame)
+    finally:
+        escritor.release()
+    return nome
+
+
+def concatenar_segmentos(segmentos, destino, fps):
+    """Junta os segmentos no vídeo final.
+
+    Com o ffmpeg no PATH, concatena sem recodificar; sem ele, relê os segmentos e
+    recodifica pelo OpenCV (mesmo resultado, mas serial). Sem ffmpeg, o GravadorEstados
+    não divide o vídeo; só as partes dos checkpoints do VideoRecorder passam por aqui.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg:
+        lista = os.path.join(os.path.dirname(segmentos[0]), 'segmentos.txt')
+        with open(lista, 'w', encoding='utf-8') as arquivo:
+            arquivo.writelines(f"file '{os.path.abspath(nome)}'\n" for nome in segmentos)
+        try:
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', lista,
+                            '-c', 'copy', destino], check=True)
+        finally:
+            os.remove(lista)
+        return
+
+    escritor = None
+    try:
+        for nome in segmentos:
+            leitor = cv2.VideoCapture(nome)
+            try:
+                while True:
+                    lido, frame = leitor.read()
+                    if not lido:
+                        break
+                    if escritor is None:
+                        altura, largura = frame.shape[:2]
+                        escritor = cv2.VideoWriter(destino, cv2.VideoWriter_fourcc(*'mp4v'), fps, (largura, altura))
+                    escritor.write(frame)
+            finally:
+                leitor.release()
+    finally:
+        if escritor is not None:
+            escritor.release()
@@ -0,0 +1,134 @@
+import sys
+import argparse
+
+from maze_agent import (Ambiente, AmbienteGrade, AmbienteLadrilhos, AmbienteMapeado, LabirintoLadrilhos,
+                        LeitorTrajetoria, RenderizadorTerminal, VideoRecorder, hash_labirinto)
+
+
+def reproduzir(leitor, ambiente, ate=None, exibir=False):
+    """Reaplica as tentativas do log no ambiente (até a iteração `ate`) e retorna um resumo.
+
+    Não executa o agente: só a direção e o movimento de cada tentativa. Com exibir,
+    cada passo é desenhado como na execução ao vivo (terminal e/ou vídeo do ambiente).
+    """
+    comida_esperada = ambiente.obter_total_comida()
+    passos = 0
+    iteracoes = 0
+    saida_conhecida = False
+
+    if exibir:
+        ambiente.imprimir_labirinto(f"Inicio - Comida: 0/{comida_esperada}")
+
+    for direcao, moveu_registrado in leitor:
+        if ate is not None and iteracoes >= ate:
+            break
+        iteracoes += 1
+
+        # Mesma regra do agente: a saída é memorizada assim que aparece no sensor, antes do movimento
+        # (o centro do sensor é a direção do agente, não uma célula)
+        if not saida_conhecida:
+            sensor = ambiente.obter_sensor()
+            saida_conhecida = any(sensor[i][j] == 'S' for i in range(3) for j in range(3) if (i, j) != (1, 1))
+
+        ambiente.definir_direcao(direcao)
+        moveu = ambiente.mover()
+        if moveu != moveu_registrado:
+            raise ValueError(f"Log diverge do labirinto na iteração {iteracoes} "
+                             f"(registrado: {'moveu' if moveu_registrado else 'bloqueado'})")
+        if moveu:
+            passos += 1
+            saida_conhecida = saida_conhecida or ambiente.esta_na_saida()
+
+        if exibir:
+            comida_coletada = comida_esperada - ambiente.obter_comida_restante()
+            saida_info = " | Saída: Memorizada" if saida_conhecida else " | Saída: Procurando"
+            step_info = f"Iter: {iteracoes} | Passos: {passos} | Comida: {comida_coletada}/{comida_esperada}{saida_info}"
+            ambiente.imprimir_labirinto(step_info)
+
+    if exibir:
+        ambiente.finalizar_exibicao()
+
+    return {
+        'iteracoes': iteracoes,
+        'passos': passos,
+        'comida_coletada': comida_esperada - ambiente.obter_comida_restante(),
+        'comida_esperada': comida_esperada,
+        'posicao': (ambiente.linha_agente, ambiente.coluna_agente),
+        'saida_conhecida': saida_conhecida,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz offline um log de trajetória gravado com --trajetoria")
+    parser.add_argument("trajetoria", help="arquivo do log binário da trajetória")
+    parser.add_argument("labirinto", help="arquivo do labirinto usado na execução")
+    parser.add_argument("--ate", type=int, default=None,
+                        help="reconstrói o estado após a iteração N (padrão: até o fim)")
+    carregamento = parser.add_mutually_exclusive_group()
+    carregamento.add_argument("--grade", action="store_true", help="usa a grade NumPy (AmbienteGrade)")
+    carregamento.add_argument("--mmap", action="store_true",
+                              help="lê o labirinto direto do arquivo mapeado em memória (AmbienteMapeado)")
+    carregamento.add_argument("--ladrilhos", action="store_true",
+                              help="lê o labirinto em ladrilhos sob demanda (AmbienteLadrilhos); "
+                                   "automático para arquivos gerados em ladrilhos")
+    parser.add_argument("--terminal", choices=("completo", "diff"), default=None,
+                        help="desenha cada passo no terminal (padrão: só o estado final); em ladrilhos, completo vira diff")
+    parser.add_argument("--passos-por-segundo", type=float, default=None,
+                        help="ritmo da reprodução no terminal")
+    parser.add_argument("--video", default=None, help="grava a reprodução neste arquivo de vídeo")
+    parser.add_argument("--video-assincrono", action="store_true",
+                        help="desenha e codifica o vídeo em uma thread separada")
+    parser.add_argument("--ignorar-hash", action="store_true",
+                        help="reproduz mesmo se o labirinto não for o da gravação")
+    argumentos = parser.parse_args()
+
+    try:
+        leitor = LeitorTrajetoria(argumentos.trajetoria)
+        if leitor.hash_labirinto != hash_labirinto(argumentos.labirinto) and not argumentos.ignorar_hash:
+            print("Erro: o labirinto não corresponde ao da gravação (use --ignorar-hash para forçar)", flush=True)
+            return 1
+
+        semente = "não registrada" if leitor.semente is None else leitor.semente
+        print(f"Trajetória: {len(leitor)} tentativas | semente: {semente}", flush=True)
+
+        classe_ambiente = Ambiente
+        if argumentos.grade:
+            classe_ambiente = AmbienteGrade
+        elif argumentos.mmap:
+            classe_ambiente = AmbienteMapeado
+        if argumentos.ladrilhos or LabirintoLadrilhos.eh_ladrilhos(argumentos.labirinto):
+            classe_ambiente = AmbienteLadrilhos
+            if argumentos.terminal == "completo":
+                argumentos.terminal = "diff"  # O completo leria todos os ladrilhos a cada passo
+
+        video_recorder = None
+        if argumentos.video:
+            video_recorder = VideoRecorder(argumentos.video, fps=5.0, cell_size=40,
+                                           assincrono=argumentos.video_assincrono)
+        # Sem --terminal, só o vídeo é desenhado passo a passo
+        renderizador = RenderizadorTerminal(estilo=argumentos.terminal or 'diff',
+                                            silencioso=not argumentos.terminal,
+                                            passos_por_segundo=argumentos.passos_por_segundo)
+        ambiente = classe_ambiente(argumentos.labirinto, video_recorder, renderizador)
+
+        exibir = video_recorder is not None or argumentos.terminal is not None
+        resumo = reproduzir(leitor, ambiente, argumentos.ate, exibir)
+
+        if video_recorder:
+            video_recorder.finalize()
+            print(f"Vídeo da reprodução salvo como: {argumentos.video}", flush=True)
+        if not argumentos.terminal:
+            print(ambiente.texto_labirinto(), flush=True)
+
+        print(f"Iteração: {resumo['iteracoes']} | Passos: {resumo['passos']} | "
+              f"Comida: {resumo['comida_coletada']}/{resumo['comida_esperada']} | "
+              f"Posição: {resumo['posicao']} | Saída conhecida: {'Sim' if resumo['saida_conhecida'] else 'Não'}",
+              flush=True)
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", flush=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,675 @@
+import sys
+import time
+import argparse
+import numpy as np
+
+from maze_agent import AmbienteGrade, Agente, limite_iteracoes_padrao, PAREDE, CORREDOR, COMIDA, SAIDA, ENTRADA, DESLOCAMENTOS
+from benchmark_lote import salvar_relatorio
+
+
+# Colunas do relatório por agente (na ordem do CSV)
+CAMPOS_RELATORIO = [
+    'agente', 'semente', 'arquivo', 'passos', 'iteracoes', 'comida_coletada', 'comida_esperada',
+    'pontuacao', 'saida_conhecida', 'sucesso',
+]
+
+# Código do mapa conhecido para célula ainda não vista (os demais são os códigos da grade)
+DESCONHECIDO = 255
+
+# Células por onde a busca de caminho pode passar (conhecidas e diferentes de parede)
+TRANSITAVEL = np.zeros(256, dtype=bool)
+TRANSITAVEL[[CORREDOR, COMIDA, SAIDA, ENTRADA]] = True
+
+# Modos da busca de caminho (alvo de cada trajetória)
+BUSCA_SAIDA, BUSCA_COMIDA, BUSCA_FRONTEIRA = 0, 1, 2
+
+# Posições no sensor 3x3 achatado: N, L, S, O (mesma ordem de DESLOCAMENTOS)
+VIZINHOS_SENSOR = [1, 5, 7, 3]
+
+# Constantes do splitmix64 (sorteios por agente)
+OURO = np.uint64(0x9E3779B97F4A7C15)
+MISTURA_1 = np.uint64(0xBF58476D1CE4E5B9)
+MISTURA_2 = np.uint64(0x94D049BB133111EB)
+
+
+def misturar(valores):
+    """Finalizador do splitmix64 sobre um array uint64"""
+    valores = (valores ^ (valores >> np.uint64(30))) * MISTURA_1
+    valores = (valores ^ (valores >> np.uint64(27))) * MISTURA_2
+    return valores ^ (valores >> np.uint64(31))
+
+
+def sorteio_uniforme(chaves, contadores):
+    """Número em [0, 1) determinado por (chave do agente, número do sorteio)"""
+    valores = misturar(chaves + (contadores.astype(np.uint64) + np.uint64(1)) * OURO)
+    return (valores >> np.uint64(11)) * 2.0 ** -53
+
+
+def duplicar_linhas(objeto, campos, origens, total):
+    """Copia as linhas origens dos arrays campos de objeto para as linhas total, total+1, ...
+
+    A capacidade dos arrays dobra quando falta espaço (as linhas além das usadas são reserva).
+    """
+    necessario = total + len(origens)
+    for nome in campos:
+        array = getattr(objeto, nome)
+        if len(array) < necessario:
+            maior = np.empty((max(necessario, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+            maior[:total] = array[:total]
+            setattr(objeto, nome, maior)
+            array = maior
+        array[total:necessario] = array[origens]
+
+
+class AmbienteLote:
+    """Trajetórias independentes no mesmo labirinto avançando em passo único (lock-step).
+
+    A grade com borda é compartilhada; cada trajetória tem só posição, direção,
+    contagem de comida restante e a máscara das comidas que já comeu, tudo em
+    arrays NumPy (uma linha por trajetória). Sensor, validação de movimento e
+    consumo de comida são vetorizados sobre elas. Posições são índices lineares
+    da grade com borda. Começa com uma trajetória; duplicar cria as demais.
+    """
+
+    CAMPOS_TRAJETORIA = ('posicoes', 'direcoes', 'comida_restante', 'comidas_comidas')
+
+    def __init__(self, nome_arquivo):
+        ambiente = AmbienteGrade(nome_arquivo)
+        self.nome_arquivo = nome_arquivo
+        self.linhas = ambiente.linhas
+        self.colunas = ambiente.colunas
+        self.largura = ambiente.grade_borda.shape[1]
+        self.plano = ambiente.grade_borda.ravel().copy()
+        self.celulas = self.plano.size
+
+        self.deltas = np.array([linha * self.largura + coluna for linha, coluna in DESLOCAMENTOS.values()])
+        self.offsets_sensor = np.array([linha * self.largura + coluna
+                                        for linha in (-1, 0, 1) for coluna in (-1, 0, 1)])
+
+        # Cada comida tem um índice; a máscara (trajetória x comida) marca as já comidas
+        self.celulas_comida = np.flatnonzero(self.plano == COMIDA)
+        self.indice_comida = np.full(self.celulas, -1, dtype=np.int64)
+        self.indice_comida[self.celulas_comida] = np.arange(len(self.celulas_comida))
+        self.total_comida = len(self.celulas_comida)
+
+        inicio = (ambiente.linha_agente + 1) * self.largura + ambiente.coluna_agente + 1
+        self.trajetorias = 1
+        self.posicoes = np.full(1, inicio, dtype=np.int64)
+        self.direcoes = np.zeros(1, dtype=np.int8)  # 'N'
+        self.comida_restante = np.full(1, self.total_comida, dtype=np.int64)
+        self.comidas_comidas = np.zeros((1, self.total_comida), dtype=bool)
+
+    def duplicar(self, origens):
+        """Cria cópias das trajetórias origens; retorna os índices das novas"""
+        duplicar_linhas(self, self.CAMPOS_TRAJETORIA, origens, self.trajetorias)
+        novas = np.arange(self.trajetorias, self.trajetorias + len(origens))
+        self.trajetorias += len(origens)
+        return novas
+
+    def obter_sensores(self, trajetorias):
+        """Códigos 3x3 (achatados) ao redor de cada trajetória e os índices das células lidas"""
+        celulas = self.posicoes[trajetorias, None] + self.offsets_sensor
+        codigos = self.plano[celulas]
+        indices = self.indice_comida[celulas]
+        comida = indices >= 0
+        if np.count_nonzero(comida):
+            comida[comida] = ~self.comidas_comidas[np.broadcast_to(trajetorias[:, None], indices.shape)[comida],
+                                                   indices[comida]]
+            codigos[(codigos == COMIDA) & ~comida] = CORREDOR
+        return codigos, celulas
+
+    def mover(self, trajetorias, direcoes):
+        """Tenta mover cada trajetória na direção dada; retorna (moveu, comeu)"""
+        self.direcoes[trajetorias] = direcoes
+        novas = self.posicoes[trajetorias] + self.deltas[direcoes]
+        moveu = self.plano[novas] != PAREDE
+
+        indices = self.indice_comida[novas]
+        comeu = moveu & (indices >= 0)
+        if np.count_nonzero(comeu):
+            comeu[comeu] = ~self.comidas_comidas[trajetorias[comeu], indices[comeu]]
+            self.comidas_comidas[trajetorias[comeu], indices[comeu]] = True
+            self.comida_restante[trajetorias[comeu]] -= 1
+
+        self.posicoes[trajetorias[moveu]] = novas[moveu]
+        return moveu, comeu
+
+    def na_saida(self, trajetorias):
+        """Indica quais trajetórias estão em uma célula de saída"""
+        return self.plano[self.posicoes[trajetorias]] == SAIDA
+
+
+class AgentesLote:
+    """Memória e decisão de B agentes, vetorizadas sobre as trajetórias distintas.
+
+    Segue as prioridades de Agente.decidir_proximo_movimento: comida adjacente,
+    recuperação de ciclo, saída (quando toda comida foi coletada), comida
+    conhecida mais próxima, fronteira mais próxima, vizinha menos visitada e
+    direção atual. Como no Agente, o alvo e o caminho até ele ficam guardados e
+    só são recalculados quando o conjunto de comidas conhecidas muda, o alvo
+    deixa de ser fronteira ou a trajetória sai do caminho. Os caminhos vêm de
+    buscas em largura simultâneas sobre o mapa conhecido de cada trajetória, na
+    mesma ordem de fila do Agente (o A* do Agente pode desempatar caminhos de
+    mesmo tamanho de outro jeito).
+
+    A detecção de ciclos é a do Agente (estado = posição, direção e faixa de
+    visitas; LIMITE_RECUPERACOES recuperações seguidas antes de desistir), e o
+    sorteio fica no mesmo ponto: a direção válida dos passos aleatórios da
+    recuperação. O agente i sorteia com a semente semente + i, por um gerador
+    próprio (splitmix64 sobre o número do sorteio), e não pelo random do Agente.
+    Até o primeiro sorteio que diverge, agentes idênticos compartilham uma só
+    trajetória; a cada sorteio, cada grupo de agentes que escolheu outra direção
+    ganha uma cópia da trajetória.
+    """
+
+    CAMPOS_TRAJETORIA = (
+        'conhecido', 'visitas', 'conhecidas', 'comida_conhecida', 'saida_conhecida', 'passos', 'iteracoes',
+        'modo_alvo', 'alvo', 'caminhos', 'comprimentos', 'indices_caminho',
+        'posicao_esperada', 'comida_mudou', 'marco', 'estados', 'inicio_sem_progresso', 'recuperacoes',
+        'passos_recuperacao', 'fronteira_na_recuperacao', 'interrompidos', 'sorteios',
+        'sem_alvo', 'visitadas', 'chegada', 'ordem_chegada',
+    )
+
+    def __init__(self, ambiente, quantidade, semente=None, explorar_fronteira=True, limite_iteracoes=None,
+                 detectar_ciclos=True):
+        self.ambiente = ambiente
+        self.quantidade = quantidade
+        # Sem semente, sorteia a base (e a registra no relatório)
+        self.semente = int(np.random.default_rng().integers(2 ** 31)) if semente is None else semente
+        self.sementes = self.semente + np.arange(quantidade, dtype=np.int64)
+        self.chaves = misturar(self.sementes.astype(np.uint64) * OURO)
+        self.trajetoria_do_agente = np.zeros(quantidade, dtype=np.int64)
+        self.explorar_fronteira = explorar_fronteira
+        self.detectar_ciclos = detectar_ciclos
+        # Mesmo orçamento padrão do Agente (proporcional ao tamanho do labirinto)
+        self.limite_iteracoes = (limite_iteracoes_padrao(ambiente.linhas, ambiente.colunas)
+                                 if limite_iteracoes is None else limite_iteracoes)
+
+        celulas = ambiente.celulas
+        self.conhecido = np.full((1, celulas), DESCONHECIDO, dtype=np.uint8)
+        self.visitas = np.zeros((1, celulas), dtype=np.int32)
+        self.conhecidas = np.zeros(1, dtype=np.int64)  # Células do mapa conhecido (o marco de progresso)
+        self.comida_conhecida = np.zeros(1, dtype=np.int64)
+        self.saida_conhecida = np.zeros(1, dtype=bool)
+        self.passos = np.zeros(1, dtype=np.int64)
+        self.iteracoes = np.zeros(1, dtype=np.int64)
+        self.iteracao = 0  # Iteração do lote (todas as trajetórias ativas estão nela)
+        self.ativos = np.zeros(1, dtype=np.int64)  # Trajetórias que não concluíram nem desistiram
+
+        # Caminho planejado de cada trajetória: direções, posição no caminho e célula esperada
+        self.modo_alvo = np.full(1, -1, dtype=np.int64)
+        self.alvo = np.full(1, -1, dtype=np.int64)
+        self.caminhos = np.zeros((1, celulas), dtype=np.int8)
+        self.comprimentos = np.zeros(1, dtype=np.int64)
+        self.indices_caminho = np.zeros(1, dtype=np.int64)
+        self.posicao_esperada = np.full(1, -1, dtype=np.int64)
+        self.comida_mudou = np.zeros(1, dtype=bool)
+        # Por modo: células conhecidas na última busca sem alvo alcançável (-1: nenhuma)
+        self.sem_alvo = np.full((1, 3), -1, dtype=np.int64)
+
+        # Detecção de ciclos: marco (células conhecidas, comida coletada, saída conhecida) e,
+        # por (célula, direção), iteração * 64 + faixa de visitas do último registro; o registro
+        # vale enquanto for posterior ao início do trecho sem progresso (as faixas só crescem)
+        self.marco = np.full(1, -1, dtype=np.int64)
+        self.estados = np.full((1, celulas * 4), -1, dtype=np.int64)
+        self.inicio_sem_progresso = np.zeros(1, dtype=np.int64)
+        self.recuperacoes = np.zeros(1, dtype=np.int64)
+        self.passos_recuperacao = np.zeros(1, dtype=np.int64)
+        self.fronteira_na_recuperacao = np.zeros(1, dtype=bool)
+        self.interrompidos = np.zeros(1, dtype=bool)
+        self.sorteios = np.zeros(1, dtype=np.int64)  # Sorteios já feitos (iguais para os agentes da trajetória)
+
+        # Buffers da busca, reaproveitados entre passos (só as marcas usadas são limpas)
+        self.visitadas = np.zeros((1, celulas), dtype=bool)
+        self.chegada = np.zeros((1, celulas), dtype=np.int8)  # Direção com que a célula foi alcançada
+        self.ordem_chegada = np.zeros((1, celulas), dtype=np.int32)  # Posição na fila (descarta repetidas)
+        self.direcoes_busca = np.zeros(0, dtype=np.int8)
+
+    def duplicar(self, origens):
+        """Cria cópias das trajetórias origens (ambiente e memória); retorna os índices das novas"""
+        duplicar_linhas(self, self.CAMPOS_TRAJETORIA, origens, self.ambiente.trajetorias)
+        return self.ambiente.duplicar(origens)
+
+    def passo(self):
+        """Avança um passo de todas as trajetórias ativas; retorna False quando nenhuma está ativa"""
+        ativos = self.ativos
+        if not len(ativos) or self.iteracao > self.limite_iteracoes:
+            return False
+        self.iteracao += 1
+        self.iteracoes[ativos] = self.iteracao
+
+        celulas_grade = self.ambiente.celulas
+        conhecido = self.conhecido.reshape(-1)
+        codigos, celulas = self.ambiente.obter_sensores(ativos)
+        indices = celulas + (ativos * celulas_grade)[:, None]  # Índices em conhecido achatado
+        anteriores = conhecido[indices]
+        novas_comidas = ((codigos == COMIDA) & (anteriores != COMIDA)).sum(axis=1)
+        conhecido[indices] = codigos
+        self.conhecidas[ativos] += (anteriores == DESCONHECIDO).sum(axis=1)
+        self.comida_conhecida[ativos] += novas_comidas
+        self.comida_mudou[ativos] |= novas_comidas > 0
+        self.saida_conhecida[ativos] |= (codigos == SAIDA).any(axis=1)
+
+        # A decisão pode criar trajetórias (sorteios divergentes): elas entram em ativos
+        ativos, direcoes = self.decidir(ativos, codigos)
+        moveu, comeu = self.ambiente.mover(ativos, direcoes)
+
+        movidos = ativos[moveu]
+        self.passos[movidos] += 1
+        self.visitas.reshape(-1)[movidos * celulas_grade + self.ambiente.posicoes[movidos]] += 1
+        if np.count_nonzero(comeu):
+            comeram = ativos[comeu]
+            self.conhecido.reshape(-1)[comeram * celulas_grade + self.ambiente.posicoes[comeram]] = CORREDOR
+            self.comida_conhecida[comeram] -= 1
+            self.comida_mudou[comeram] = True
+
+        if self.detectar_ciclos:
+            self.verificar_ciclos(ativos)
+        concluidos = (((self.ambiente.comida_restante[ativos] == 0) & self.ambiente.na_saida(ativos))
+                      | self.interrompidos[ativos])
+        self.ativos = ativos[~concluidos] if np.count_nonzero(concluidos) else ativos
+        return True
+
+    def executar(self):
+        """Executa até todos concluírem, desistirem de um ciclo ou atingirem o limite de iterações"""
+        while self.passo():
+            pass
+
+    def verificar_ciclos(self, trajetorias):
+        """Agente.verificar_ciclo vetorizado: marca como interrompidas as que desistem"""
+        # Marco (células conhecidas, comida coletada, saída conhecida) codificado num inteiro
+        coletada = self.ambiente.total_comida - self.ambiente.comida_restante[trajetorias]
+        marco = ((self.conhecidas[trajetorias] * (self.ambiente.total_comida + 1) + coletada) * 2
+                 + self.saida_conhecida[trajetorias])
+        progresso = marco != self.marco[trajetorias]
+        if np.count_nonzero(progresso):
+            sub = trajetorias[progresso]
+            self.marco[sub] = marco[progresso]
+            self.inicio_sem_progresso[sub] = self.iteracao
+            self.recuperacoes[sub] = 0
+            self.passos_recuperacao[sub] = 0
+
+        # Passos aleatórios repetem estados por natureza: não contam
+        sub = trajetorias[~progresso & (self.passos_recuperacao[trajetorias] == 0)]
+        if not len(sub):
+            return
+        posicoes = self.ambiente.posicoes[sub]
+        faixas = np.frexp(self.visitas[sub, posicoes])[1]  # bit_length das visitas
+        chaves = posicoes * 4 + self.ambiente.direcoes[sub]
+        registros = self.estados[sub, chaves]
+        repetidos = ((registros >> 6) > self.inicio_sem_progresso[sub]) & ((registros & 63) == faixas)
+        novos = ~repetidos
+        self.estados[sub[novos], chaves[novos]] = self.iteracao * 64 + faixas[novos]
+        if not np.count_nonzero(repetidos):
+            return
+
+        ciclos = sub[repetidos]
+        desistem = self.recuperacoes[ciclos] >= Agente.LIMITE_RECUPERACOES
+        self.interrompidos[ciclos[desistem]] = True
+
+        # Recuperação: descarta o caminho guardado; sem fronteira, anda aleatoriamente
+        recuperam = ciclos[~desistem]
+        self.recuperacoes[recuperam] += 1
+        self.inicio_sem_progresso[recuperam] = self.iteracao
+        self.modo_alvo[recuperam] = -1
+        # O mapa conhecido não muda até o próximo progresso (que zera as recuperações)
+        com_fronteira = self.tem_fronteira(recuperam)
+        self.fronteira_na_recuperacao[recuperam] = com_fronteira
+        aleatorias = recuperam[~com_fronteira]
+        self.passos_recuperacao[aleatorias] = Agente.PASSOS_RECUPERACAO << (self.recuperacoes[aleatorias] - 1)
+
+    def tem_fronteira(self, trajetorias):
+        """Indica quais trajetórias têm célula conhecida transitável com vizinha desconhecida"""
+        conhecido = self.conhecido[trajetorias]
+        desconhecido = conhecido == DESCONHECIDO
+        vizinha_desconhecida = np.zeros_like(desconhecido)
+        for delta in self.ambiente.deltas:
+            if delta > 0:
+                vizinha_desconhecida[:, :-delta] |= desconhecido[:, delta:]
+            else:
+                vizinha_desconhecida[:, -delta:] |= desconhecido[:, :delta]
+        return (TRANSITAVEL[conhecido] & vizinha_desconhecida).any(axis=1)
+
+    def decidir(self, trajetorias, codigos):
+        """Direção (0-3, ordem de DESLOCAMENTOS) de cada trajetória; retorna (trajetórias, direções),
+        incluindo as criadas por sorteios divergentes"""
+        vizinhos = codigos[:, VIZINHOS_SENSOR]
+        abertos = vizinhos != PAREDE
+        escolha = np.full(len(trajetorias), -1, dtype=np.int64)
+        novas = np.zeros(0, dtype=np.int64)
+        direcoes_novas = np.zeros(0, dtype=np.int64)
+
+        # Prioridade 1: comida adjacente (primeira na ordem N, L, S, O)
+        comida = vizinhos == COMIDA
+        com_comida = comida.any(axis=1)
+        escolha[com_comida] = comida.argmax(axis=1)[com_comida]
+
+        # Recuperação de ciclo: passos aleatórios ou fronteira mais próxima
+        recuperando = self.recuperacoes[trajetorias] > 0
+        if np.count_nonzero(recuperando):
+            aleatorios = (escolha < 0) & (self.passos_recuperacao[trajetorias] > 0)
+            if np.count_nonzero(aleatorios):
+                sub = trajetorias[aleatorios]
+                self.passos_recuperacao[sub] -= 1
+                sorteadas, novas, direcoes_novas = self.sortear_direcoes(sub, abertos[aleatorios])
+                escolha[aleatorios] = np.where(sorteadas >= 0, sorteadas, self.ambiente.direcoes[sub])
+            self.seguir_caminho(trajetorias, escolha, (escolha < 0) & recuperando
+                                & self.fronteira_na_recuperacao[trajetorias], BUSCA_FRONTEIRA)
+
+        # Prioridade 2: toda comida coletada -> saída memorizada, ou saída adjacente
+        sem_comida = self.ambiente.comida_restante[trajetorias] == 0
+        if np.count_nonzero(sem_comida):
+            self.seguir_caminho(trajetorias, escolha, (escolha < 0) & sem_comida & self.saida_conhecida[trajetorias],
+                                BUSCA_SAIDA)
+            saida = vizinhos == SAIDA
+            pendentes = (escolha < 0) & sem_comida & saida.any(axis=1)
+            escolha[pendentes] = saida.argmax(axis=1)[pendentes]
+
+        # Prioridade 3: comida conhecida mais próxima pelo mapa conhecido
+        self.seguir_caminho(trajetorias, escolha, (escolha < 0) & (self.comida_conhecida[trajetorias] > 0),
+                            BUSCA_COMIDA)
+
+        # Prioridade 4: fronteira mais próxima
+        if self.explorar_fronteira:
+            self.seguir_caminho(trajetorias, escolha, escolha < 0, BUSCA_FRONTEIRA)
+
+        # Prioridade 5: vizinha aberta menos visitada (6: direção atual se nenhuma estiver aberta;
+        # aí também o último recurso do Agente, sem direção válida para sortear, fica na atual)
+        pendentes = escolha < 0
+        if np.count_nonzero(pendentes):
+            sub = trajetorias[pendentes]
+            celulas = self.ambiente.posicoes[sub, None] + self.ambiente.deltas
+            visitas = np.where(abertos[pendentes],
+                               self.visitas.reshape(-1)[celulas + (sub * self.ambiente.celulas)[:, None]],
+                               np.iinfo(np.int32).max)
+            escolha[pendentes] = np.where(abertos[pendentes].any(axis=1), visitas.argmin(axis=1),
+                                          self.ambiente.direcoes[sub])
+
+        if len(novas):
+            return np.concatenate([trajetorias, novas]), np.concatenate([escolha, direcoes_novas])
+        return trajetorias, escolha
+
+    def sortear_direcoes(self, trajetorias, abertos):
+        """Direção válida sorteada por cada agente das trajetórias (o rng.choice do Agente).
+
+        Os agentes de uma trajetória podem sortear direções diferentes: o grupo da menor
+        direção sorteada fica com a trajetória e cada outro grupo ganha uma cópia dela.
+        Retorna (direção de cada trajetória ou -1 sem direção válida, novas trajetórias,
+        direção de cada nova).
+        """
+        escolha = np.full(len(trajetorias), -1, dtype=np.int64)
+        validas = abertos.sum(axis=1)
+        sorteiam = validas > 0
+        trajetorias, abertos, validas = trajetorias[sorteiam], abertos[sorteiam], validas[sorteiam]
+        if not len(trajetorias):
+            return escolha, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Agentes de cada trajetória que sorteia e a posição dela em trajetorias
+        posicao = np.full(self.ambiente.trajetorias, -1, dtype=np.int64)
+        posicao[trajetorias] = np.arange(len(trajetorias))
+        agentes = np.flatnonzero(posicao[self.trajetoria_do_agente] >= 0)
+        donos = posicao[self.trajetoria_do_agente[agentes]]
+        sorteio = sorteio_uniforme(self.chaves[agentes], self.sorteios[trajetorias][donos])
+        self.sorteios[trajetorias] += 1
+
+        # k-ésima direção válida na ordem N, L, S, O, com k = floor(sorteio * válidas)
+        ordem = (sorteio * validas[donos]).astype(np.int64)
+        direcoes = (abertos[donos].cumsum(axis=1) > ordem[:, None]).argmax(axis=1)
+
+        # Grupos (trajetória, direção), ordenados por trajetória: o primeiro de cada uma a mantém
+        grupos, grupo_do_agente = np.unique(donos * 4 + direcoes, return_inverse=True)
+        donos_grupos, direcoes_grupos = grupos // 4, grupos % 4
+        mantem = np.r_[True, donos_grupos[1:] != donos_grupos[:-1]]
+        escolha[np.flatnonzero(sorteiam)[donos_grupos[mantem]]] = direcoes_grupos[mantem]
+        if mantem.all():
+            return escolha, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        novas = self.duplicar(trajetorias[donos_grupos[~mantem]])
+        trajetoria_do_grupo = trajetorias[donos_grupos]
+        trajetoria_do_grupo[~mantem] = novas
+        self.trajetoria_do_agente[agentes] = trajetoria_do_grupo[grupo_do_agente.ravel()]
+        return escolha, novas, direcoes_grupos[~mantem]
+
+    def seguir_caminho(self, trajetorias, escolha, pendentes, modo):
+        """Próximo passo do caminho guardado até o alvo do modo, replanejando quando preciso"""
+        indices = pendentes.nonzero()[0]
+        if not len(indices):
+            return
+        sub = trajetorias[indices]
+        posicoes = self.ambiente.posicoes[sub]
+
+        # Replaneja se o alvo é de outro modo, a trajetória saiu do caminho ou o caminho acabou
+        replanejar = ((self.modo_alvo[sub] != modo) | (self.posicao_esperada[sub] != posicoes)
+                      | (self.indices_caminho[sub] >= self.comprimentos[sub]))
+        if modo == BUSCA_COMIDA:
+            replanejar |= self.comida_mudou[sub]
+        elif modo == BUSCA_FRONTEIRA:
+            com_alvo = ~replanejar
+            alvos = self.ambiente.celulas * sub[com_alvo] + self.alvo[sub[com_alvo]]
+            replanejar[com_alvo] = ~(self.conhecido.reshape(-1)[alvos[:, None] + self.ambiente.deltas]
+                                     == DESCONHECIDO).any(axis=1)
+        if np.count_nonzero(replanejar):
+            self.planejar(sub[replanejar], modo)
+            # Quem continua sem caminho (nenhum alvo alcançável) fica para a próxima prioridade
+            com_caminho = self.indices_caminho[sub] < self.comprimentos[sub]
+            sub, indices, posicoes = sub[com_caminho], indices[com_caminho], posicoes[com_caminho]
+
+        # Segue a próxima direção do caminho
+        passos_caminho = self.indices_caminho[sub]
+        direcoes = self.caminhos[sub, passos_caminho]
+        escolha[indices] = direcoes
+        self.indices_caminho[sub] = passos_caminho + 1
+        self.posicao_esperada[sub] = posicoes + self.ambiente.deltas[direcoes]
+
+    def planejar(self, trajetorias, modo):
+        """Novo alvo e caminho do modo para cada trajetória (caminho vazio se nenhum alvo for alcançável)"""
+        self.modo_alvo[trajetorias] = modo
+        self.alvo[trajetorias] = -1
+        self.comprimentos[trajetorias] = 0
+        self.indices_caminho[trajetorias] = 0
+        self.posicao_esperada[trajetorias] = self.ambiente.posicoes[trajetorias]
+        if modo == BUSCA_COMIDA:
+            self.comida_mudou[trajetorias] = False
+
+        # Sem alvo alcançável na última busca do modo e nenhuma célula nova conhecida desde então:
+        # continua sem, pois andar pelo mapa conhecido não muda o que é alcançável
+        conhecidas = self.conhecidas[trajetorias]
+        buscar = self.sem_alvo[trajetorias, modo] != conhecidas
+        trajetorias, conhecidas = trajetorias[buscar], conhecidas[buscar]
+        if not len(trajetorias):
+            return
+        self.buscar_alvos(trajetorias, modo)
+        falharam = self.comprimentos[trajetorias] == 0
+        self.sem_alvo[trajetorias[falharam], modo] = conhecidas[falharam]
+
+    def buscar_alvos(self, trajetorias, modo):
+        """Busca em largura simultânea, no mapa conhecido de cada trajetória, pelo alvo mais
+        próximo do modo; guarda o alvo e o caminho das que encontrarem um"""
+        celulas = self.ambiente.celulas
+        deltas = self.ambiente.deltas
+        conhecido = self.conhecido.reshape(-1)
+        visitadas = self.visitadas.reshape(-1)
+        chegada = self.chegada.reshape(-1)
+        ordem_chegada = self.ordem_chegada.reshape(-1)
+
+        # Elemento da busca: (trajetória, célula) codificado como trajetória * celulas + célula,
+        # o mesmo índice de conhecido, visitadas e chegada achatados
+        origens = trajetorias * celulas + self.ambiente.posicoes[trajetorias]
+
+        # Caso mais comum: o alvo é vizinho (primeiro na ordem N, L, S, O, como na fila da BFS)
+        vizinhos = origens[:, None] + deltas
+        alvo = TRANSITAVEL[conhecido[vizinhos]] & self.eh_alvo(vizinhos, modo)
+        imediatos = alvo.any(axis=1)
+        if np.count_nonzero(imediatos):
+            sub = trajetorias[imediatos]
+            direcoes = alvo[imediatos].argmax(axis=1)
+            self.caminhos[sub, 0] = direcoes
+            self.comprimentos[sub] = 1
+            self.alvo[sub] = self.ambiente.posicoes[sub] + deltas[direcoes]
+            trajetorias, origens = trajetorias[~imediatos], origens[~imediatos]
+            if not len(trajetorias):
+                return
+
+        visitadas[origens] = True
+        marcadas = [origens]
+        encontrados = []
+        fronteira = (origens[:, None] + deltas).ravel()
+        direcoes = self.direcoes_expandidas(fronteira.size)
+
+        nivel = 0
+        while fronteira.size:
+            nivel += 1
+            validos = TRANSITAVEL[conhecido[fronteira]] & ~visitadas[fronteira]
+            fronteira, direcoes = fronteira[validos], direcoes[validos]
+            if not fronteira.size:
+                break
+
+            # Descarta repetidas mantendo a primeira ocorrência e a ordem de chegada (fila da BFS):
+            # gravando as posições de trás para frente, a primeira ocorrência é a que fica
+            posicoes = np.arange(fronteira.size, dtype=np.int32)
+            ordem_chegada[fronteira[::-1]] = posicoes[::-1]
+            unicos = ordem_chegada[fronteira] == posicoes
+            if not unicos.all():
+                fronteira, direcoes = fronteira[unicos], direcoes[unicos]
+            visitadas[fronteira] = True
+            chegada[fronteira] = direcoes
+            marcadas.append(fronteira)
+
+            alvo = self.eh_alvo(fronteira, modo)
+            if np.count_nonzero(alvo):
+                # A fila fica agrupada por trajetória; empate no nível: fica o primeiro de cada uma
+                achados = fronteira[alvo]
+                donos = achados // celulas
+                primeiros = np.r_[True, donos[1:] != donos[:-1]]
+                achados, donos = achados[primeiros], donos[primeiros]
+                self.comprimentos[donos] = nivel
+                self.alvo[donos] = achados - donos * celulas
+                encontrados.append(achados)
+
+                restantes = self.alvo[fronteira // celulas] < 0
+                fronteira, direcoes = fronteira[restantes], direcoes[restantes]
+
+            fronteira = (fronteira[:, None] + deltas).ravel()
+            direcoes = self.direcoes_expandidas(fronteira.size)
+
+        visitadas[np.concatenate(marcadas)] = False
+        if not encontrados:
+            return
+
+        # Reconstrói os caminhos de trás para frente pelas direções de chegada
+        celula = np.concatenate(encontrados)
+        sub = celula // celulas
+        posicao = self.comprimentos[sub] - 1
+        while len(sub):
+            direcao = chegada[celula]
+            self.caminhos[sub, posicao] = direcao
+            celula = celula - deltas[direcao]
+            posicao -= 1
+            continuam = posicao >= 0
+            sub, celula, posicao = sub[continuam], celula[continuam], posicao[continuam]
+
+    def direcoes_expandidas(self, tamanho):
+        """Direção de cada elemento expandido (0, 1, 2, 3, 0, 1, ...), de um buffer reaproveitado"""
+        if len(self.direcoes_busca) < tamanho:
+            repeticoes = -(-max(tamanho, 2 * len(self.direcoes_busca)) // 4)
+            self.direcoes_busca = np.tile(np.arange(4, dtype=np.int8), repeticoes)
+        return self.direcoes_busca[:tamanho]
+
+    def eh_alvo(self, indices, modo):
+        """Indica quais células (índices em conhecido achatado) são alvo do modo"""
+        conhecido = self.conhecido.reshape(-1)
+        if modo == BUSCA_SAIDA:
+            return conhecido[indices] == SAIDA
+        if modo == BUSCA_COMIDA:
+            return conhecido[indices] == COMIDA
+        # Fronteira: alguma vizinha ainda desconhecida
+        return (conhecido[indices[..., None] + self.ambiente.deltas] == DESCONHECIDO).any(axis=-1)
+
+    def obter_resultados(self):
+        """Uma linha por agente (pela trajetória dele), com os mesmos campos de Agente.obter_resultado"""
+        trajetorias = self.trajetoria_do_agente
+        comida_restante = self.ambiente.comida_restante[trajetorias]
+        comida_coletada = self.ambiente.total_comida - comida_restante
+        passos = self.passos[trajetorias]
+        pontuacao = comida_coletada * 10 - passos
+        sucesso = (comida_restante == 0) & self.ambiente.na_saida(trajetorias)
+        return [
+            {
+                'agente': i,
+                'semente': int(self.sementes[i]),
+                'arquivo': self.ambiente.nome_arquivo,
+                'passos': int(passos[i]),
+                'iteracoes': int(self.iteracoes[trajetorias[i]]),
+                'comida_coletada': int(comida_coletada[i]),
+                'comida_esperada': self.ambiente.total_comida,
+                'pontuacao': int(pontuacao[i]),
+                'saida_conhecida': bool(self.saida_conhecida[trajetorias[i]]),
+                'sucesso': bool(sucesso[i]),
+            }
+            for i in range(self.quantidade)
+        ]
+
+
+def executar_lote(nome_arquivo, quantidade, semente=None, explorar_fronteira=True, detectar_ciclos=True):
+    """Executa B agentes em lote no labirinto e retorna o objeto AgentesLote ao final"""
+    agentes = AgentesLote(AmbienteLote(nome_arquivo), quantidade, semente, explorar_fronteira,
+                          detectar_ciclos=detectar_ciclos)
+    agentes.executar()
+    return agentes
+
+
+def tempo_por_agente_objeto(nome_arquivo, rodadas, semente=0, detectar_ciclos=True):
+    """Tempo médio de uma execução do Agente (um objeto por execução, headless)"""
+    inicio = time.perf_counter()
+    for i in range(rodadas):
+        ambiente = AmbienteGrade(nome_arquivo)
+        agente = Agente(ambiente, ambiente.obter_total_comida(), semente + i)
+        agente.silencioso = True
+        agente.detectar_ciclos = detectar_ciclos
+        agente.executar()
+    return (time.perf_counter() - inicio) / rodadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula muitos agentes em lote (lock-step, vetorizado)")
+    parser.add_argument("arquivo", help="arquivo do labirinto")
+    parser.add_argument("--agentes", type=int, default=1000, help="tamanho do lote (padrão: 1000)")
+    parser.add_argument("--semente", type=int, default=None,
+                        help="semente do agente 0 (o agente i usa semente + i; padrão: sorteada)")
+    parser.add_argument("--sem-fronteira", action="store_true", help="desliga a exploração por fronteira")
+    parser.add_argument("--sem-deteccao-ciclos", action="store_true",
+                        help="desliga a detecção de ciclos (só o limite de iterações interrompe)")
+    parser.add_argument("--comparar", type=int, default=0,
+                        help="mede também N execuções do Agente (um objeto por execução) para comparação")
+    parser.add_argument("--saida", default=None, help="salva os resultados por agente (.csv ou .json)")
+    argumentos = parser.parse_args()
+
+    inicio = time.perf_counter()
+    agentes = executar_lote(argumentos.arquivo, argumentos.agentes, argumentos.semente,
+                            not argumentos.sem_fronteira, not argumentos.sem_deteccao_ciclos)
+    duracao = time.perf_counter() - inicio
+
+    resultados = agentes.obter_resultados()
+    pontuacoes = np.array([linha['pontuacao'] for linha in resultados])
+    sucessos = sum(linha['sucesso'] for linha in resultados)
+    print(f"Agentes: {len(resultados)} | Sucessos: {sucessos} | "
+          f"Trajetórias distintas: {agentes.ambiente.trajetorias} | "
+          f"Iterações do lote: {agentes.iteracao}", flush=True)
+    print(f"Pontuação: média {pontuacoes.mean():.2f} | mínima {pontuacoes.min()} | máxima {pontuacoes.max()}",
+          flush=True)
+    print(f"Tempo: {duracao:.3f}s ({len(resultados) / duracao:.1f} execuções/s)", flush=True)
+
+    if argumentos.comparar:
+        tempo_objeto = tempo_por_agente_objeto(argumentos.arquivo, argumentos.comparar,
+                                               detectar_ciclos=not argumentos.sem_deteccao_ciclos)
+        print(f"Agente (objeto): {1 / tempo_objeto:.1f} execuções/s | "
+              f"ganho do lote: {len(resultados) / duracao * tempo_objeto:.1f}x", flush=True)
+
+    if argumentos.saida:
+        salvar_relatorio(resultados, argumentos.saida, CAMPOS_RELATORIO)
+        print(f"Resultados salvos em: {argumentos.saida}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import sys
+import json
+import time
+import argparse
+from collections import deque
+import numpy as np
+
+from maze_agent import AmbienteGrade, PAREDE, COMIDA, SAIDA, DESLOCAMENTOS
+
+
+# Até quantas comidas a ordem de visita é resolvida de forma exata (Held-Karp, O(2^n n^2))
+LIMITE_HELD_KARP = 15
+
+# Limite de elementos (origens x células) por lote da BFS de múltiplas origens
+ELEMENTOS_POR_LOTE = 1 << 26
+
+INFINITO = np.iinfo(np.int32).max // 4
+
+
+def distancias_entre_pontos(aberto, origens, destinos):
+    """BFS simultânea de várias origens sobre a grade (vetorizada com NumPy).
+
+    aberto é a grade booleana com borda de paredes; origens e destinos são índices
+    lineares dessa grade. Retorna a matriz (origens x destinos) de distâncias em
+    passos, com INFINITO onde não há caminho. As origens são processadas em lotes
+    para limitar a memória do mapa de visitadas (lote x células).
+    """
+    largura = aberto.shape[1]
+    celulas = aberto.size
+    aberto_plano = aberto.ravel()
+    deslocamentos = np.array([-largura, largura, -1, 1])
+
+    indice_destino = np.full(celulas, -1, dtype=np.int64)
+    indice_destino[destinos] = np.arange(len(destinos))
+    distancias = np.full((len(origens), len(destinos)), INFINITO, dtype=np.int32)
+
+    tamanho_lote = max(1, ELEMENTOS_POR_LOTE // celulas)
+    for inicio in range(0, len(origens), tamanho_lote):
+        lote = np.asarray(origens[inicio:inicio + tamanho_lote], dtype=np.int64)
+        visitadas = np.zeros(len(lote) * celulas, dtype=bool)
+
+        # Cada elemento da fronteira codifica (origem do lote, célula)
+        fronteira = np.arange(len(lote), dtype=np.int64) * celulas + lote
+        visitadas[fronteira] = True
+        nivel = 0
+        while fronteira.size:
+            origem_lote, celula = np.divmod(fronteira, celulas)
+            alvo = indice_destino[celula]
+            achados = alvo >= 0
+            distancias[inicio + origem_lote[achados], alvo[achados]] = nivel
+
+            # Expande os quatro vizinhos de toda a fronteira de uma vez. Como a grade
+            # tem borda de paredes, o vizinho de (origem, célula) é só fronteira + deslocamento;
+            # a fronteira está ordenada, então cada direção gera uma sequência já ordenada
+            # e basta juntar as quatro e descartar os repetidos.
+            partes = []
+            for deslocamento in deslocamentos:
+                vizinhos = fronteira + deslocamento
+                partes.append(vizinhos[aberto_plano[celula + deslocamento] & ~visitadas[vizinhos]])
+            codificados = np.sort(np.concatenate(partes), kind='stable')
+            if codificados.size:
+                codificados = codificados[np.r_[True, codificados[1:] != codificados[:-1]]]
+            fronteira = codificados
+            visitadas[fronteira] = True
+            nivel += 1
+
+    return distancias
+
+
+def custo_rota(rota, distancias):
+    """Custo de uma rota (sequência de índices de pontos)"""
+    rota = np.asarray(rota)
+    return int(distancias[rota[:-1], rota[1:]].sum())
+
+
+def ordem_held_karp(distancias, inicio, fim, comidas):
+    """Ordem ótima de visita (programação dinâmica de Held-Karp sobre subconjuntos).
+
+    As camadas de subconjuntos com o mesmo número de comidas são processadas de
+    forma vetorizada.
+    """
+    n = len(comidas)
+    if n == 0:
+        return []
+
+    d = distancias[np.ix_(comidas, comidas)].astype(np.int64)
+    total = 1 << n
+    custos = np.full((total, n), INFINITO, dtype=np.int64)
+    anteriores = np.full((total, n), -1, dtype=np.int16)
+    for j in range(n):
+        custos[1 << j, j] = distancias[inicio, comidas[j]]
+
+    mascaras = np.arange(total)
+    contagem = np.array([bin(m).count('1') for m in range(total)])
+    for tamanho in range(2, n + 1):
+        camada = mascaras[contagem == tamanho]
+        for j in range(n):
+            bit = 1 << j
+            selecionadas = camada[(camada & bit) != 0]
+            candidatos = custos[selecionadas ^ bit] + d[:, j]
+            melhores = np.argmin(candidatos, axis=1)
+            custos[selecionadas, j] = candidatos[np.arange(len(selecionadas)), melhores]
+            anteriores[selecionadas, j] = melhores
+
+    completo = total - 1
+    finais = custos[completo] + distancias[comidas, fim]
+    atual = int(np.argmin(finais))
+    ordem = []
+    mascara = completo
+    while atual >= 0:
+        ordem.append(comidas[atual])
+        anterior = int(anteriores[mascara, atual])
+        mascara ^= 1 << atual
+        atual = anterior
+    return ordem[::-1]
+
+
+def ordem_vizinho_mais_proximo(distancias, inicio, comidas):
+    """Ordem gulosa: sempre a comida ainda não visitada mais próxima"""
+    restantes = np.array(comidas)
+    ordem = []
+    atual = inicio
+    while len(restantes):
+        proxima = int(np.argmin(distancias[atual, restantes]))
+        atual = int(restantes[proxima])
+        ordem.append(atual)
+        restantes = np.delete(restantes, proxima)
+    return ordem
+
+
+def melhorar_2opt(rota, distancias, prazo):
+    """2-opt em caminho aberto com extremos fixos: inverte trechos enquanto houver ganho"""
+    rota = np.array(rota)
+    melhorou = True
+    while melhorou and time.perf_counter() < prazo:
+        melhorou = False
+        for i in range(1, len(rota) - 2):
+            # Inverter rota[i..j] troca as arestas (i-1, i) e (j, j+1) por (i-1, j) e (i, j+1)
+            j = np.arange(i + 1, len(rota) - 1)
+            ganho = (distancias[rota[i - 1], rota[i]] + distancias[rota[j], rota[j + 1]]
+                     - distancias[rota[i - 1], rota[j]] - distancias[rota[i], rota[j + 1]])
+            melhor = int(np.argmax(ganho))
+            if ganho[melhor] > 0:
+                fim = j[melhor]
+                rota[i:fim + 1] = rota[i:fim + 1][::-1]
+                melhorou = True
+    return rota.tolist()
+
+
+def melhorar_or_opt(rota, distancias, prazo, maximo_trecho=3):
+    """Or-opt: move trechos de 1 a 3 pontos (na ordem original ou invertidos) para a melhor posição"""
+    rota = list(rota)
+    melhorou = True
+    while melhorou and time.perf_counter() < prazo:
+        melhorou = False
+        for tamanho in range(1, maximo_trecho + 1):
+            i = 1
+            while i + tamanho < len(rota):
+                anterior, primeiro, ultimo, seguinte = rota[i - 1], rota[i], rota[i + tamanho - 1], rota[i + tamanho]
+                ganho_remocao = (distancias[anterior, primeiro] + distancias[ultimo, seguinte]
+                                 - distancias[anterior, seguinte])
+
+                restante = np.array(rota[:i] + rota[i + tamanho:])
+                a, b = restante[:-1], restante[1:]
+                direto = distancias[a, primeiro] + distancias[ultimo, b] - distancias[a, b]
+                invertido = distancias[a, ultimo] + distancias[primeiro, b] - distancias[a, b]
+                custos = np.minimum(direto, invertido)
+                custos[i - 1] = INFINITO  # Reinserir no mesmo lugar
+                posicao = int(np.argmin(custos))
+
+                if custos[posicao] < ganho_remocao:
+                    trecho = rota[i:i + tamanho]
+                    if invertido[posicao] < direto[posicao]:
+                        trecho = trecho[::-1]
+                    nova = restante.tolist()
+                    rota = nova[:posicao + 1] + trecho + nova[posicao + 1:]
+                    melhorou = True
+                else:
+                    i += 1
+    return rota
+
+
+def caminho_entre(aberto, origem, destino):
+    """Caminho célula a célula (BFS) entre dois índices lineares da grade com borda"""
+    largura = aberto.shape[1]
+    aberto_plano = aberto.ravel()
+    anteriores = {origem: None}
+    fila = deque([origem])
+    while fila:
+        celula = fila.popleft()
+        if celula == destino:
+            break
+        for vizinho in (celula - largura, celula + largura, celula - 1, celula + 1):
+            if aberto_plano[vizinho] and vizinho not in anteriores:
+                anteriores[vizinho] = celula
+                fila.append(vizinho)
+
+    caminho = []
+    celula = destino
+    while celula is not None:
+        caminho.append(celula)
+        celula = anteriores[celula]
+    return caminho[::-1]
+
+
+def direcoes_do_caminho(caminho, largura):
+    """Converte um caminho de índices lineares na sequência de direções N/L/S/O"""
+    nome_direcao = {linha * largura + coluna: direcao for direcao, (linha, coluna) in DESLOCAMENTOS.items()}
+    return ''.join(nome_direcao[b - a] for a, b in zip(caminho, caminho[1:]))
+
+
+def resolver_labirinto(nome_arquivo, limite_held_karp=LIMITE_HELD_KARP, tempo_maximo=10.0, com_caminho=False):
+    """Resolve o labirinto com conhecimento total: menor rota E -> todas as comidas -> S.
+
+    Retorna um dicionário com a pontuação ótima (ou quase ótima, acima do limite do
+    Held-Karp), os passos, a ordem de visita das comidas e, opcionalmente, as direções.
+    tempo_maximo conta desde o início da chamada, mas só interrompe a melhoria 2-opt/Or-opt:
+    as distâncias entre os pontos (BFS) são sempre calculadas até o fim e, em labirintos
+    grandes, sozinhas podem passar dele (tempo_distancias_s no resultado).
+    """
+    inicio_tempo = time.perf_counter()
+    ambiente = AmbienteGrade(nome_arquivo)
+    aberto = ambiente.grade_borda != PAREDE
+    largura = aberto.shape[1]
+
+    def indice(linha, coluna):
+        return (linha + 1) * largura + (coluna + 1)
+
+    entrada = indice(ambiente.linha_agente, ambiente.coluna_agente)
+    comidas = [indice(l, c) for l, c in np.argwhere(ambiente.grade == COMIDA).tolist()]
+    saidas = [indice(l, c) for l, c in np.argwhere(ambiente.grade == SAIDA).tolist()]
+
+    resultado = {'arquivo': nome_arquivo, 'comida_total': len(comidas)}
+    if not saidas:
+        resultado.update(erro="Labirinto sem saída (S)", tempo_s=round(time.perf_counter() - inicio_tempo, 6))
+        return resultado
+
+    # Pontos: 0 = entrada, 1..n = comidas, n+1 = saída (a mais próxima de cada ponto)
+    origens = [entrada] + comidas
+    brutas = distancias_entre_pontos(aberto, origens, origens + saidas)
+    resultado['tempo_distancias_s'] = round(time.perf_counter() - inicio_tempo, 6)
+    n = len(origens)
+    distancias = np.full((n + 1, n + 1), INFINITO, dtype=np.int64)
+    distancias[:n, :n] = brutas[:, :n]
+    distancias[:n, n] = brutas[:, n:].min(axis=1)
+    distancias[n, :n] = distancias[:n, n]
+    distancias[n, n] = 0
+
+    # Comidas inalcançáveis a partir da entrada ficam de fora da rota
+    alcancaveis = [i for i in range(1, n) if distancias[0, i] < INFINITO]
+    resultado['comida_alcancavel'] = len(alcancaveis)
+    if distancias[0, n] >= INFINITO:
+        resultado.update(erro="Saída inalcançável a partir da entrada",
+                         tempo_s=round(time.perf_counter() - inicio_tempo, 6))
+        return resultado
+
+    if len(alcancaveis) <= limite_held_karp:
+        ordem = ordem_held_karp(distancias, 0, n, alcancaveis)
+        otimo = True
+    else:
+        prazo = inicio_tempo + tempo_maximo
+        rota = [0] + ordem_vizinho_mais_proximo(distancias, 0, alcancaveis) + [n]
+        rota = melhorar_2opt(rota, distancias, prazo)
+        rota = melhorar_or_opt(rota, distancias, prazo)
+        ordem = rota[1:-1]
+        otimo = False
+
+    rota = [0] + ordem + [n]
+    passos = custo_rota(rota, distancias)
+    resultado.update(
+        passos=passos,
+        pontuacao=len(alcancaveis) * 10 - passos,
+        otimo=otimo,
+        ordem=[(origens[i] // largura - 1, origens[i] % largura - 1) for i in ordem],
+    )
+
+    if com_caminho:
+        pontos = [origens[i] for i in rota[:-1]]
+        # Último trecho: até a saída mais próxima do último ponto
+        ultimo = rota[-2]
+        saida = saidas[int(np.argmin(brutas[ultimo, n:]))]
+        caminho = [entrada]
+        for origem, destino in zip(pontos, pontos[1:] + [saida]):
+            caminho += caminho_entre(aberto, origem, destino)[1:]
+        resultado['direcoes'] = direcoes_do_caminho(caminho, largura)
+
+    resultado['tempo_s'] = round(time.perf_counter() - inicio_tempo, 6)
+    return resultado
+
+
+def main():
+    # Import local: o benchmark_lote importa este módulo para a coluna de referência
+    from benchmark_lote import listar_labirintos
+
+    parser = argparse.ArgumentParser(description="Solucionador com conhecimento total (referência de pontuação)")
+    parser.add_argument("entradas", nargs="+", help="arquivos, diretórios (*.txt) ou padrões glob de labirintos")
+    parser.add_argument("--limite-held-karp", type=int, default=LIMITE_HELD_KARP,
+                        help=f"máximo de comidas resolvido de forma exata (padrão: {LIMITE_HELD_KARP})")
+    parser.add_argument("--tempo-maximo", type=float, default=10.0,
+                        help="prazo (s, desde o início de cada labirinto) da melhoria 2-opt/Or-opt; o cálculo "
+                             "das distâncias sempre vai até o fim e pode passar dele (padrão: 10)")
+    parser.add_argument("--caminho", action="store_true", help="inclui a sequência de direções da rota")
+    parser.add_argument("--saida", default=None, help="salva os resultados em JSON")
+    argumentos = parser.parse_args()
+
+    resultados = []
+    for nome in listar_labirintos(argumentos.entradas):
+        resultado = resolver_labirinto(nome, argumentos.limite_held_karp, argumentos.tempo_maximo,
+                                       argumentos.caminho)
+        resultados.append(resultado)
+        if 'erro' in resultado:
+            print(f"{nome}: {resultado['erro']}", flush=True)
+            continue
+        tipo = "ótima" if resultado['otimo'] else "quase ótima"
+        print(f"{nome}: pontuação {tipo} {resultado['pontuacao']} "
+              f"({resultado['passos']} passos, {resultado['comida_alcancavel']}/{resultado['comida_total']} comidas, "
+              f"{resultado['tempo_s']:.3f}s, dos quais {resultado['tempo_distancias_s']:.3f}s nas distâncias)",
+              flush=True)
+        if argumentos.caminho:
+            print(f"  Direções: {resultado['direcoes']}", flush=True)
+
+    if argumentos.saida:
+        with open(argumentos.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em: {argumentos.saida}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())